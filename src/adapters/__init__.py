@@ -5,11 +5,13 @@ Adaptadores para integración con fuentes de datos externas.
 from .sidegor_adapter import SidegorAdapter, SidegorExtractor
 from .rhnet_document_generator import RHNetDocumentGenerator
 from .sidegor_batch_processor import SidegorBatchProcessor, BatchProcessingResult
+from .batch_journal import BatchJournal
 
 __all__ = [
     'SidegorAdapter',
     'SidegorExtractor',
     'RHNetDocumentGenerator',
     'SidegorBatchProcessor',
-    'BatchProcessingResult'
+    'BatchProcessingResult',
+    'BatchJournal'
 ]
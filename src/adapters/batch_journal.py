@@ -0,0 +1,213 @@
+"""
+Bitácora de ejecución para procesamiento en lote reanudable.
+
+Cada puesto terminado se agrega como una línea JSON a un archivo por ejecución
+(run_id), con flush + fsync, de modo que un fallo a mitad del lote (OOM,
+reinicio de Ollama, cierre del contenedor) no pierde el trabajo hecho. Al volver
+a ejecutar con el mismo run_id se omiten los códigos ya completados.
+
+Incluye escritura atómica de archivos (archivo temporal + os.replace) para los
+intermedios del lote: un archivo de salida nunca queda a medio escribir.
+
+Fecha: 2025-11-12
+Versión: 5.43
+"""
+
+import json
+import os
+import tempfile
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+PathLike = Union[str, Path]
+
+
+def escribir_atomico(ruta: PathLike, contenido: str, encoding: str = 'utf-8') -> None:
+    """
+    Escribe un archivo de texto de forma atómica.
+
+    El contenido se escribe en un temporal del mismo directorio y se renombra
+    sobre el destino, así los lectores ven el archivo anterior o el nuevo completo.
+
+    Args:
+        ruta: Archivo destino
+        contenido: Texto a escribir
+        encoding: Codificación
+    """
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(prefix=f".{ruta.name}.", suffix=".tmp", dir=ruta.parent)
+    try:
+        with os.fdopen(fd, 'w', encoding=encoding) as f:
+            f.write(contenido)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, ruta)
+    except BaseException:
+        try:
+            os.unlink(temporal)
+        except OSError:
+            pass
+        raise
+
+
+def escribir_json_atomico(ruta: PathLike, datos: Any, indent: Optional[int] = 2) -> None:
+    """Serializa `datos` a JSON y lo escribe con escribir_atomico()"""
+    escribir_atomico(ruta, json.dumps(datos, ensure_ascii=False, indent=indent, default=str))
+
+
+def nuevo_run_id() -> str:
+    """Identificador de ejecución legible y único (ej: 20251112_153000_a1b2c3)"""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+
+class BatchJournal:
+    """
+    Bitácora append-only (JSONL) de puestos completados en una ejecución.
+
+    Thread-safe: varios hilos pueden registrar resultados a la vez.
+
+    Example:
+        >>> journal = BatchJournal("output/batch/journal", run_id="20251112_lote_ur27")
+        >>> pendientes = [c for c in codigos if not journal.esta_completado(c)]
+        >>> journal.registrar({"codigo": "27-100-...", "status": "success", ...})
+    """
+
+    def __init__(self,
+                 journal_dir: PathLike,
+                 run_id: Optional[str] = None,
+                 reintentar_fallidos: bool = True):
+        """
+        Inicializa la bitácora y carga los registros existentes del run_id.
+
+        Args:
+            journal_dir: Directorio de bitácoras (un archivo <run_id>.jsonl por ejecución)
+            run_id: Identificador de la ejecución (None = nueva ejecución)
+            reintentar_fallidos: Si True, al reanudar solo se omiten los puestos con
+                status "success"; los fallidos se vuelven a procesar
+        """
+        self.run_id = run_id or nuevo_run_id()
+        self.journal_dir = Path(journal_dir)
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        self.ruta = self.journal_dir / f"{self.run_id}.jsonl"
+        self.reintentar_fallidos = reintentar_fallidos
+
+        self._lock = threading.Lock()
+        # Solo status y línea del último registro por código: la memoria no crece
+        # con el tamaño de los resultados (estos se releen del archivo al reanudar)
+        self._completados: Dict[str, Tuple[Optional[str], int]] = {}
+        self._lineas = 0
+        self.lineas_corruptas = 0
+
+        self._cargar()
+        self.reanudado = bool(self._completados)
+
+    def esta_completado(self, codigo: str) -> bool:
+        """True si el puesto ya se completó en esta ejecución y no debe repetirse"""
+        with self._lock:
+            registro = self._completados.get(str(codigo))
+        if registro is None:
+            return False
+        return not self.reintentar_fallidos or registro[0] == "success"
+
+    def resultados_previos(self) -> Iterator[Dict[str, Any]]:
+        """
+        Resultados registrados que se omitirán al reanudar (en orden de registro).
+
+        Se leen del archivo bajo demanda, sin cargarlos todos en memoria.
+        """
+        with self._lock:
+            ultimos = {codigo: linea for codigo, (_, linea) in self._completados.items()}
+
+        for numero, resultado in self._leer_registros():
+            codigo = str(resultado.get("codigo"))
+            if ultimos.get(codigo) == numero and self.esta_completado(codigo):
+                yield resultado
+
+    def registrar(self, resultado: Dict[str, Any]) -> None:
+        """
+        Agrega el resultado de un puesto a la bitácora (flush + fsync).
+
+        Args:
+            resultado: Dict del puesto; debe incluir "codigo"
+        """
+        linea = json.dumps({
+            "run_id": self.run_id,
+            "timestamp": datetime.now().isoformat(),
+            "resultado": resultado
+        }, ensure_ascii=False, default=str)
+
+        with self._lock:
+            with open(self.ruta, 'a', encoding='utf-8') as f:
+                f.write(linea + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._completados[str(resultado.get("codigo"))] = (resultado.get("status"), self._lineas)
+            self._lineas += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas de la bitácora"""
+        with self._lock:
+            total = len(self._completados)
+            exitosos = sum(1 for status, _ in self._completados.values() if status == "success")
+        return {
+            "run_id": self.run_id,
+            "archivo": str(self.ruta),
+            "registrados": total,
+            "exitosos": exitosos,
+            "reanudado": self.reanudado,
+            "lineas_corruptas": self.lineas_corruptas
+        }
+
+    # ==========================================
+    # MÉTODOS PRIVADOS
+    # ==========================================
+
+    def _cargar(self) -> None:
+        """
+        Lee la bitácora existente. Una última línea truncada (fallo durante la
+        escritura) se ignora; si un código aparece varias veces gana el último registro.
+        """
+        if not self.ruta.exists():
+            return
+
+        for numero, resultado in self._leer_registros(contar_corruptas=True):
+            self._completados[str(resultado.get("codigo"))] = (resultado.get("status"), numero)
+            self._lineas = numero + 1
+
+        # Cerrar una línea truncada para que el siguiente registro empiece limpio
+        with open(self.ruta, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            truncada = False
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                truncada = f.read(1) != b"\n"
+        if truncada:
+            with open(self.ruta, 'a', encoding='utf-8') as f:
+                f.write("\n")
+
+        if self.lineas_corruptas:
+            print(f"⚠️ Bitácora {self.ruta.name}: {self.lineas_corruptas} líneas ilegibles ignoradas")
+
+    def _leer_registros(self, contar_corruptas: bool = False) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Registros legibles del archivo como (número de registro, resultado)"""
+        if not self.ruta.exists():
+            return
+
+        numero = 0
+        with open(self.ruta, 'r', encoding='utf-8', errors='replace') as f:
+            for linea in f:
+                linea = linea.strip()
+                if not linea:
+                    continue
+                try:
+                    resultado = json.loads(linea)["resultado"]
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    if contar_corruptas:
+                        self.lineas_corruptas += 1
+                    continue
+                yield numero, resultado
+                numero += 1
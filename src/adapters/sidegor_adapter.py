@@ -7,14 +7,35 @@ Refactorizado para cumplir con principios SOLID.
 """
 
 import pandas as pd
+import hashlib
+import json
+import os
+import shutil
+import tempfile
 import warnings
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, Iterator, List, Optional, Any, Tuple
 import re
 
 warnings.filterwarnings('ignore')
 
+# Lector rápido de Excel (Rust); pandas >= 2.2 lo expone como engine="calamine"
+try:
+    import python_calamine  # noqa: F401
+    CALAMINE_AVAILABLE = True
+except ImportError:
+    CALAMINE_AVAILABLE = False
+
+# Caché columnar de hojas ya parseadas
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+CACHE_FORMAT_VERSION = 2
+
 
 # Mapeo de hojas Excel a secciones del schema APF
 SHEET_MAPPING = {
@@ -31,31 +52,120 @@ SHEET_MAPPING = {
     'CAPACIDADES': 'capacidades_tecnicas'
 }
 
+# Esquema declarado por hoja: columnas que leen los convertidores y los filtros,
+# con su dtype ("category" para códigos repetidos, "string" para texto libre,
+# None = tipo inferido). La columna de código de puesto se conserva siempre; las
+# hojas sin columnas declaradas solo aportan el código (hojas_encontradas).
+_COLUMNAS_COMPETENCIAS = {
+    'DESCRIPCIÓN_DE_LA_COMPETENCIA': 'string',
+    'CAPACIDAD': 'string',
+    'DESCRIPCIÓN_DEL_NIVEL_REQUERIDO': 'category',
+    'NIVEL': 'category'
+}
+
+SHEET_SCHEMAS: Dict[str, Dict[str, Optional[str]]] = {
+    'PUESTOS': {
+        'CÓDIGO_DE_PUESTO': 'string',
+        'DESCRIPCIÓN_DEL_PUESTO': 'string',
+        'GRUPO': 'category',
+        'GRADO': 'category',
+        'NIVEL': 'category',
+        'CARACTERÍSTICA OCUPACIONAL': 'category',
+        'ESTATUS': 'category',
+        'RAMO': 'category',
+        'UR': 'category',
+        'TIPO DE PLAZA': 'category',
+        'GRUPO_DE_PERSONAL': 'category',
+        'TIPO_DE_NOMBRAMIENTO': 'category',
+        'FECHA_DE_APROBACIÓN': None
+    },
+    'OBJ_FUNCIONES': {
+        'ID_FUNCIONES': None,
+        'DESCRIPCIÓN_DEL_OBJETIVO': 'string',
+        'DESCRIPCIÓN_DE_LAS_FUNCIONES': 'string'
+    },
+    'ESCOLARIDAD': {
+        'DESCRIPCIÓN_DEL_NIVEL_DE_ESTUDIOS': 'category',
+        'DESCRIPCIÓN_DEL_GRADO_DE_AVANCE': 'category',
+        'DESCRIPCIÓN_DEL_ÁREA_GENERAL': 'category',
+        'DESCRIPCIÓN_DE_LA_CARRERA_GENÉRICA': 'category'
+    },
+    'EXP_LAB': {
+        'DESCRIPCIÓN_DE_LOS_AÑOS_DE_EXPERIENCIA': 'category',
+        'DESCRIPCIÓN_DEL_ÁREA_DE_EXPERIENCIA': 'category'
+    },
+    'COMPETENCIAS': _COLUMNAS_COMPETENCIAS,
+    'COND_TRABAJO': {
+        'HORARIO': 'category',
+        'DISPONIBILIDAD_VIAJAR': 'category',
+        'PERIODOS_ESPECIALES': 'string',
+        'CAMBIO_RESIDENCIA': 'category'
+    },
+    'ASPE_RELEV': {},
+    'ENT_OPER': {
+        'TIPO_RELACION': 'category',
+        'EXPLICACION': 'string',
+        'CARACTERISTICA_INFORMACION': 'string'
+    },
+    'CAP_PROF': _COLUMNAS_COMPETENCIAS,
+    'OBSERVACIONES': {},
+    'CAPACIDADES': _COLUMNAS_COMPETENCIAS
+}
+
+
+# iterar_puestos(): a partir de esta fracción de las filas de una hoja se convierte
+# la hoja completa en lugar de solo las filas de los códigos pedidos
+FRACCION_CONVERSION_COMPLETA = 0.25
+
+
+def _es_columna_codigo(col: Any) -> bool:
+    col_upper = str(col).strip().upper()
+    return 'CÓDIGO_DE_PUESTO' in col_upper or 'CODIGO_DE_PUESTO' in col_upper
+
 
 class SidegorExtractor:
     """
     Extractor de información de puestos desde archivos Excel de Sidegor.
     """
 
-    def __init__(self, archivo_excel: str):
+    def __init__(self, archivo_excel: str, cache_dir: Optional[str] = None,
+                 proyectar_columnas: bool = True):
         """
         Inicializa el extractor de Sidegor.
 
         Args:
             archivo_excel: Ruta al archivo Excel de Sidegor
+            cache_dir: Directorio de la caché Parquet de hojas parseadas
+                (None = SIDEGOR_CACHE_DIR o CACHE_DIR/sidegor; sin ninguno, sin caché)
+            proyectar_columnas: Leer solo las columnas de SHEET_SCHEMAS con sus dtypes
+                (False = todas las columnas con tipos inferidos)
         """
         self.archivo = archivo_excel
         self.archivo_path = Path(archivo_excel)
+        self.cache_dir = self._resolver_cache_dir(cache_dir)
+        self.proyectar_columnas = proyectar_columnas
         self.hojas = {}
         self.hojas_cargadas = []
         self.errores_carga = []
 
+        # Índice por hoja: columna de código y código → posiciones de fila
+        self.columnas_codigo: Dict[str, str] = {}
+        self.indice_codigos: Dict[str, Dict[Any, Any]] = {}
+
+        # Registros de hojas completas ya convertidas, reutilizados entre llamadas a
+        # iterar_puestos() si cachear_registros está activo (workers del lote paralelo)
+        self.cachear_registros = False
+        self._registros_completos: Dict[str, List[Dict[str, Any]]] = {}
+
         # Estadísticas
         self.stats = {
             "archivo": self.archivo_path.name,
             "hojas_disponibles": 0,
             "hojas_cargadas": 0,
             "codigos_encontrados": 0,
+            "motor_lectura": None,
+            "desde_cache": False,
+            "memoria_mb": 0.0,
             "timestamp": datetime.now().isoformat()
         }
 
@@ -69,34 +179,18 @@ class SidegorExtractor:
         print(f"📂 Cargando archivo: {self.archivo_path.name}")
 
         try:
-            excel_file = pd.ExcelFile(self.archivo)
-            hojas_disponibles = excel_file.sheet_names
-
-            self.stats["hojas_disponibles"] = len(hojas_disponibles)
+            clave = self._clave_cache() if self.cache_dir else None
 
-            for hoja_nombre in SHEET_MAPPING.keys():
-                if hoja_nombre in hojas_disponibles:
-                    try:
-                        df = pd.read_excel(self.archivo, sheet_name=hoja_nombre)
-
-                        # Limpiar nombres de columnas
-                        df.columns = [
-                            col.strip() if isinstance(col, str) else col
-                            for col in df.columns
-                        ]
-
-                        self.hojas[hoja_nombre] = df
-                        self.hojas_cargadas.append(hoja_nombre)
-                        print(f"  ✅ {hoja_nombre}: {len(df)} registros, {len(df.columns)} columnas")
-
-                    except Exception as e:
-                        error_msg = f"Error cargando hoja {hoja_nombre}: {str(e)}"
-                        self.errores_carga.append(error_msg)
-                        print(f"  ⚠️ {error_msg}")
-                else:
-                    print(f"  ⚠️ Hoja '{hoja_nombre}' no encontrada")
+            if not (clave and self._cargar_desde_cache(clave)):
+                self._cargar_desde_excel()
+                if clave:
+                    self._guardar_en_cache(clave)
 
             self.stats["hojas_cargadas"] = len(self.hojas_cargadas)
+            self.stats["memoria_mb"] = round(sum(
+                df.memory_usage(deep=True).sum() for df in self.hojas.values()
+            ) / 1024 / 1024, 2)
+            self._construir_indice()
 
             # Verificar hojas críticas
             hojas_criticas = ['PUESTOS', 'OBJ_FUNCIONES']
@@ -106,13 +200,192 @@ class SidegorExtractor:
                 print(f"❌ Error: No se cargaron las hojas críticas: {hojas_criticas}")
                 return False
 
-            print(f"\n✅ Archivo cargado: {len(self.hojas_cargadas)}/{len(SHEET_MAPPING)} hojas")
+            print(f"\n✅ Archivo cargado: {len(self.hojas_cargadas)}/{len(SHEET_MAPPING)} hojas "
+                  f"({self.stats['memoria_mb']} MB)")
             return True
 
         except Exception as e:
             print(f"❌ Error crítico cargando archivo: {str(e)}")
             return False
 
+    def _cargar_desde_excel(self) -> None:
+        """
+        Parsea todas las hojas esperadas en una sola apertura del libro.
+
+        Usa calamine si está instalado (mucho más rápido que openpyxl en libros
+        grandes) y cae a openpyxl si no está o si la versión de pandas no lo soporta.
+        """
+        ultimo_error = None
+        for motor in (["calamine"] if CALAMINE_AVAILABLE else []) + ["openpyxl"]:
+            try:
+                with pd.ExcelFile(self.archivo, engine=motor) as excel_file:
+                    self.stats["motor_lectura"] = motor
+                    self._parsear_hojas(excel_file)
+                return
+            except (ValueError, ImportError) as e:
+                ultimo_error = e
+                print(f"  ⚠️ Motor {motor} no disponible: {str(e)}")
+        raise ultimo_error
+
+    def _parsear_hojas(self, excel_file: pd.ExcelFile) -> None:
+        hojas_disponibles = excel_file.sheet_names
+        self.stats["hojas_disponibles"] = len(hojas_disponibles)
+
+        for hoja_nombre in SHEET_MAPPING.keys():
+            if hoja_nombre in hojas_disponibles:
+                try:
+                    usecols = self._selector_columnas(hoja_nombre) if self.proyectar_columnas else None
+                    df = excel_file.parse(sheet_name=hoja_nombre, usecols=usecols)
+
+                    # Limpiar nombres de columnas
+                    df.columns = [
+                        col.strip() if isinstance(col, str) else col
+                        for col in df.columns
+                    ]
+
+                    if self.proyectar_columnas:
+                        df = self._aplicar_tipos(hoja_nombre, df)
+
+                    self.hojas[hoja_nombre] = df
+                    self.hojas_cargadas.append(hoja_nombre)
+                    print(f"  ✅ {hoja_nombre}: {len(df)} registros, {len(df.columns)} columnas")
+
+                except Exception as e:
+                    error_msg = f"Error cargando hoja {hoja_nombre}: {str(e)}"
+                    self.errores_carga.append(error_msg)
+                    print(f"  ⚠️ {error_msg}")
+            else:
+                print(f"  ⚠️ Hoja '{hoja_nombre}' no encontrada")
+
+    @staticmethod
+    def _selector_columnas(hoja_nombre: str):
+        """
+        usecols para la hoja (compara nombres sin espacios, igual que la limpieza posterior).
+
+        El motor de Excel sigue leyendo todas las celdas de la hoja; usecols solo
+        descarta las columnas no declaradas al armar el DataFrame. Reduce la memoria
+        de las hojas cargadas (y de la caché Parquet), no el tiempo de parseo.
+        """
+        columnas = SHEET_SCHEMAS.get(hoja_nombre)
+        if columnas is None:
+            return None
+        return lambda col: _es_columna_codigo(col) or str(col).strip() in columnas
+
+    @staticmethod
+    def _aplicar_tipos(hoja_nombre: str, df: pd.DataFrame) -> pd.DataFrame:
+        """Fija los dtypes declarados; la columna de código se guarda como texto"""
+        columnas = SHEET_SCHEMAS.get(hoja_nombre, {})
+        for col in df.columns:
+            dtype = 'string' if _es_columna_codigo(col) else columnas.get(col)
+            if dtype is None:
+                continue
+            try:
+                df[col] = df[col].astype(dtype)
+            except (TypeError, ValueError) as e:
+                print(f"  ⚠️ {hoja_nombre}.{col}: se conserva el tipo inferido ({str(e)})")
+        return df
+
+    @staticmethod
+    def _a_registros(df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """
+        Registros de un DataFrame con los faltantes (NaN, NaT, pd.NA) como None, para
+        que los convertidores no reciban pd.NA (cuyo valor de verdad es ambiguo).
+        """
+        return df.astype(object).where(df.notna(), None).to_dict('records')
+
+    # ==========================================
+    # CACHÉ PARQUET POR HUELLA DE ARCHIVO
+    # ==========================================
+
+    @staticmethod
+    def _resolver_cache_dir(cache_dir: Optional[str]) -> Optional[Path]:
+        if not PARQUET_AVAILABLE:
+            return None
+        if cache_dir is None:
+            cache_dir = os.getenv("SIDEGOR_CACHE_DIR")
+        if cache_dir is None and os.getenv("CACHE_DIR"):
+            cache_dir = os.path.join(os.getenv("CACHE_DIR"), "sidegor")
+        return Path(cache_dir) if cache_dir else None
+
+    def _clave_cache(self) -> str:
+        """
+        SHA-256 del contenido (el nombre del archivo subido cambia en cada carga),
+        más la versión del formato y el modo de proyección de columnas.
+        """
+        sha = hashlib.sha256()
+        with open(self.archivo, 'rb') as f:
+            for bloque in iter(lambda: f.read(1 << 20), b''):
+                sha.update(bloque)
+        sufijo = "" if self.proyectar_columnas else "-completo"
+        return f"{sha.hexdigest()}-v{CACHE_FORMAT_VERSION}{sufijo}"
+
+    def _cargar_desde_cache(self, clave: str) -> bool:
+        directorio = self.cache_dir / clave
+        manifiesto_path = directorio / "manifest.json"
+        if not manifiesto_path.exists():
+            return False
+
+        try:
+            with open(manifiesto_path, 'r', encoding='utf-8') as f:
+                manifiesto = json.load(f)
+            if manifiesto.get("version") != CACHE_FORMAT_VERSION:
+                return False
+
+            hojas = {
+                hoja_nombre: pd.read_parquet(directorio / f"{hoja_nombre}.parquet")
+                for hoja_nombre in manifiesto["hojas"]
+            }
+        except Exception as e:
+            print(f"  ⚠️ Caché inválida, se relee el Excel: {str(e)}")
+            return False
+
+        self.hojas = hojas
+        self.hojas_cargadas = list(hojas.keys())
+        self.stats["hojas_disponibles"] = manifiesto.get("hojas_disponibles", len(hojas))
+        self.stats["motor_lectura"] = "cache_parquet"
+        self.stats["desde_cache"] = True
+        for hoja_nombre, df in hojas.items():
+            print(f"  ✅ {hoja_nombre}: {len(df)} registros, {len(df.columns)} columnas (caché)")
+        return True
+
+    def _guardar_en_cache(self, clave: str) -> None:
+        """
+        Guarda las hojas parseadas como Parquet. Se escribe en un directorio temporal
+        y se renombra al final, para que un proceso concurrente nunca lea una caché a
+        medias. Si alguna hoja no es serializable (columnas con tipos mezclados), la
+        carga sigue sin caché.
+        """
+        if not self.hojas or self.errores_carga:
+            return  # No cachear una carga incompleta
+
+        destino = self.cache_dir / clave
+        temporal = None
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            temporal = Path(tempfile.mkdtemp(prefix=f".{clave[:12]}-", dir=self.cache_dir))
+
+            for hoja_nombre, df in self.hojas.items():
+                df.to_parquet(temporal / f"{hoja_nombre}.parquet", index=False)
+
+            with open(temporal / "manifest.json", 'w', encoding='utf-8') as f:
+                json.dump({
+                    "version": CACHE_FORMAT_VERSION,
+                    "archivo_origen": self.archivo_path.name,
+                    "hojas": self.hojas_cargadas,
+                    "hojas_disponibles": self.stats["hojas_disponibles"],
+                    "fecha": datetime.now().isoformat()
+                }, f, ensure_ascii=False, indent=2)
+
+            os.replace(temporal, destino)
+            temporal = None
+        except Exception as e:
+            if destino.exists():
+                return  # Otro proceso ya guardó la misma clave
+            print(f"  ⚠️ No se guardó la caché de {self.archivo_path.name}: {str(e)}")
+        finally:
+            if temporal is not None:
+                shutil.rmtree(temporal, ignore_errors=True)
+
     def listar_codigos_disponibles(self, limite: int = 10) -> List[str]:
         """
         Lista códigos de puesto disponibles en el archivo.
@@ -165,26 +438,131 @@ class SidegorExtractor:
             'datos_por_hoja': {}
         }
 
+        if len(self.indice_codigos) != len(self.hojas):
+            self._construir_indice()
+
         for nombre_hoja, df in self.hojas.items():
-            # Buscar columna de código
-            col_codigo = self._encontrar_columna_codigo(df)
+            # Posiciones de las filas del código (índice construido al cargar)
+            posiciones = self.indice_codigos.get(nombre_hoja, {}).get(codigo_puesto)
+
+            if posiciones is not None and len(posiciones) > 0:
+                resultado['hojas_encontradas'].append(nombre_hoja)
+                resultado['datos_por_hoja'][nombre_hoja] = self._a_registros(df.iloc[posiciones])
+
+        return resultado
+
+    def iterar_puestos(self, codigos: Optional[Iterable[Any]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Extrae varios puestos en una sola pasada por hoja.
+
+        Cada hoja se convierte a registros una sola vez y se reparte por código con
+        el índice de _construir_indice(), en lugar de un iloc().to_dict() por hoja
+        y por puesto como en extraer_puesto(). Si se piden pocos códigos, solo se
+        convierten sus filas (ver _registros_de_hoja).
+
+        Args:
+            codigos: Códigos a extraer (None = todos los de PUESTOS, en orden de aparición)
+
+        Yields:
+            Dict con la misma estructura que extraer_puesto()
+        """
+        if len(self.indice_codigos) != len(self.hojas):
+            self._construir_indice()
+
+        if codigos is None:
+            seleccion = None
+            codigos = list(self.indice_codigos.get('PUESTOS', {}).keys())
+            self.stats["codigos_encontrados"] = len(codigos)
+        else:
+            codigos = seleccion = list(codigos)
+
+        registros_por_hoja = {
+            nombre_hoja: self._registros_de_hoja(nombre_hoja, seleccion)
+            for nombre_hoja in self.hojas
+            if self.indice_codigos.get(nombre_hoja)
+        }
+
+        for codigo_puesto in codigos:
+            resultado = {
+                'codigo_puesto': codigo_puesto,
+                'hojas_encontradas': [],
+                'datos_por_hoja': {}
+            }
 
-            if col_codigo is not None:
-                # Filtrar registros del código específico
-                mask = df[col_codigo] == codigo_puesto
-                registros = df[mask]
+            for nombre_hoja, (registros, indice) in registros_por_hoja.items():
+                posiciones = indice.get(codigo_puesto)
 
-                if not registros.empty:
+                if posiciones is not None and len(posiciones) > 0:
                     resultado['hojas_encontradas'].append(nombre_hoja)
-                    resultado['datos_por_hoja'][nombre_hoja] = registros.to_dict('records')
+                    resultado['datos_por_hoja'][nombre_hoja] = [registros[i] for i in posiciones]
 
-        return resultado
+            yield resultado
+
+    def _registros_de_hoja(self, nombre_hoja: str,
+                           codigos: Optional[List[Any]]) -> Tuple[List[Dict[str, Any]], Dict[Any, Any]]:
+        """
+        Registros de una hoja y su índice código → posiciones dentro de esos registros.
+
+        Con un subconjunto de códigos que ocupa menos de FRACCION_CONVERSION_COMPLETA
+        de las filas, solo se convierten las filas de esos códigos (df.iloc); en otro
+        caso se convierte la hoja completa y se usa el índice de la hoja. Con
+        cachear_registros, la hoja completa se convierte una sola vez y se reutiliza.
+
+        Args:
+            nombre_hoja: Hoja a convertir
+            codigos: Códigos solicitados (None = todos)
+
+        Returns:
+            Tupla (registros, índice)
+        """
+        df = self.hojas[nombre_hoja]
+        indice = self.indice_codigos[nombre_hoja]
+
+        if nombre_hoja in self._registros_completos:
+            return self._registros_completos[nombre_hoja], indice
+
+        if codigos is not None:
+            grupos = {codigo: indice[codigo] for codigo in dict.fromkeys(codigos) if codigo in indice}
+            filas = sum(len(posiciones) for posiciones in grupos.values())
+
+            if filas < len(df) * FRACCION_CONVERSION_COMPLETA:
+                sub_indice = {}
+                inicio = 0
+                for codigo, posiciones in grupos.items():
+                    sub_indice[codigo] = range(inicio, inicio + len(posiciones))
+                    inicio += len(posiciones)
+                filas_seleccionadas = [int(i) for posiciones in grupos.values() for i in posiciones]
+                return self._a_registros(df.iloc[filas_seleccionadas]), sub_indice
+
+        registros = self._a_registros(df)
+        if self.cachear_registros:
+            self._registros_completos[nombre_hoja] = registros
+        return registros, indice
+
+    def _construir_indice(self) -> None:
+        """
+        Construye, una sola vez por archivo, el índice código → posiciones de fila
+        de cada hoja con groupby().indices. Así extraer_puesto() toma solo las filas
+        del código en lugar de comparar toda la columna en cada hoja por puesto.
+        """
+        self.columnas_codigo = {}
+        self.indice_codigos = {}
+        self._registros_completos = {}
+
+        for nombre_hoja, df in self.hojas.items():
+            col_codigo = self._encontrar_columna_codigo(df)
+            if col_codigo is None:
+                self.indice_codigos[nombre_hoja] = {}
+                continue
+
+            self.columnas_codigo[nombre_hoja] = col_codigo
+            # sort=False conserva el orden de aparición; las filas sin código se omiten
+            self.indice_codigos[nombre_hoja] = df.groupby(col_codigo, sort=False).indices
 
     def _encontrar_columna_codigo(self, df: pd.DataFrame) -> Optional[str]:
         """Encuentra la columna de código de puesto en un DataFrame"""
         for col in df.columns:
-            col_upper = str(col).upper()
-            if 'CÓDIGO_DE_PUESTO' in col_upper or 'CODIGO_DE_PUESTO' in col_upper:
+            if _es_columna_codigo(col):
                 return col
         return None
 
@@ -217,17 +595,21 @@ class SidegorAdapter:
             "conversiones_fallidas": 0
         }
 
-    def cargar_archivo(self, archivo_excel: str) -> bool:
+    def cargar_archivo(self, archivo_excel: str, cache_dir: Optional[str] = None,
+                       proyectar_columnas: bool = True) -> bool:
         """
         Carga archivo Excel de Sidegor.
 
         Args:
             archivo_excel: Ruta al archivo
+            cache_dir: Directorio de la caché de hojas parseadas (ver SidegorExtractor)
+            proyectar_columnas: Leer solo las columnas declaradas en SHEET_SCHEMAS
 
         Returns:
             True si se cargó correctamente
         """
-        self.extractor = SidegorExtractor(archivo_excel)
+        self.extractor = SidegorExtractor(archivo_excel, cache_dir=cache_dir,
+                                          proyectar_columnas=proyectar_columnas)
         return self.extractor.cargar_archivo()
 
     def listar_puestos(self, limite: int = 10) -> List[str]:
@@ -261,8 +643,101 @@ class SidegorAdapter:
 
         # Convertir al formato APF
         datos_apf = self._convertir_a_formato_apf(datos_raw, incluir_opcionales)
+        self._registrar_conversion(datos_apf)
+
+        return datos_apf
+
+    def convertir_todos(self, codigos: Optional[Iterable[Any]] = None,
+                        incluir_opcionales: bool = True) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+        """
+        Convierte varios puestos al formato APF en una sola pasada por hoja.
+
+        Equivalente a llamar convertir_puesto() por cada código, pero las hojas se
+        agrupan por código una sola vez (SidegorExtractor.iterar_puestos) y los
+        puestos se generan de uno en uno, sin materializar todo el lote.
 
-        # Actualizar estadísticas
+        Args:
+            codigos: Códigos a convertir (None = todos los de PUESTOS)
+            incluir_opcionales: Si incluir campos opcionales
+
+        Yields:
+            Tuplas (codigo_puesto, datos_apf). Si un puesto no se encuentra o falla
+            su conversión, datos_apf es {"error": ...} y el resto del lote continúa
+        """
+        if not self.extractor:
+            return
+
+        for datos_raw in self.extractor.iterar_puestos(codigos):
+            codigo_puesto = datos_raw['codigo_puesto']
+
+            if not datos_raw['hojas_encontradas']:
+                self.conversion_stats["conversiones_fallidas"] += 1
+                yield codigo_puesto, {"error": f"Código {codigo_puesto} no encontrado"}
+                continue
+
+            try:
+                datos_apf = self._convertir_a_formato_apf(datos_raw, incluir_opcionales)
+            except Exception as e:
+                self.conversion_stats["conversiones_fallidas"] += 1
+                yield codigo_puesto, {"error": f"Error convirtiendo {codigo_puesto}: {str(e)}"}
+                continue
+
+            self._registrar_conversion(datos_apf)
+            yield codigo_puesto, datos_apf
+
+    @staticmethod
+    def a_formato_validador(datos_apf: Dict[str, Any],
+                            codigo_puesto: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Convierte un puesto en formato APF al dict que espera
+        IntegratedValidator.validate_puesto(), sin pasar por documento RHNet.
+
+        Args:
+            datos_apf: Resultado de convertir_puesto() / convertir_todos()
+            codigo_puesto: Código a usar si la identificación no lo trae
+
+        Returns:
+            Dict con codigo, denominacion, nivel_salarial, unidad_responsable,
+            objetivo_general y funciones
+        """
+        identificacion = datos_apf.get('identificacion_puesto', {})
+
+        # nivel_salarial es un diccionario {"codigo": "O11", "descripcion": ...}
+        nivel_obj = identificacion.get('nivel_salarial', {})
+        if isinstance(nivel_obj, dict):
+            nivel_codigo = nivel_obj.get('codigo') or ''
+        else:
+            nivel_codigo = str(nivel_obj) if nivel_obj else ''
+
+        funciones = []
+        for func in datos_apf.get('funciones', []):
+            # Manejar campos que pueden ser None
+            desc_completa = func.get('descripcion_completa') or ''
+            que_hace = func.get('que_hace')
+            para_que = func.get('para_que_lo_hace')
+
+            # Si que_hace es None, usar primeros 100 chars de descripcion_completa
+            if not que_hace:
+                que_hace = desc_completa[:100] if desc_completa else ''
+
+            funciones.append({
+                "id": func.get('numero', 'FXX'),
+                "descripcion_completa": desc_completa,
+                "que_hace": que_hace,
+                "para_que_lo_hace": para_que or ''
+            })
+
+        return {
+            "codigo": identificacion.get('codigo_puesto') or codigo_puesto,
+            "denominacion": identificacion.get('denominacion_puesto') or '',
+            "nivel_salarial": nivel_codigo,
+            "unidad_responsable": identificacion.get('unidad_responsable') or '',
+            "objetivo_general": datos_apf.get('objetivo_general', {}).get('descripcion_completa') or '',
+            "funciones": funciones
+        }
+
+    def _registrar_conversion(self, datos_apf: Dict[str, Any]) -> None:
+        """Actualiza conversion_stats según el estado de la conversión"""
         self.conversion_stats["puestos_procesados"] += 1
         if datos_apf.get("conversion_status") == "completa":
             self.conversion_stats["conversiones_exitosas"] += 1
@@ -271,8 +746,6 @@ class SidegorAdapter:
         else:
             self.conversion_stats["conversiones_fallidas"] += 1
 
-        return datos_apf
-
     def _convertir_a_formato_apf(self, datos_raw: Dict[str, Any],
                                 incluir_opcionales: bool) -> Dict[str, Any]:
         """Convierte estructura raw de Sidegor a formato APF estándar"""
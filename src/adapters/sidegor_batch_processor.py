@@ -3,15 +3,23 @@ Procesador en lote de puestos desde Excel Sidegor.
 Coordina filtrado, conversión a RHNet y validación masiva.
 """
 
-from typing import List, Dict, Any, Optional
+import math
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Callable, List, Dict, Any, Iterator, Optional, Sequence
 from pathlib import Path
 from dataclasses import dataclass, field
-import json
 from datetime import datetime
+import time
+
+import pandas as pd
 
 from .sidegor_adapter import SidegorAdapter
+from .batch_journal import BatchJournal, escribir_atomico, escribir_json_atomico
 from .rhnet_document_generator import RHNetDocumentGenerator
-from ..filters.base_filter import PuestoFilter
+from ..filters.base_filter import PuestoFilter, supports_mask
+from ..providers.resilience import get_concurrency_limiter
+from ..reporting.streaming_aggregator import StreamingBatchAggregator
 
 
 @dataclass
@@ -26,6 +34,16 @@ class BatchProcessingResult:
     tiempo_inicio: str = ""
     tiempo_fin: str = ""
     duracion_segundos: float = 0.0
+    run_id: str = ""
+    reanudados: int = 0
+    # Modo streaming: resultados en JSONL y estadísticas incrementales (resultados queda vacío)
+    agregador: Optional[StreamingBatchAggregator] = field(default=None, repr=False)
+
+    def iterar_resultados(self) -> Iterator[Dict[str, Any]]:
+        """Resultados por puesto (desde el JSONL del agregador en modo streaming)"""
+        if self.agregador is not None and self.agregador.sink_path is not None:
+            return self.agregador.iterar_resultados()
+        return iter(self.resultados)
 
     def get_summary(self) -> str:
         """Genera resumen textual"""
@@ -38,8 +56,9 @@ Inicio: {self.tiempo_inicio}
 Fin: {self.tiempo_fin}
 Duración: {self.duracion_segundos:.1f} segundos
 
+Ejecución: {self.run_id or 'N/A'}
 Total de puestos encontrados: {self.total_puestos}
-Procesados: {self.procesados}
+Procesados: {self.procesados} (reanudados de la bitácora: {self.reanudados})
 Exitosos: {self.exitosos} ({tasa_exito:.1f}%)
 Fallidos: {self.fallidos}
 
@@ -69,14 +88,21 @@ Filtros aplicados ({len(self.filtros_aplicados)}):
                 "tasa_exito": (self.exitosos / self.procesados * 100) if self.procesados > 0 else 0,
                 "tiempo_inicio": self.tiempo_inicio,
                 "tiempo_fin": self.tiempo_fin,
-                "duracion_segundos": self.duracion_segundos
+                "duracion_segundos": self.duracion_segundos,
+                "run_id": self.run_id,
+                "reanudados": self.reanudados
             },
-            "filtros_aplicados": self.filtros_aplicados,
-            "resultados": self.resultados
+            "filtros_aplicados": self.filtros_aplicados
         }
+        if self.agregador is not None:
+            # Sin copiar los resultados: se referencian en el JSONL del agregador
+            estadisticas = self.agregador.get_estadisticas()
+            data["resultados_jsonl"] = estadisticas.pop("resultados_jsonl")
+            data["estadisticas"] = estadisticas
+        else:
+            data["resultados"] = self.resultados
 
-        with open(archivo, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        escribir_json_atomico(archivo, data)
 
         print(f"✅ Resultado exportado a: {archivo}")
 
@@ -89,13 +115,22 @@ class SidegorBatchProcessor:
     1. Filtrado de puestos según criterios
     2. Conversión a formato APF
     3. Generación de documentos RHNet
-    4. Validación (opcional) con pipeline APF
+    4. Validación (opcional): re-extrayendo el documento RHNet con el pipeline APF
+       ("documento") o pasando los datos APF directo a IntegratedValidator ("directo")
     """
 
+    MODOS_VALIDACION = ("documento", "directo")
+
+    # Modo streaming: columnas de PUESTOS que se conservan por puesto (código,
+    # nivel y UR del resultado) y puestos convertidos por bloque en modo serial
+    CAMPOS_STREAMING = ('CÓDIGO_DE_PUESTO', 'GRADO', 'UR')
+    BLOQUE_STREAMING = 50
+
     def __init__(self,
                  adapter: SidegorAdapter,
                  document_generator: RHNetDocumentGenerator,
-                 validation_pipeline: Optional[Any] = None):
+                 validation_pipeline: Optional[Any] = None,
+                 validator: Optional[Any] = None):
         """
         Inicializa procesador en lote.
 
@@ -103,10 +138,12 @@ class SidegorBatchProcessor:
             adapter: Adaptador Sidegor con archivo cargado
             document_generator: Generador de documentos RHNet
             validation_pipeline: Pipeline APF para validación (opcional)
+            validator: IntegratedValidator para la validación directa (opcional)
         """
         self.adapter = adapter
         self.generator = document_generator
         self.pipeline = validation_pipeline
+        self.validator = validator
         self.filtros: List[PuestoFilter] = []
 
     def add_filter(self, filtro: PuestoFilter):
@@ -122,10 +159,14 @@ class SidegorBatchProcessor:
         """Limpia todos los filtros"""
         self.filtros.clear()
 
-    def obtener_puestos_filtrados(self) -> List[Dict[str, Any]]:
+    def obtener_puestos_filtrados(self, columnas: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
         """
         Obtiene todos los puestos que cumplen los filtros.
 
+        Args:
+            columnas: Columnas de PUESTOS a conservar por puesto (None = todas). Se
+                proyectan antes de convertir a dicts, sin materializar las demás
+
         Returns:
             Lista de diccionarios con datos de puestos filtrados
         """
@@ -133,6 +174,16 @@ class SidegorBatchProcessor:
             raise ValueError("Adaptador no tiene archivo cargado")
 
         df_puestos = self.adapter.extractor.get_all_puestos()
+
+        # Evaluación vectorizada si todos los filtros implementan mask()
+        if all(supports_mask(f) for f in self.filtros):
+            mascara = pd.Series(True, index=df_puestos.index)
+            for f in self.filtros:
+                mascara &= f.mask(df_puestos)
+            if columnas is None:
+                return df_puestos[mascara].to_dict('records')
+            return df_puestos.loc[mascara, [c for c in columnas if c in df_puestos.columns]].to_dict('records')
+
         puestos_filtrados = []
 
         for idx, row in df_puestos.iterrows():
@@ -140,6 +191,8 @@ class SidegorBatchProcessor:
 
             # Aplicar todos los filtros (AND lógico)
             if all(f.match(puesto_dict) for f in self.filtros):
+                if columnas is not None:
+                    puesto_dict = {c: puesto_dict[c] for c in columnas if c in puesto_dict}
                 puestos_filtrados.append(puesto_dict)
 
         return puestos_filtrados
@@ -148,19 +201,55 @@ class SidegorBatchProcessor:
                      validar: bool = False,
                      generar_documentos: bool = True,
                      output_dir: str = "output/batch",
-                     guardar_intermedios: bool = True) -> BatchProcessingResult:
+                     guardar_intermedios: bool = True,
+                     run_id: Optional[str] = None,
+                     reintentar_fallidos: bool = True,
+                     workers: int = 1,
+                     validaciones_concurrentes: int = 1,
+                     modo_validacion: str = "documento",
+                     streaming: bool = False) -> BatchProcessingResult:
         """
         Procesa lote completo de puestos filtrados.
 
+        Cada puesto terminado se registra en la bitácora de la ejecución
+        (output_dir/journal/<run_id>.jsonl). Si se vuelve a llamar con el mismo
+        run_id, los puestos ya completados se toman de la bitácora y no se procesan.
+
         Args:
             validar: Si ejecutar validación con pipeline (requiere pipeline configurado)
             generar_documentos: Si generar documentos RHNet
             output_dir: Directorio de salida
             guardar_intermedios: Si guardar archivos intermedios (docs RHNet, JSONs APF)
+            run_id: Identificador de la ejecución a reanudar (None = nueva ejecución)
+            reintentar_fallidos: Al reanudar, volver a procesar los puestos que fallaron
+            workers: Procesos para conversión y generación de documentos (1 = en este
+                proceso). Cada proceso carga el libro (o su caché Parquet) una sola vez
+            validaciones_concurrentes: Validaciones simultáneas con workers > 1; se
+                acotan con un limitador de concurrencia compartido (get_concurrency_limiter)
+            modo_validacion: "documento" = escribir el documento RHNet y re-extraerlo con
+                el pipeline (extract_from_file); "directo" = pasar datos_apf a
+                IntegratedValidator.validate_puesto sin E/S de disco ni extracción LLM
+            streaming: Para lotes muy grandes. Los resultados se escriben conforme
+                terminan en output_dir/resultados/<run_id>.jsonl y las estadísticas se
+                acumulan incrementalmente (StreamingBatchAggregator), sin retener la
+                lista de resultados en memoria. De cada puesto filtrado solo se
+                extraen CAMPOS_STREAMING (proyectados sobre el DataFrame de PUESTOS
+                antes de convertir a dicts) y la conversión se hace por bloques de
+                BLOQUE_STREAMING códigos, así que además de las hojas cargadas la
+                memoria crece solo con esos campos y el índice de la bitácora
+                (unas decenas de bytes por código)
+
+        Raises:
+            ValueError: Si modo_validacion no es válido o falta el validador del modo
 
         Returns:
             BatchProcessingResult con estadísticas y resultados
         """
+        if modo_validacion not in self.MODOS_VALIDACION:
+            raise ValueError(f"modo_validacion debe ser uno de {self.MODOS_VALIDACION}, recibido: {modo_validacion}")
+        if validar and modo_validacion == "directo" and self.validator is None:
+            raise ValueError("La validación directa requiere un validator (IntegratedValidator)")
+
         tiempo_inicio = datetime.now()
 
         print(f"\n{'='*70}")
@@ -173,7 +262,9 @@ class SidegorBatchProcessor:
         for filtro in self.filtros:
             print(f"   • {filtro.get_description()}")
 
-        puestos = self.obtener_puestos_filtrados()
+        puestos = self.obtener_puestos_filtrados(
+            columnas=self.CAMPOS_STREAMING if streaming else None
+        )
 
         print(f"\n📋 Puestos encontrados: {len(puestos)}")
 
@@ -200,85 +291,86 @@ class SidegorBatchProcessor:
             (output_path / "datos_apf").mkdir(exist_ok=True)
 
         print(f"📁 Directorio de salida: {output_dir}")
-        print(f"\n{'='*70}")
-        print("PROCESANDO PUESTOS")
-        print(f"{'='*70}\n")
-
-        # Procesar cada puesto
-        resultados = []
-
-        for i, puesto_data in enumerate(puestos, 1):
-            codigo = puesto_data.get('CÓDIGO_DE_PUESTO', 'UNKNOWN')
 
-            print(f"[{i}/{len(puestos)}] Procesando: {codigo}")
-
-            try:
-                # 1. Convertir a formato APF
-                datos_apf = self.adapter.convertir_puesto(codigo)
-
-                if "error" in datos_apf:
-                    print(f"  ❌ Error en conversión: {datos_apf['error']}")
-                    resultados.append({
-                        "codigo": codigo,
-                        "status": "error_conversion",
-                        "error": datos_apf["error"]
-                    })
-                    continue
-
-                # Guardar datos APF
-                if guardar_intermedios:
-                    apf_path = output_path / "datos_apf" / f"{codigo.replace('/', '_')}_apf.json"
-                    with open(apf_path, 'w', encoding='utf-8') as f:
-                        json.dump(datos_apf, f, ensure_ascii=False, indent=2)
-
-                # 2. Generar documento RHNet virtual
-                doc_rhnet = None
-                doc_path = None
-
-                if generar_documentos:
-                    doc_rhnet = self.generator.generar_documento(datos_apf)
-
-                    # Guardar documento
-                    doc_path = output_path / "documentos" / f"{codigo.replace('/', '_')}_rhnet.txt"
-                    with open(doc_path, 'w', encoding='utf-8') as f:
-                        f.write(doc_rhnet)
-                    print(f"  📄 Documento generado")
-
-                # 3. Validar (si está habilitado)
-                resultado_validacion = None
-
-                if validar and self.pipeline and doc_rhnet and doc_path:
-                    print(f"  🔍 Validando...")
-                    try:
-                        resultado_validacion = self.pipeline.extract_from_file(str(doc_path))
-                        status_validacion = resultado_validacion.get('status', 'unknown')
-                        print(f"  ✅ Validación: {status_validacion}")
-                    except Exception as e:
-                        print(f"  ⚠️ Error en validación: {str(e)}")
-                        resultado_validacion = {"error": str(e)}
-
-                # Consolidar resultado
-                resultados.append({
-                    "codigo": codigo,
-                    "denominacion": datos_apf.get("identificacion_puesto", {}).get("denominacion_puesto"),
-                    "nivel": puesto_data.get('GRADO'),
-                    "ur": puesto_data.get('UR'),
-                    "status": "success",
-                    "conversion_status": datos_apf.get("conversion_status"),
-                    "num_funciones": len(datos_apf.get("funciones", [])),
-                    "documento_path": str(doc_path) if doc_path else None,
-                    "validacion": resultado_validacion
-                })
-
-                print(f"  ✅ Completado\n")
-
-            except Exception as e:
-                print(f"  ❌ Error procesando: {str(e)}\n")
-                resultados.append({
-                    "codigo": codigo,
-                    "status": "error",
-                    "error": str(e)
-                })
+        # Bitácora de la ejecución (reanudación por run_id)
+        journal = BatchJournal(output_path / "journal", run_id=run_id,
+                               reintentar_fallidos=reintentar_fallidos)
+        resultados: List[Dict[str, Any]] = []
+        agregador = None
+        if streaming:
+            agregador = StreamingBatchAggregator(output_path / "resultados" / f"{journal.run_id}.jsonl")
+
+        def emitir(resultado: Dict[str, Any]) -> None:
+            if agregador is not None:
+                agregador.agregar(resultado)
+            else:
+                resultados.append(resultado)
+
+        try:
+            # Solo se reanudan los puestos del lote actual (los filtros pueden haber cambiado)
+            codigos_lote = {str(p.get('CÓDIGO_DE_PUESTO', 'UNKNOWN')) for p in puestos}
+            reanudados = 0
+            for resultado_previo in journal.resultados_previos():
+                if str(resultado_previo.get("codigo")) in codigos_lote:
+                    emitir(resultado_previo)
+                    reanudados += 1
+
+            pendientes = [
+                p for p in puestos
+                if not journal.esta_completado(p.get('CÓDIGO_DE_PUESTO', 'UNKNOWN'))
+            ]
+
+            print(f"📓 Ejecución: {journal.run_id} (bitácora: {journal.ruta})")
+            if agregador is not None:
+                print(f"🌊 Modo streaming: resultados en {agregador.sink_path}")
+            if journal.reanudado:
+                print(f"   ↩️ Reanudando: {reanudados} puestos ya completados, "
+                      f"{len(pendientes)} pendientes")
+
+            print(f"\n{'='*70}")
+            print("PROCESANDO PUESTOS")
+            print(f"{'='*70}\n")
+
+            if workers > 1 and len(pendientes) > 1:
+                self._procesar_en_paralelo(
+                    pendientes, journal, emitir, output_path,
+                    validar, generar_documentos, guardar_intermedios,
+                    workers, validaciones_concurrentes, modo_validacion
+                )
+            else:
+                # En streaming se convierte por bloques: solo las filas del bloque pasan a registros
+                tamano_bloque = self.BLOQUE_STREAMING if streaming else max(1, len(pendientes))
+                i = 0
+
+                for inicio_bloque in range(0, len(pendientes), tamano_bloque):
+                    bloque = pendientes[inicio_bloque:inicio_bloque + tamano_bloque]
+
+                    # 1. Convertir a formato APF (una sola pasada por hoja para todo el bloque)
+                    conversiones = self.adapter.convertir_todos(
+                        [puesto_data.get('CÓDIGO_DE_PUESTO', 'UNKNOWN') for puesto_data in bloque]
+                    )
+
+                    for puesto_data, (codigo, datos_apf) in zip(bloque, conversiones):
+                        i += 1
+                        print(f"[{i}/{len(pendientes)}] Procesando: {codigo}")
+
+                        # 2. Documento RHNet e intermedios
+                        resultado = _preparar_puesto(
+                            self.generator, codigo, datos_apf, puesto_data, output_path,
+                            generar_documentos, guardar_intermedios,
+                            incluir_puesto_validador=validar and modo_validacion == "directo"
+                        )
+                        # 3. Validar (si está habilitado)
+                        self._validar_puesto(resultado, validar, modo_validacion)
+                        if resultado["status"] == "success":
+                            print(f"  ✅ Completado\n")
+
+                        journal.registrar(resultado)
+                        emitir(resultado)
+        finally:
+            # Cerrar el sink también si el lote falla (flush de las líneas ya escritas)
+            if agregador is not None:
+                agregador.cerrar()
 
         # Consolidar resultado
         tiempo_fin = datetime.now()
@@ -289,8 +381,11 @@ class SidegorBatchProcessor:
             puestos,
             tiempo_inicio,
             tiempo_fin,
-            duracion
+            duracion,
+            agregador
         )
+        resultado_final.run_id = journal.run_id
+        resultado_final.reanudados = reanudados
 
         # Mostrar resumen
         print(f"\n{'='*70}")
@@ -299,24 +394,287 @@ class SidegorBatchProcessor:
 
         return resultado_final
 
+    def _procesar_en_paralelo(self,
+                              pendientes: List[Dict[str, Any]],
+                              journal: BatchJournal,
+                              emitir: Callable[[Dict[str, Any]], None],
+                              output_path: Path,
+                              validar: bool,
+                              generar_documentos: bool,
+                              guardar_intermedios: bool,
+                              workers: int,
+                              validaciones_concurrentes: int,
+                              modo_validacion: str) -> None:
+        """
+        Reparte los códigos en bloques sobre un pool de procesos.
+
+        Los procesos convierten, generan documentos y escriben intermedios; los
+        resultados vuelven al proceso principal por bloque conforme terminan. La
+        validación (LLM) se hace aquí en hilos, acotada por el limitador compartido,
+        y cada puesto se registra en la bitácora y se entrega a `emitir` al terminar.
+        """
+        extractor = self.adapter.extractor
+        tamano_bloque = max(1, min(50, math.ceil(len(pendientes) / (workers * 4))))
+        bloques = [pendientes[i:i + tamano_bloque] for i in range(0, len(pendientes), tamano_bloque)]
+
+        limiter = get_concurrency_limiter(
+            f"sidegor_validacion:{validaciones_concurrentes}",
+            initial_limit=validaciones_concurrentes,
+            max_limit=validaciones_concurrentes,
+            latency_target_s=None
+        )
+        # Contrapresión: no acumular más validaciones pendientes que las que se procesan
+        en_cola = threading.BoundedSemaphore(max(1, validaciones_concurrentes) * 4)
+        completados = [0]
+        lock = threading.Lock()
+
+        def finalizar(resultado: Dict[str, Any]) -> None:
+            journal.registrar(resultado)
+            with lock:
+                emitir(resultado)
+                completados[0] += 1
+                print(f"[{completados[0]}/{len(pendientes)}] {resultado['codigo']}: {resultado['status']}")
+
+        def validar_y_finalizar(resultado: Dict[str, Any]) -> None:
+            try:
+                try:
+                    with limiter.slot():
+                        inicio = time.monotonic()
+                        self._validar_puesto(resultado, validar, modo_validacion)
+                        if "error" in (resultado.get("validacion") or {}):
+                            limiter.on_overload()
+                        else:
+                            limiter.on_success(time.monotonic() - inicio)
+                except Exception as e:
+                    # Sin lugar en el limitador: el puesto se registra con el error
+                    resultado.pop("_puesto_validador", None)
+                    resultado["status"] = "error"
+                    resultado["error"] = f"Error en validación: {str(e)}"
+                finalizar(resultado)
+            finally:
+                en_cola.release()
+
+        def recoger(validaciones: List[Future], esperar: bool) -> List[Future]:
+            """Propaga los errores de las validaciones terminadas; devuelve las que siguen en curso"""
+            en_curso = []
+            for validacion in validaciones:
+                if esperar or validacion.done():
+                    validacion.result()
+                else:
+                    en_curso.append(validacion)
+            return en_curso
+
+        print(f"⚙️ Modo paralelo: {workers} procesos, {len(bloques)} bloques de hasta {tamano_bloque} puestos")
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_inicializar_worker,
+            initargs=(extractor.archivo, str(extractor.cache_dir) if extractor.cache_dir else None,
+                      extractor.proyectar_columnas, self.generator)
+        ) as procesos, ThreadPoolExecutor(
+            max_workers=max(1, validaciones_concurrentes), thread_name_prefix="validacion"
+        ) as hilos:
+            futuros = {
+                procesos.submit(_procesar_bloque, bloque, str(output_path),
+                                generar_documentos, guardar_intermedios,
+                                validar and modo_validacion == "directo"): bloque
+                for bloque in bloques
+            }
+            validaciones: List[Future] = []
+
+            for futuro in as_completed(futuros):
+                try:
+                    preparados = futuro.result()
+                except Exception as e:
+                    print(f"  ❌ Error en proceso de conversión: {str(e)}")
+                    preparados = [{
+                        "codigo": puesto_data.get('CÓDIGO_DE_PUESTO', 'UNKNOWN'),
+                        "status": "error",
+                        "error": f"Error en proceso de conversión: {str(e)}"
+                    } for puesto_data in futuros[futuro]]
+
+                for resultado in preparados:
+                    if self._requiere_validacion(resultado, validar, modo_validacion):
+                        en_cola.acquire()
+                        validaciones.append(hilos.submit(validar_y_finalizar, resultado))
+                    else:
+                        finalizar(resultado)
+
+                validaciones = recoger(validaciones, esperar=False)
+
+            recoger(validaciones, esperar=True)
+
+    def _requiere_validacion(self, resultado: Dict[str, Any], validar: bool, modo_validacion: str) -> bool:
+        if not validar or resultado.get("status") != "success":
+            return False
+        if modo_validacion == "directo":
+            return self.validator is not None and "_puesto_validador" in resultado
+        return self.pipeline is not None and bool(resultado.get("documento_path"))
+
+    def _validar_puesto(self, resultado: Dict[str, Any], validar: bool, modo_validacion: str) -> None:
+        """Valida un puesto preparado (si está habilitado) según el modo de validación"""
+        requiere = self._requiere_validacion(resultado, validar, modo_validacion)
+        # El dict para el validador solo viaja hasta aquí; no se guarda en resultados
+        puesto_validador = resultado.pop("_puesto_validador", None)
+        if not requiere:
+            return
+
+        print(f"  🔍 Validando {resultado['codigo']} ({modo_validacion})...")
+        try:
+            if modo_validacion == "directo":
+                resultado_validacion = self.validator.validate_puesto(puesto_validador)
+                status_validacion = resultado_validacion.get('validacion', {}).get('resultado', 'unknown')
+            else:
+                resultado_validacion = self.pipeline.extract_from_file(resultado["documento_path"])
+                status_validacion = resultado_validacion.get('status', 'unknown')
+            print(f"  ✅ Validación: {status_validacion}")
+        except Exception as e:
+            print(f"  ⚠️ Error en validación: {str(e)}")
+            resultado_validacion = {"error": str(e)}
+
+        resultado["validacion"] = resultado_validacion
+
     def _consolidar_resultados(self,
                                resultados: List[Dict],
                                puestos_originales: List[Dict],
                                tiempo_inicio: datetime,
                                tiempo_fin: datetime,
-                               duracion: float) -> BatchProcessingResult:
+                               duracion: float,
+                               agregador: Optional[StreamingBatchAggregator] = None) -> BatchProcessingResult:
         """Consolida resultados de procesamiento en lote"""
-        exitosos = sum(1 for r in resultados if r.get("status") == "success")
-        fallidos = len(resultados) - exitosos
+        if agregador is not None:
+            procesados = agregador.total
+            exitosos = agregador.exitosos
+        else:
+            procesados = len(resultados)
+            exitosos = sum(1 for r in resultados if r.get("status") == "success")
+        fallidos = procesados - exitosos
 
         return BatchProcessingResult(
             total_puestos=len(puestos_originales),
-            procesados=len(resultados),
+            procesados=procesados,
             exitosos=exitosos,
             fallidos=fallidos,
             resultados=resultados,
             filtros_aplicados=[f.get_description() for f in self.filtros],
             tiempo_inicio=tiempo_inicio.strftime("%Y-%m-%d %H:%M:%S"),
             tiempo_fin=tiempo_fin.strftime("%Y-%m-%d %H:%M:%S"),
-            duracion_segundos=duracion
+            duracion_segundos=duracion,
+            agregador=agregador
         )
+
+
+# ==========================================
+# PREPARACIÓN POR PUESTO Y WORKERS DE PROCESO
+# ==========================================
+
+def _preparar_puesto(generator: RHNetDocumentGenerator,
+                     codigo: str,
+                     datos_apf: Dict[str, Any],
+                     puesto_data: Dict[str, Any],
+                     output_path: Path,
+                     generar_documentos: bool,
+                     guardar_intermedios: bool,
+                     verbose: bool = True,
+                     incluir_puesto_validador: bool = False) -> Dict[str, Any]:
+    """
+    Guarda intermedios y genera el documento RHNet de un puesto ya convertido.
+
+    Es CPU puro (sin LLM), por lo que se ejecuta igual en el proceso principal o
+    en un worker del pool. La validación se agrega después en "validacion"; con
+    incluir_puesto_validador el resultado lleva además "_puesto_validador" (dict
+    para IntegratedValidator.validate_puesto, se retira al validar).
+    """
+    try:
+        if "error" in datos_apf:
+            if verbose:
+                print(f"  ❌ Error en conversión: {datos_apf['error']}")
+            return {
+                "codigo": codigo,
+                "status": "error_conversion",
+                "error": datos_apf["error"]
+            }
+
+        # Guardar datos APF
+        if guardar_intermedios:
+            apf_path = output_path / "datos_apf" / f"{codigo.replace('/', '_')}_apf.json"
+            escribir_json_atomico(apf_path, datos_apf)
+
+        # Generar documento RHNet virtual
+        doc_path = None
+
+        if generar_documentos:
+            doc_rhnet = generator.generar_documento(datos_apf)
+
+            # Guardar documento
+            doc_path = output_path / "documentos" / f"{codigo.replace('/', '_')}_rhnet.txt"
+            escribir_atomico(doc_path, doc_rhnet)
+            if verbose:
+                print(f"  📄 Documento generado")
+
+        resultado = {
+            "codigo": codigo,
+            "denominacion": datos_apf.get("identificacion_puesto", {}).get("denominacion_puesto"),
+            "nivel": puesto_data.get('GRADO'),
+            "ur": puesto_data.get('UR'),
+            "status": "success",
+            "conversion_status": datos_apf.get("conversion_status"),
+            "num_funciones": len(datos_apf.get("funciones", [])),
+            "documento_path": str(doc_path) if doc_path else None,
+            "validacion": None
+        }
+        if incluir_puesto_validador:
+            resultado["_puesto_validador"] = SidegorAdapter.a_formato_validador(datos_apf, codigo)
+        return resultado
+
+    except Exception as e:
+        if verbose:
+            print(f"  ❌ Error procesando: {str(e)}\n")
+        return {
+            "codigo": codigo,
+            "status": "error",
+            "error": str(e)
+        }
+
+
+# Estado por proceso worker (se llena una vez en el initializer del pool)
+_worker_estado: Dict[str, Any] = {}
+
+
+def _inicializar_worker(archivo: str,
+                        cache_dir: Optional[str],
+                        proyectar_columnas: bool,
+                        generator: RHNetDocumentGenerator) -> None:
+    """
+    Carga el libro (o su caché Parquet) una sola vez por proceso.
+
+    Los bloques pequeños convierten solo sus filas; si un bloque obliga a convertir
+    una hoja completa, sus registros se conservan para los bloques siguientes.
+    """
+    adapter = SidegorAdapter()
+    if not adapter.cargar_archivo(archivo, cache_dir=cache_dir, proyectar_columnas=proyectar_columnas):
+        raise RuntimeError(f"No se pudo cargar {archivo} en el worker")
+    adapter.extractor.cachear_registros = True
+    _worker_estado["adapter"] = adapter
+    _worker_estado["generator"] = generator
+
+
+def _procesar_bloque(bloque: List[Dict[str, Any]],
+                     output_dir: str,
+                     generar_documentos: bool,
+                     guardar_intermedios: bool,
+                     incluir_puesto_validador: bool = False) -> List[Dict[str, Any]]:
+    """Convierte y prepara un bloque de puestos dentro de un worker"""
+    adapter: SidegorAdapter = _worker_estado["adapter"]
+    generator: RHNetDocumentGenerator = _worker_estado["generator"]
+    output_path = Path(output_dir)
+
+    conversiones = adapter.convertir_todos(
+        [puesto_data.get('CÓDIGO_DE_PUESTO', 'UNKNOWN') for puesto_data in bloque]
+    )
+    return [
+        _preparar_puesto(generator, codigo, datos_apf, puesto_data, output_path,
+                         generar_documentos, guardar_intermedios, verbose=False,
+                         incluir_puesto_validador=incluir_puesto_validador)
+        for puesto_data, (codigo, datos_apf) in zip(bloque, conversiones)
+    ]
@@ -3,7 +3,7 @@ Módulo de filtros para procesamiento en lote de puestos.
 Implementa patrón Strategy para filtrado modular y extensible.
 """
 
-from .base_filter import PuestoFilter
+from .base_filter import PuestoFilter, VectorizedPuestoFilter, supports_mask
 from .nivel_filter import NivelSalarialFilter
 from .ur_filter import URFilter
 from .codigo_filter import CodigoPuestoFilter
@@ -11,6 +11,8 @@ from .composite_filter import CompositeFilter
 
 __all__ = [
     'PuestoFilter',
+    'VectorizedPuestoFilter',
+    'supports_mask',
     'NivelSalarialFilter',
     'URFilter',
     'CodigoPuestoFilter',
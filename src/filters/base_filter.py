@@ -5,6 +5,8 @@ Define la interface que todos los filtros deben implementar.
 
 from typing import Protocol, Dict, Any
 
+import pandas as pd
+
 
 class PuestoFilter(Protocol):
     """
@@ -34,3 +36,39 @@ class PuestoFilter(Protocol):
             String describiendo el filtro
         """
         ...
+
+
+class VectorizedPuestoFilter(PuestoFilter, Protocol):
+    """
+    Filtro que además se puede evaluar sobre el DataFrame completo de PUESTOS.
+
+    mask() es opcional en el protocolo: los filtros que no lo implementen se
+    evalúan fila por fila con match().
+    """
+
+    def mask(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Evalúa el filtro sobre todas las filas a la vez.
+
+        Debe dar el mismo resultado que aplicar match() a cada fila.
+
+        Args:
+            df: DataFrame de la hoja PUESTOS
+
+        Returns:
+            Serie booleana alineada con df.index
+        """
+        ...
+
+
+def supports_mask(filtro: Any) -> bool:
+    """
+    Indica si un filtro se puede evaluar con mask().
+
+    Los filtros que agregan otros (CompositeFilter) exponen supports_mask()
+    para indicar si todos sus filtros internos lo soportan.
+    """
+    checker = getattr(filtro, 'supports_mask', None)
+    if callable(checker):
+        return bool(checker())
+    return callable(getattr(filtro, 'mask', None))
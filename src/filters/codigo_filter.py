@@ -6,6 +6,8 @@ Soporta wildcards para filtrado flexible.
 from typing import List, Dict, Any
 import re
 
+import pandas as pd
+
 
 class CodigoPuestoFilter:
     """
@@ -32,6 +34,10 @@ class CodigoPuestoFilter:
         self.patrones = patrones
         # Compilar patrones regex para eficiencia
         self.regex_patrones = [self._compile_pattern(p) for p in patrones]
+        # Alternancia de todos los patrones para evaluar la columna en una pasada
+        self.regex_combinado = re.compile(
+            '|'.join(f'(?:{regex.pattern})' for regex in self.regex_patrones)
+        ) if self.regex_patrones else None
 
     def _compile_pattern(self, pattern: str) -> re.Pattern:
         """
@@ -75,6 +81,26 @@ class CodigoPuestoFilter:
         # Verificar contra todos los patrones
         return any(regex.match(codigo_str) for regex in self.regex_patrones)
 
+    def mask(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Versión vectorizada de match() sobre el DataFrame de PUESTOS.
+
+        Args:
+            df: DataFrame de la hoja PUESTOS
+
+        Returns:
+            Serie booleana alineada con df.index
+        """
+        if self.regex_combinado is None:
+            return pd.Series(False, index=df.index)
+
+        if 'CÓDIGO_DE_PUESTO' not in df.columns:
+            return pd.Series(bool(self.regex_combinado.match('')), index=df.index)
+
+        codigo = df['CÓDIGO_DE_PUESTO']
+        coincide = codigo.astype(str).str.strip().str.match(self.regex_combinado.pattern, na=False)
+        return codigo.notna() & coincide.fillna(False).astype(bool)
+
     def get_description(self) -> str:
         """Descripción del filtro"""
         if len(self.patrones) == 1:
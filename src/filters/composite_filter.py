@@ -3,8 +3,12 @@ Filtro compuesto que combina múltiples filtros.
 Soporta lógica AND y OR.
 """
 
+from functools import reduce
 from typing import List, Dict, Any
-from .base_filter import PuestoFilter
+
+import pandas as pd
+
+from .base_filter import PuestoFilter, supports_mask
 
 
 class CompositeFilter:
@@ -54,6 +58,34 @@ class CompositeFilter:
             # Al menos un filtro debe pasar
             return any(f.match(puesto_data) for f in self.filters)
 
+    def supports_mask(self) -> bool:
+        """True si todos los filtros internos se pueden evaluar con mask()"""
+        return all(supports_mask(f) for f in self.filters)
+
+    def mask(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Versión vectorizada de match(): combina las máscaras de los filtros internos.
+
+        Args:
+            df: DataFrame de la hoja PUESTOS
+
+        Returns:
+            Serie booleana alineada con df.index
+
+        Raises:
+            TypeError: Si algún filtro interno no implementa mask()
+        """
+        if not self.filters:
+            return pd.Series(True, index=df.index)  # Sin filtros = todos pasan
+
+        if not self.supports_mask():
+            raise TypeError("CompositeFilter.mask requiere que todos los filtros implementen mask()")
+
+        mascaras = [f.mask(df) for f in self.filters]
+        if self.logic == "AND":
+            return reduce(lambda a, b: a & b, mascaras)
+        return reduce(lambda a, b: a | b, mascaras)
+
     def get_description(self) -> str:
         """Descripción del filtro"""
         if not self.filters:
@@ -6,6 +6,8 @@ Permite filtrar puestos por grado (G, H, I, J, K, L, M, etc.)
 from typing import List, Dict, Any, Set
 import math
 
+import pandas as pd
+
 
 class NivelSalarialFilter:
     """
@@ -40,15 +42,7 @@ class NivelSalarialFilter:
         Returns:
             True si el nivel del puesto está en la lista de niveles
         """
-        # Detectar si estamos filtrando por GRUPO (letras) o GRADO (números)
-        es_grupo = any(nivel.isalpha() for nivel in self.niveles if len(nivel) == 1)
-
-        if es_grupo:
-            # Filtrar por GRUPO (G, H, I, J, K, M, N, O, P)
-            nivel = puesto_data.get('GRUPO', '')
-        else:
-            # Filtrar por GRADO (1, 2, 3, etc.)
-            nivel = puesto_data.get('GRADO', '')
+        nivel = puesto_data.get(self._columna(), '')
 
         # Manejar None y NaN
         if nivel is None or (isinstance(nivel, float) and math.isnan(nivel)):
@@ -63,6 +57,36 @@ class NivelSalarialFilter:
 
         return nivel_str in self.niveles
 
+    def mask(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Versión vectorizada de match() sobre el DataFrame de PUESTOS.
+
+        Args:
+            df: DataFrame de la hoja PUESTOS
+
+        Returns:
+            Serie booleana alineada con df.index
+        """
+        columna = self._columna()
+        if columna not in df.columns:
+            return pd.Series('' in self.niveles, index=df.index)
+
+        valores = df[columna]
+        nivel_str = (
+            valores.astype(str).str.strip().str.upper()
+            .str.replace(r'\.0$', '', regex=True)
+        )
+        return valores.notna() & nivel_str.isin(self.niveles)
+
+    def _columna(self) -> str:
+        """
+        Detecta si estamos filtrando por GRUPO (letras) o GRADO (números).
+        - Si niveles son letras (G, H, I, J, K, M, N, O, P) → GRUPO
+        - Si niveles son números (1, 2, 3, etc.) → GRADO
+        """
+        es_grupo = any(nivel.isalpha() for nivel in self.niveles if len(nivel) == 1)
+        return 'GRUPO' if es_grupo else 'GRADO'
+
     def get_description(self) -> str:
         """Descripción del filtro"""
         niveles_ordenados = sorted(list(self.niveles))
@@ -5,6 +5,8 @@ Permite filtrar puestos por código de UR.
 
 from typing import List, Dict, Any, Set
 
+import pandas as pd
+
 
 class URFilter:
     """
@@ -45,6 +47,22 @@ class URFilter:
 
         return ur_str in self.ur_codes
 
+    def mask(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Versión vectorizada de match() sobre el DataFrame de PUESTOS.
+
+        Args:
+            df: DataFrame de la hoja PUESTOS
+
+        Returns:
+            Serie booleana alineada con df.index
+        """
+        if 'UR' not in df.columns:
+            return pd.Series('' in self.ur_codes, index=df.index)
+
+        ur = df['UR']
+        return ur.notna() & ur.astype(str).str.strip().isin(self.ur_codes)
+
     def get_description(self) -> str:
         """Descripción del filtro"""
         urs_ordenadas = sorted(list(self.ur_codes))
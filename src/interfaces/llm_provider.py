@@ -31,6 +31,9 @@ class LLMRequest:
     system_message: Optional[str] = None
     stop_sequences: Optional[List[str]] = None
     metadata: Optional[Dict[str, Any]] = None
+    # JSON Schema de la respuesta esperada. Los providers que lo soportan restringen
+    # la generación al esquema (Ollama "format", OpenAI structured outputs)
+    response_schema: Optional[Dict[str, Any]] = None
 
 
 class ILLMProvider(Protocol):
@@ -111,3 +114,8 @@ class LLMProviderAuthError(LLMProviderError):
 class LLMProviderRateLimitError(LLMProviderError):
     """Error de rate limit del proveedor"""
     pass
+
+
+class LLMProviderUnavailableError(LLMProviderError):
+    """Proveedor no disponible (circuito abierto o servidor caído): fallar rápido y degradar"""
+    pass
@@ -9,12 +9,14 @@ Implementa el principio de Dependency Inversion (DIP):
 Providers disponibles:
 - openai_provider: Implementación para OpenAI (GPT-4, GPT-3.5)
 - ollama_provider: Implementación para Ollama (LLMs locales)
+- router_provider: Enrutamiento local-first con desborde a la nube
 - memory_cache_provider: Cache en memoria
 - file_logger: Logger basado en archivos
 """
 
 from .openai_provider import OpenAIProvider
 from .ollama_provider import OllamaProvider, create_ollama_provider
+from .router_provider import LLMRouterProvider
 
 __version__ = '5.0.0'
-__all__ = ['OpenAIProvider', 'OllamaProvider', 'create_ollama_provider']
+__all__ = ['OpenAIProvider', 'OllamaProvider', 'create_ollama_provider', 'LLMRouterProvider']
@@ -0,0 +1,321 @@
+"""
+JSON Scanner - Extracción tolerante de JSON en una sola pasada
+
+Reemplaza la estrategia anterior de los providers (probar json.loads en cada '}'
+desde el final y reparar cada candidato), que era cuadrática en el tamaño de la
+respuesta. El escáner recorre el texto una vez con una pila de contenedores y:
+
+- Ignora el texto previo al primer '{' / '[' y el posterior a su cierre
+- Elimina comentarios // y comas finales (",}" / ",]")
+- Escapa caracteres de control dentro de strings
+- Cierra strings, arreglos y objetos truncados (respuestas cortadas por max_tokens),
+  descartando el último miembro incompleto
+
+Devuelve el valor parseado junto con la lista de reparaciones aplicadas.
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+
+_CLOSERS = {"{": "}", "[": "]"}
+_COMPLETE_LITERAL = re.compile(r"-?\d+(\.\d+)?([eE][+-]?\d+)?|true|false|null")
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+
+# Estados de un contenedor abierto
+_KEY = "key"        # objeto: se espera una clave (o cierre)
+_COLON = "colon"    # objeto: clave leída, se espera ':'
+_VALUE = "value"    # se espera un valor (o cierre si el contenedor está vacío)
+_COMMA = "comma"    # valor completo, se espera ',' o cierre
+
+# Máximo de posiciones de inicio a probar si el primer candidato no es JSON
+_MAX_START_ATTEMPTS = 3
+
+
+@dataclass
+class JSONScanResult:
+    """Resultado del escaneo tolerante"""
+    value: Any                      # Valor JSON parseado (dict o list)
+    json_text: str                  # Texto JSON (reparado) que se parseó
+    start: int                      # Índice del primer '{' / '[' en el texto original
+    end: int                        # Índice exclusivo del fin del valor (len(text) si truncado)
+    repairs: List[str] = field(default_factory=list)
+
+    @property
+    def truncated(self) -> bool:
+        """True si hubo que cerrar contenedores de una respuesta truncada"""
+        return any(r.startswith("truncado") for r in self.repairs)
+
+
+class _Frame:
+    """Contenedor abierto durante el escaneo"""
+    __slots__ = ("closer", "state", "comma_at", "member_at")
+
+    def __init__(self, closer: str, out_len: int):
+        self.closer = closer
+        self.state = _KEY if closer == "}" else _VALUE
+        self.comma_at: Optional[int] = None   # Índice en `out` de la última coma
+        self.member_at = out_len              # Índice en `out` donde inicia el miembro actual
+
+
+def scan_json(text: str) -> Optional[JSONScanResult]:
+    """
+    Extrae el primer valor JSON de nivel superior (objeto o arreglo) de un texto.
+
+    Complejidad O(n) por candidato; solo si el primer candidato no es JSON
+    (p. ej. "[nota] {...}") se prueba desde el siguiente '{' (máx. 3 intentos).
+
+    Args:
+        text: Respuesta del LLM (puede incluir markdown, texto extra o estar truncada)
+
+    Returns:
+        JSONScanResult o None si no se encontró un valor JSON recuperable
+    """
+    if not text:
+        return None
+
+    pos = _find_opener(text, 0)
+    attempts = 0
+    while pos != -1 and attempts < _MAX_START_ATTEMPTS:
+        result = _scan_from(text, pos)
+        if result is not None:
+            return result
+        attempts += 1
+        pos = _find_opener(text, pos + 1)
+
+    return None
+
+
+def extract_json(text: str) -> Optional[Any]:
+    """Atajo de scan_json(): devuelve solo el valor parseado (o None)"""
+    result = scan_json(text)
+    return result.value if result is not None else None
+
+
+# ==========================================
+# IMPLEMENTACIÓN
+# ==========================================
+
+def _find_opener(text: str, start: int) -> int:
+    obj = text.find("{", start)
+    arr = text.find("[", start)
+    if obj == -1:
+        return arr
+    if arr == -1:
+        return obj
+    return min(obj, arr)
+
+
+def _complete_value(frame: Optional[_Frame]) -> None:
+    if frame is not None:
+        frame.state = _COMMA
+        frame.comma_at = None
+
+
+def _scan_from(text: str, start: int) -> Optional[JSONScanResult]:
+    out: List[str] = []
+    repairs: List[str] = []
+    stack: List[_Frame] = []
+
+    in_string = False
+    string_is_key = False
+    escape = False
+    literal_at: Optional[int] = None   # Índice en `out` del literal en curso
+    end: Optional[int] = None
+
+    n = len(text)
+    i = start
+    while i < n:
+        ch = text[i]
+
+        # --- Dentro de string ---
+        if in_string:
+            if escape:
+                escape = False
+                out.append(ch)
+            elif ch == "\\":
+                escape = True
+                out.append(ch)
+            elif ch == '"':
+                in_string = False
+                out.append(ch)
+                top = stack[-1]
+                if string_is_key:
+                    top.state = _COLON
+                else:
+                    _complete_value(top)
+            elif ch < " ":
+                out.append(_CONTROL_ESCAPES.get(ch, f"\\u{ord(ch):04x}"))
+                if "caracteres de control escapados" not in repairs:
+                    repairs.append("caracteres de control escapados")
+            else:
+                out.append(ch)
+            i += 1
+            continue
+
+        # --- Literal en curso (número, true/false/null) ---
+        if literal_at is not None:
+            if ch.isalnum() or ch in "+-.":
+                out.append(ch)
+                i += 1
+                continue
+            literal_at = None
+            _complete_value(stack[-1])
+            # El delimitador se procesa abajo
+
+        top = stack[-1] if stack else None
+
+        if ch in " \t\r\n":
+            out.append(ch)
+        elif ch == "/" and i + 1 < n and text[i + 1] == "/":
+            newline = text.find("\n", i)
+            i = n if newline == -1 else newline
+            if "comentarios eliminados" not in repairs:
+                repairs.append("comentarios eliminados")
+            continue
+        elif ch in _CLOSERS:
+            if top is not None and top.state == _COMMA:
+                _insert_comma(top, out, repairs)
+            if top is not None and top.state != _VALUE:
+                return None  # Contenedor en posición de clave: no es JSON
+            stack.append(_Frame(_CLOSERS[ch], len(out) + 1))
+            out.append(ch)
+        elif ch in "}]":
+            if top is None:
+                return None
+            if ch != top.closer:
+                if not any(f.closer == ch for f in stack):
+                    repairs.append(f"cierre '{ch}' sobrante ignorado")
+                    i += 1
+                    continue
+                # Cerrar contenedores internos que el modelo olvidó cerrar
+                while stack[-1].closer != ch:
+                    inner = stack.pop()
+                    _drop_incomplete_member(inner, out)
+                    out.append(inner.closer)
+                    repairs.append(f"'{inner.closer}' faltante insertado")
+                    _complete_value(stack[-1])
+                top = stack[-1]
+            if top.comma_at is not None and top.state in (_KEY, _VALUE):
+                out[top.comma_at] = ""
+                repairs.append("coma final eliminada")
+            stack.pop()
+            out.append(ch)
+            if not stack:
+                end = i + 1
+                break
+            _complete_value(stack[-1])
+        elif top is None:
+            return None
+        elif ch == '"':
+            if top.state == _COMMA:
+                _insert_comma(top, out, repairs)
+            in_string = True
+            string_is_key = top.closer == "}" and top.state == _KEY
+            if string_is_key:
+                top.member_at = len(out)
+            out.append(ch)
+        elif ch == ":":
+            if top.state != _COLON:
+                return None
+            top.state = _VALUE
+            out.append(ch)
+        elif ch == ",":
+            if top.state != _COMMA:
+                return None
+            top.comma_at = len(out)
+            top.state = _KEY if top.closer == "}" else _VALUE
+            out.append(ch)
+            top.member_at = len(out)
+        else:
+            if top.state != _VALUE:
+                return None
+            literal_at = len(out)
+            out.append(ch)
+
+        i += 1
+
+    if end is None:
+        if not stack:
+            return None
+        _close_truncated(out, stack, repairs, in_string, string_is_key, escape, literal_at)
+        end = n
+
+    json_text = "".join(out)
+    try:
+        value = json.loads(json_text)
+    except json.JSONDecodeError:
+        return None
+
+    return JSONScanResult(value=value, json_text=json_text, start=start, end=end, repairs=repairs)
+
+
+def _insert_comma(frame: _Frame, out: List[str], repairs: List[str]) -> None:
+    """Inserta la coma omitida entre dos miembros ("a": 1 "b": 2)"""
+    frame.comma_at = len(out)
+    frame.state = _KEY if frame.closer == "}" else _VALUE
+    out.append(",")
+    frame.member_at = len(out)
+    if "comas faltantes insertadas" not in repairs:
+        repairs.append("comas faltantes insertadas")
+
+
+def _drop_incomplete_member(frame: _Frame, out: List[str]) -> None:
+    """Descarta el miembro en curso de un contenedor (clave sin valor, valor truncado)"""
+    if frame.state in (_COLON,) or (frame.state == _VALUE and frame.closer == "}"):
+        del out[frame.member_at:]
+        if frame.comma_at is not None:
+            out[frame.comma_at] = ""
+        frame.state = _COMMA
+    elif frame.state in (_KEY, _VALUE) and frame.comma_at is not None:
+        out[frame.comma_at] = ""
+        frame.state = _COMMA
+
+
+def _close_truncated(
+    out: List[str],
+    stack: List[_Frame],
+    repairs: List[str],
+    in_string: bool,
+    string_is_key: bool,
+    escape: bool,
+    literal_at: Optional[int]
+) -> None:
+    """Cierra una respuesta truncada: string/literal pendiente y contenedores abiertos"""
+    top = stack[-1]
+
+    if in_string:
+        if string_is_key:
+            top.state = _COLON  # Clave incompleta: se descarta con el miembro
+        else:
+            if escape:
+                out.pop()  # Barra invertida colgante
+            out.append('"')
+            repairs.append("truncado: string cerrado")
+            _complete_value(top)
+    elif literal_at is not None:
+        literal = "".join(out[literal_at:])
+        if _COMPLETE_LITERAL.fullmatch(literal):
+            _complete_value(top)
+        else:
+            del out[literal_at:]
+            repairs.append(f"truncado: literal incompleto '{literal}' descartado")
+            if top.closer == "]":
+                top.state = _VALUE
+
+    # Quitar espacios finales para que el corte quede limpio
+    while out and out[-1] in ("", " ", "\t", "\r", "\n"):
+        out.pop()
+
+    closed = 0
+    while stack:
+        frame = stack.pop()
+        _drop_incomplete_member(frame, out)
+        out.append(frame.closer)
+        closed += 1
+        if stack:
+            _complete_value(stack[-1])
+
+    repairs.append(f"truncado: {closed} contenedor(es) cerrado(s)")
@@ -0,0 +1,150 @@
+"""
+JSON Stream - Detección incremental de valores JSON balanceados
+
+Permite cortar una generación en streaming en cuanto el modelo cierra el valor
+JSON de nivel superior (objeto o arreglo), sin esperar el texto explicativo que
+los modelos pequeños suelen emitir después del JSON.
+"""
+
+import json
+from typing import List, Optional, Tuple
+
+from .json_scanner import scan_json
+
+
+class BalancedJSONDetector:
+    """
+    Detector incremental del cierre del primer valor JSON de nivel superior.
+
+    Ignora el texto previo al primer '{' o '[' (p. ej. "```json" o una frase
+    introductoria) y respeta strings con escapes, por lo que llaves dentro de
+    strings no afectan el balance. Un par balanceado que no es JSON (p. ej.
+    "[nota] {...}") no cierra el stream: se sigue buscando desde el siguiente
+    '{' / '['.
+
+    Example:
+        >>> detector = BalancedJSONDetector()
+        >>> detector.feed('```json\\n{"a": "}"')
+        >>> detector.feed(', "b": [1, 2]}\\nEspero que')
+        >>> detector.text[detector.start:detector.end]
+        '{"a": "}", "b": [1, 2]}'
+    """
+
+    _CLOSERS = {"{": "}", "[": "]"}
+
+    def __init__(self):
+        self._chunks: List[str] = []
+        self._text = ""            # Caché de "".join(self._chunks)
+        self._length = 0
+        self.start: Optional[int] = None  # Índice del primer '{' / '[' del candidato
+        self.end: Optional[int] = None    # Índice exclusivo del cierre balanceado
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def text(self) -> str:
+        """Texto recibido hasta ahora"""
+        if len(self._text) != self._length:
+            self._text = "".join(self._chunks)
+            self._chunks = [self._text]
+        return self._text
+
+    @property
+    def complete(self) -> bool:
+        """True si ya se recibió un valor JSON de nivel superior balanceado"""
+        return self.end is not None
+
+    @property
+    def value_text(self) -> Optional[str]:
+        """Texto del valor JSON completo (None si aún no cierra)"""
+        if self.end is None:
+            return None
+        return self.text[self.start:self.end]
+
+    def feed(self, chunk: str) -> Optional[int]:
+        """
+        Agrega texto recibido y avanza el escaneo.
+
+        Args:
+            chunk: Fragmento de texto del stream
+
+        Returns:
+            Índice (exclusivo) del cierre del valor JSON si se completó, o None
+        """
+        if self.end is not None:
+            return self.end
+
+        if not chunk:
+            return None
+        self._chunks.append(chunk)
+        self._length += len(chunk)
+
+        # Solo se escanea el fragmento nuevo; el texto acumulado se une únicamente
+        # para validar un candidato
+        segment, base = chunk, self._length - len(chunk)
+        while segment is not None:
+            segment, base = self._scan(segment, base)
+            if self.end is not None:
+                return self.end
+        return None
+
+    # ==========================================
+    # MÉTODOS PRIVADOS
+    # ==========================================
+
+    def _scan(self, segment: str, base: int) -> Tuple[Optional[str], int]:
+        """
+        Avanza el escaneo sobre `segment` (que inicia en el índice global `base`).
+
+        Returns:
+            (segmento, base) a re-escanear si un candidato no resultó JSON, o (None, 0)
+        """
+        for offset, ch in enumerate(segment):
+            if self.start is None:
+                if ch in self._CLOSERS:
+                    self.start = base + offset
+                    self._stack.append(self._CLOSERS[ch])
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in self._CLOSERS:
+                self._stack.append(self._CLOSERS[ch])
+            elif ch in ("}", "]"):
+                if self._stack and self._stack[-1] == ch:
+                    self._stack.pop()
+                if not self._stack:
+                    end = base + offset + 1
+                    if self._is_json(self.text[self.start:end]):
+                        self.end = end
+                        return None, 0
+                    # No es JSON: reiniciar desde el carácter siguiente al inicio del candidato
+                    restart = self.start + 1
+                    self.start = None
+                    self._stack = []
+                    self._in_string = False
+                    self._escape = False
+                    return self.text[restart:], restart
+
+        return None, 0
+
+    @staticmethod
+    def _is_json(candidate: str) -> bool:
+        """True si el candidato completo es JSON (estricto o reparable por scan_json)"""
+        try:
+            json.loads(candidate)
+            return True
+        except json.JSONDecodeError:
+            pass
+        scan = scan_json(candidate)
+        return scan is not None and scan.start == 0 and scan.end == len(candidate)
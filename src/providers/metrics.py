@@ -0,0 +1,345 @@
+"""
+LLM Metrics - Contabilidad de tokens y latencia de todas las llamadas LLM
+
+Los providers devuelven tokens_used y duración en cada LLMResponse, pero
+robust_openai_call y APFContext.call_llm solo conservan el contenido. El
+colector se alimenta directamente desde los providers (OllamaProvider,
+OpenAIProvider, OpenAIBatchProvider) y agrega:
+
+- Tokens de prompt y de completion
+- Latencia (percentiles p50 / p95 / p99)
+- Reintentos, errores y reparaciones de JSON
+
+La atribución por validador y por puesto usa contextvars: IntegratedValidator
+abre track_puesto() por puesto y scope(validator=...) por etapa; el
+StageDAGExecutor y validate_batch propagan el contexto a sus hilos.
+
+Exportación: snapshot() / to_json() y to_prometheus() (formato de texto de
+Prometheus; las etiquetas son validador/provider/modelo, sin puesto, para no
+disparar la cardinalidad).
+
+Fecha: 2025-11-12
+Versión: 5.43
+"""
+
+import contextvars
+import json
+import math
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+UNATTRIBUTED = "sin_atribuir"
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """Percentil por rango más cercano sobre una lista ordenada"""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(q * len(sorted_values))
+    return sorted_values[min(len(sorted_values), max(1, rank)) - 1]
+
+
+class _CallAggregate:
+    """Agregado de llamadas (no thread-safe: lo protege el dueño)"""
+
+    __slots__ = ("calls", "errors", "prompt_tokens", "completion_tokens", "tokens_estimated",
+                 "retries", "json_repairs", "latency_sum", "latencies")
+
+    def __init__(self, max_samples: int):
+        self.calls = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.tokens_estimated = 0
+        self.retries = 0
+        self.json_repairs = 0
+        self.latency_sum = 0.0
+        self.latencies: Deque[float] = deque(maxlen=max_samples)
+
+    def add_call(self, prompt_tokens: int, completion_tokens: int, latency_s: float,
+                 retries: int, error: bool, tokens_estimated: bool) -> None:
+        self.calls += 1
+        self.errors += int(error)
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.tokens_estimated += int(tokens_estimated)
+        self.retries += retries
+        self.latency_sum += latency_s
+        self.latencies.append(latency_s)
+
+    def to_dict(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+        return {
+            "llamadas": self.calls,
+            "errores": self.errors,
+            "tokens_prompt": self.prompt_tokens,
+            "tokens_completion": self.completion_tokens,
+            "tokens_total": self.prompt_tokens + self.completion_tokens,
+            "llamadas_tokens_estimados": self.tokens_estimated,
+            "reintentos": self.retries,
+            "reparaciones_json": self.json_repairs,
+            "latencia_total_s": round(self.latency_sum, 3),
+            "latencia_p50_s": round(_percentile(ordered, 0.50), 3),
+            "latencia_p95_s": round(_percentile(ordered, 0.95), 3),
+            "latencia_p99_s": round(_percentile(ordered, 0.99), 3)
+        }
+
+
+class PuestoMetrics:
+    """Métricas LLM de un puesto, desglosadas por validador (thread-safe)"""
+
+    def __init__(self, puesto: str, max_samples: int = 1000):
+        self.puesto = puesto
+        self._max_samples = max_samples
+        self._lock = threading.Lock()
+        self._by_validator: Dict[str, _CallAggregate] = {}
+        self._total = _CallAggregate(max_samples)
+
+    def _aggregates(self, validator: str) -> Tuple[_CallAggregate, _CallAggregate]:
+        if validator not in self._by_validator:
+            self._by_validator[validator] = _CallAggregate(self._max_samples)
+        return self._by_validator[validator], self._total
+
+    def add_call(self, validator: str, **kwargs: Any) -> None:
+        with self._lock:
+            for aggregate in self._aggregates(validator):
+                aggregate.add_call(**kwargs)
+
+    def add_json_repair(self, validator: str) -> None:
+        with self._lock:
+            for aggregate in self._aggregates(validator):
+                aggregate.json_repairs += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "total": self._total.to_dict(),
+                "por_validador": {name: agg.to_dict() for name, agg in sorted(self._by_validator.items())}
+            }
+
+
+# Atribución actual: (validador, métricas del puesto)
+_scope: contextvars.ContextVar[Tuple[Optional[str], Optional[PuestoMetrics]]] = contextvars.ContextVar(
+    "llm_metrics_scope", default=(None, None)
+)
+
+
+class LLMMetricsCollector:
+    """
+    Colector global de métricas LLM (thread-safe).
+
+    Example:
+        >>> collector = get_metrics_collector()
+        >>> with collector.track_puesto("12-345") as puesto_metrics:
+        ...     with collector.scope(validator="criterio_1"):
+        ...         provider.complete(request)  # El provider registra la llamada
+        >>> puesto_metrics.to_dict()["total"]["tokens_total"]
+    """
+
+    def __init__(self, max_latency_samples: int = 10000):
+        """
+        Args:
+            max_latency_samples: Latencias retenidas por serie para los percentiles
+        """
+        self.max_latency_samples = max_latency_samples
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, str, str], _CallAggregate] = {}
+
+    # ==========================================
+    # ATRIBUCIÓN
+    # ==========================================
+
+    @contextmanager
+    def scope(self, validator: str) -> Iterator[None]:
+        """Atribuye las llamadas LLM del bloque al validador indicado"""
+        _, puesto = _scope.get()
+        token = _scope.set((validator, puesto))
+        try:
+            yield
+        finally:
+            _scope.reset(token)
+
+    def scoped(self, validator: str, func: Callable[..., Any]) -> Callable[..., Any]:
+        """Envuelve `func` para que sus llamadas LLM se atribuyan a `validator`"""
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with self.scope(validator):
+                return func(*args, **kwargs)
+        return wrapper
+
+    @contextmanager
+    def track_puesto(self, puesto: str) -> Iterator[PuestoMetrics]:
+        """
+        Acumula por separado las llamadas LLM hechas durante la validación de un puesto.
+
+        Yields:
+            PuestoMetrics (se sigue llenando desde los hilos de las etapas)
+        """
+        metrics = PuestoMetrics(puesto)
+        validator, _ = _scope.get()
+        token = _scope.set((validator, metrics))
+        try:
+            yield metrics
+        finally:
+            _scope.reset(token)
+
+    # ==========================================
+    # REGISTRO (llamado por los providers)
+    # ==========================================
+
+    def record_call(
+        self,
+        provider: str,
+        model: str,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        latency_s: float = 0.0,
+        retries: int = 0,
+        error: bool = False,
+        tokens_estimated: bool = False
+    ) -> None:
+        """
+        Registra una llamada LLM terminada (exitosa o fallida tras reintentos).
+
+        Args:
+            provider: Nombre del provider ("ollama", "openai", "openai_batch")
+            model: Modelo usado
+            prompt_tokens: Tokens de prompt
+            completion_tokens: Tokens generados
+            latency_s: Latencia total de la llamada incluyendo reintentos
+            retries: Reintentos realizados
+            error: True si la llamada terminó en error
+            tokens_estimated: True si los tokens son estimados (p. ej. streaming)
+        """
+        validator, puesto = _scope.get()
+        validator = validator or UNATTRIBUTED
+        call = dict(
+            prompt_tokens=prompt_tokens or 0,
+            completion_tokens=completion_tokens or 0,
+            latency_s=latency_s,
+            retries=retries,
+            error=error,
+            tokens_estimated=tokens_estimated
+        )
+        with self._lock:
+            self._series_for(validator, provider, model).add_call(**call)
+        if puesto is not None:
+            puesto.add_call(validator, **call)
+
+    def record_json_repair(self, provider: str, model: str) -> None:
+        """Registra una respuesta cuyo JSON requirió reparación"""
+        validator, puesto = _scope.get()
+        validator = validator or UNATTRIBUTED
+        with self._lock:
+            self._series_for(validator, provider, model).json_repairs += 1
+        if puesto is not None:
+            puesto.add_json_repair(validator)
+
+    # ==========================================
+    # EXPORTACIÓN
+    # ==========================================
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Métricas acumuladas.
+
+        Returns:
+            Dict con "total", "por_validador" y "series" (validador/provider/modelo)
+        """
+        with self._lock:
+            series = {key: agg.to_dict() for key, agg in sorted(self._series.items())}
+            by_validator: Dict[str, _CallAggregate] = {}
+            total = _CallAggregate(self.max_latency_samples)
+            for (validator, _, _), agg in self._series.items():
+                if validator not in by_validator:
+                    by_validator[validator] = _CallAggregate(self.max_latency_samples)
+                for target in (by_validator[validator], total):
+                    self._merge(target, agg)
+
+        return {
+            "total": total.to_dict(),
+            "por_validador": {name: agg.to_dict() for name, agg in sorted(by_validator.items())},
+            "series": [
+                {"validador": v, "provider": p, "modelo": m, **values}
+                for (v, p, m), values in series.items()
+            ]
+        }
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=indent)
+
+    def to_prometheus(self, prefix: str = "apf_llm") -> str:
+        """
+        Exporta las series en formato de texto de Prometheus.
+
+        Returns:
+            Texto listo para servir en /metrics
+        """
+        counters = [
+            ("calls_total", "Llamadas LLM", "calls"),
+            ("errors_total", "Llamadas LLM terminadas en error", "errors"),
+            ("prompt_tokens_total", "Tokens de prompt", "prompt_tokens"),
+            ("completion_tokens_total", "Tokens generados", "completion_tokens"),
+            ("retries_total", "Reintentos de llamadas LLM", "retries"),
+            ("json_repairs_total", "Respuestas con JSON reparado", "json_repairs")
+        ]
+
+        with self._lock:
+            series = [(key, agg, sorted(agg.latencies)) for key, agg in sorted(self._series.items())]
+
+        lines: List[str] = []
+        for suffix, help_text, attr in counters:
+            name = f"{prefix}_{suffix}"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for key, agg, _ in series:
+                lines.append(f"{name}{{{self._labels(key)}}} {getattr(agg, attr)}")
+
+        name = f"{prefix}_latency_seconds"
+        lines.append(f"# HELP {name} Latencia de llamadas LLM")
+        lines.append(f"# TYPE {name} summary")
+        for key, agg, ordered in series:
+            labels = self._labels(key)
+            for q in (0.5, 0.95, 0.99):
+                lines.append(f'{name}{{{labels},quantile="{q}"}} {_percentile(ordered, q):.6f}')
+            lines.append(f"{name}_sum{{{labels}}} {agg.latency_sum:.6f}")
+            lines.append(f"{name}_count{{{labels}}} {agg.calls}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    # ==========================================
+    # MÉTODOS PRIVADOS
+    # ==========================================
+
+    def _series_for(self, validator: str, provider: str, model: str) -> _CallAggregate:
+        key = (validator, provider, model or "")
+        if key not in self._series:
+            self._series[key] = _CallAggregate(self.max_latency_samples)
+        return self._series[key]
+
+    @staticmethod
+    def _merge(target: _CallAggregate, source: _CallAggregate) -> None:
+        for attr in ("calls", "errors", "prompt_tokens", "completion_tokens", "tokens_estimated",
+                     "retries", "json_repairs", "latency_sum"):
+            setattr(target, attr, getattr(target, attr) + getattr(source, attr))
+        target.latencies.extend(source.latencies)
+
+    @staticmethod
+    def _labels(key: Tuple[str, str, str]) -> str:
+        validator, provider, model = (
+            value.replace("\\", "\\\\").replace('"', '\\"') for value in key
+        )
+        return f'validator="{validator}",provider="{provider}",model="{model}"'
+
+
+_collector = LLMMetricsCollector()
+
+
+def get_metrics_collector() -> LLMMetricsCollector:
+    """Colector global compartido por todos los providers"""
+    return _collector
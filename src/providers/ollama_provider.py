@@ -3,14 +3,40 @@ Ollama Provider - Implementación de ILLMProvider para Ollama Local
 
 Implementa la interface ILLMProvider usando LiteLLM para llamadas a Ollama.
 Optimizado para modelos locales pequeños (1B-4B) con soporte para Phi-3.5 Mini.
+
+Caché de prompt (v5.43): los validadores envían un system message estático como
+prefijo; llama.cpp reutiliza el KV cache de ese prefijo entre llamadas. El provider
+mantiene el modelo residente (keep_alive), permite fijar num_ctx y expone
+estadísticas de aciertos de caché (get_cache_stats) a partir de los contadores
+de Ollama (prompt_eval_count / prompt_eval_duration / load_duration).
+
+Resiliencia (v5.43): circuit breaker y limitador de concurrencia AIMD compartidos
+por servidor (ver resilience.py). Con Ollama caído las llamadas fallan de inmediato
+con LLMProviderUnavailableError y los validadores degradan a reglas.
+
+Residencia (v5.43): pre-carga del modelo, pings de keep_alive durante lotes y
+agrupación de llamadas por modelo para no alternar modelos en VRAM (ver
+ollama_residency.py).
 """
 
 import json
-import re
+import threading
 import time
-from typing import Dict, Any, Optional
+from contextlib import nullcontext
+from typing import Dict, Any, Optional, Tuple
 from dataclasses import replace
 
+from .json_scanner import scan_json
+from .json_stream import BalancedJSONDetector
+from .metrics import get_metrics_collector
+from .ollama_residency import ModelResidencyManager, get_residency_manager
+from .resilience import (
+    AdaptiveConcurrencyLimiter,
+    CircuitBreaker,
+    backoff_delay,
+    get_circuit_breaker,
+    get_concurrency_limiter
+)
 from ..interfaces.llm_provider import (
     ILLMProvider,
     LLMRequest,
@@ -18,7 +44,8 @@ from ..interfaces.llm_provider import (
     LLMProviderError,
     LLMProviderTimeoutError,
     LLMProviderAuthError,
-    LLMProviderRateLimitError
+    LLMProviderRateLimitError,
+    LLMProviderUnavailableError
 )
 
 try:
@@ -47,7 +74,16 @@ class OllamaProvider:
         default_model: str = "phi3.5",
         timeout: int = 120,  # Mayor timeout para modelos locales
         max_retries: int = 2,  # Menos reintentos (modelo local no tiene rate limits)
-        enable_logging: bool = True
+        enable_logging: bool = True,
+        keep_alive: Optional[str] = "30m",
+        num_ctx: Optional[int] = None,
+        options: Optional[Dict[str, Any]] = None,
+        stream_json: bool = False,
+        schema_format: bool = True,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        adaptive_concurrency: bool = True,
+        residency_manager: Optional[ModelResidencyManager] = None
     ):
         """
         Inicializa el provider de Ollama.
@@ -58,6 +94,21 @@ class OllamaProvider:
             timeout: Timeout en segundos para llamadas (mayor para modelos locales)
             max_retries: Número máximo de reintentos en caso de error
             enable_logging: Habilitar logging de llamadas
+            keep_alive: Tiempo que Ollama mantiene el modelo (y su KV cache) en memoria
+                tras cada llamada (ej: "30m", "-1" = indefinido, None = default del servidor)
+            num_ctx: Tamaño de contexto del modelo (None = default del servidor). Debe ser
+                constante entre llamadas: cambiarlo obliga a recargar el modelo
+            options: Opciones adicionales de Ollama (ej: {"num_keep": 1024, "num_thread": 8})
+            stream_json: Si True, complete_json() usa streaming y cancela la generación
+                en cuanto se recibe el objeto JSON completo (evita texto posterior)
+            schema_format: Si True, los requests con response_schema se envían con el
+                parámetro "format" de Ollama (generación restringida por gramática,
+                requiere Ollama >= 0.5). Con False se ignora el esquema
+            circuit_breaker: Circuit breaker a usar (default: compartido por base_url)
+            concurrency_limiter: Limitador AIMD a usar (default: compartido por base_url)
+            adaptive_concurrency: Si False, no limita la concurrencia de llamadas
+            residency_manager: Manager de residencia de modelos (default: compartido
+                por base_url). Agrupa las llamadas por modelo y mantiene el modelo cargado
         """
         if not LITELLM_AVAILABLE:
             raise LLMProviderError(
@@ -69,6 +120,50 @@ class OllamaProvider:
         self.timeout = timeout
         self.max_retries = max_retries
         self.enable_logging = enable_logging
+        self.keep_alive = keep_alive
+        self.num_ctx = num_ctx
+        self.options = options or {}
+        self.stream_json = stream_json
+        self.schema_format = schema_format
+
+        # Salud del servidor compartida entre instancias/hilos que usan el mismo Ollama
+        self.circuit_breaker = circuit_breaker or get_circuit_breaker(base_url)
+        if concurrency_limiter is not None:
+            self.concurrency_limiter = concurrency_limiter
+        elif adaptive_concurrency:
+            self.concurrency_limiter = get_concurrency_limiter(base_url, latency_target_s=timeout / 2)
+        else:
+            self.concurrency_limiter = None
+        self.residency = residency_manager or get_residency_manager(
+            base_url, keep_alive=keep_alive, enable_logging=enable_logging
+        )
+
+        # Estadísticas de caché de prompt (thread-safe)
+        self._stats_lock = threading.Lock()
+        self._cache_stats = {
+            "requests": 0,
+            "requests_with_counters": 0,
+            "cache_hits": 0,
+            "prompt_tokens_estimated": 0,
+            "prompt_tokens_evaluated": 0,
+            "prompt_eval_seconds_hits": 0.0,
+            "prompt_eval_seconds_misses": 0.0,
+            "load_seconds": 0.0
+        }
+        self._stream_stats = {
+            "requests": 0,
+            "early_stops": 0,
+            "tokens_received": 0,
+            "tokens_saved_max": 0,
+            "chars_discarded": 0
+        }
+        self._json_stats = {
+            "requests": 0,
+            "schema_constrained": 0,
+            "parsed_direct": 0,
+            "repaired": 0,
+            "failed": 0
+        }
 
     def complete(self, request: LLMRequest) -> LLMResponse:
         """
@@ -83,6 +178,20 @@ class OllamaProvider:
         Raises:
             LLMProviderError: Si hay error en la llamada
         """
+        return self._complete(request, stream_json=False)
+
+    def _complete(self, request: LLMRequest, stream_json: bool) -> LLMResponse:
+        """
+        Implementación de complete() con reintentos.
+
+        Args:
+            request: Objeto LLMRequest con prompt y parámetros
+            stream_json: Si True, usa streaming y corta la generación en cuanto se
+                recibe un valor JSON de nivel superior balanceado
+
+        Returns:
+            LLMResponse con el contenido generado
+        """
         model = request.model or self.default_model
 
         # Formato para Ollama en LiteLLM: "ollama/nombre_modelo"
@@ -114,54 +223,109 @@ class OllamaProvider:
         if request.stop_sequences:
             call_params["stop"] = request.stop_sequences
 
+        # Residencia del modelo y reutilización de contexto
+        if self.keep_alive is not None:
+            call_params["keep_alive"] = self.keep_alive
+        if self.num_ctx:
+            call_params["num_ctx"] = self.num_ctx
+        call_params.update(self.options)
+
+        # Generación restringida por JSON Schema (Ollama traduce el esquema a gramática)
+        if request.response_schema and self.schema_format:
+            call_params["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": request.response_schema.get("title", "respuesta"),
+                    "schema": request.response_schema
+                }
+            }
+
         # Intentar llamada con reintentos
         last_error = None
         for attempt in range(self.max_retries):
+            admitted = False
             try:
-                response = completion(**call_params)
-                duration = time.time() - start_time
-
-                content = response.choices[0].message.content
-                if not content:
-                    raise LLMProviderError("Ollama devolvió respuesta vacía")
-
-                if self.enable_logging:
-                    print(f"[Ollama] Respuesta recibida en {duration:.2f}s ({len(content)} chars)")
-
-                # Extraer tokens usados (Ollama provee esto)
-                usage = response.get('usage', {})
-                tokens_used = {
-                    "prompt": usage.get('prompt_tokens', 0),
-                    "completion": usage.get('completion_tokens', 0),
-                    "total": usage.get('total_tokens', 0)
-                }
-
-                return LLMResponse(
-                    content=content,
-                    model=model,
-                    tokens_used=tokens_used,
-                    finish_reason=response.choices[0].finish_reason,
-                    metadata={
-                        "duration": duration,
-                        "attempt": attempt + 1,
-                        "base_url": self.base_url
-                    }
-                )
+                # Fail fast si el servidor está marcado como caído
+                self.circuit_breaker.before_call()
+                admitted = True
+                slot = self.concurrency_limiter.slot(timeout=self.timeout) if self.concurrency_limiter else nullcontext()
+                # Esperar turno del modelo antes de ocupar slot de concurrencia
+                with self.residency.model_slot(model), slot:
+                    call_start = time.time()
+                    if stream_json:
+                        result = self._complete_streaming(request, call_params, model, start_time, attempt)
+                    else:
+                        result = self._complete_once(request, call_params, model, start_time, attempt)
+                self._record_health(time.time() - call_start)
+                self._record_call_metrics(model, start_time, attempt, result)
+                return result
+
+            except LLMProviderUnavailableError:
+                if admitted:
+                    # Sin slot de concurrencia (o compuerta de residencia): no dice nada de la
+                    # salud del servidor, pero hay que liberar la posible llamada de prueba
+                    self.circuit_breaker.record_neutral()
+                self._record_call_metrics(model, start_time, attempt)
+                raise
 
             except Exception as e:
                 last_error = self._classify_error(e)
+                self._record_health(error=last_error)
 
                 if attempt < self.max_retries - 1:
-                    wait_time = 2 ** attempt  # Exponential backoff
+                    wait_time = backoff_delay(attempt)  # Exponential backoff con jitter
                     if self.enable_logging:
-                        print(f"[Ollama] Error en intento {attempt + 1}, reintentando en {wait_time}s...")
+                        print(f"[Ollama] Error en intento {attempt + 1}, reintentando en {wait_time:.1f}s...")
                         print(f"[Ollama] Error: {str(e)}")
                     time.sleep(wait_time)
                 else:
+                    self._record_call_metrics(model, start_time, attempt)
                     raise last_error
 
         raise last_error or LLMProviderError("Error desconocido en llamada a Ollama")
 
+    def _complete_once(
+        self,
+        request: LLMRequest,
+        call_params: Dict[str, Any],
+        model: str,
+        start_time: float,
+        attempt: int
+    ) -> LLMResponse:
+        """Llamada no-streaming a Ollama (un intento)"""
+        response = completion(**call_params)
+        duration = time.time() - start_time
+
+        content = response.choices[0].message.content
+        if not content:
+            raise LLMProviderError("Ollama devolvió respuesta vacía")
+
+        if self.enable_logging:
+            print(f"[Ollama] Respuesta recibida en {duration:.2f}s ({len(content)} chars)")
+
+        # Extraer tokens usados (Ollama provee esto)
+        usage = response.get('usage', {})
+        tokens_used = {
+            "prompt": usage.get('prompt_tokens', 0),
+            "completion": usage.get('completion_tokens', 0),
+            "total": usage.get('total_tokens', 0)
+        }
+
+        prompt_cache = self._record_prompt_cache(request, response, tokens_used)
+
+        return LLMResponse(
+            content=content,
+            model=model,
+            tokens_used=tokens_used,
+            finish_reason=response.choices[0].finish_reason,
+            metadata={
+                "duration": duration,
+                "attempt": attempt + 1,
+                "base_url": self.base_url,
+                "prompt_cache": prompt_cache
+            }
+        )
+
     def complete_json(self, request: LLMRequest) -> Dict[str, Any]:
         """
         Genera una completion en formato JSON con parsing robusto.
@@ -175,9 +339,25 @@ class OllamaProvider:
         Raises:
             LLMProviderError: Si hay error en la llamada o parsing
         """
+        return self.complete_json_with_usage(request)[0]
+
+    def complete_json_with_usage(self, request: LLMRequest) -> Tuple[Dict[str, Any], Dict[str, int]]:
+        """
+        complete_json() que además devuelve los tokens usados (para conciliar
+        límites de tokens por minuto).
+
+        Returns:
+            Tupla (dict parseado, tokens_used de la respuesta)
+
+        Raises:
+            LLMProviderError: Si hay error en la llamada o parsing
+        """
+        schema_constrained = bool(request.response_schema) and self.schema_format
+
         # Agregar instrucción explícita para JSON en el prompt
         original_prompt = request.prompt
-        if "JSON" not in original_prompt and "json" not in original_prompt:
+        instructions = f"{request.system_message or ''}\n{original_prompt}"
+        if not schema_constrained and "JSON" not in instructions and "json" not in instructions:
             enhanced_prompt = (
                 f"{original_prompt}\n\n"
                 "IMPORTANTE: Responde ÚNICAMENTE con un objeto JSON válido. "
@@ -185,22 +365,43 @@ class OllamaProvider:
             )
             request = replace(request, prompt=enhanced_prompt)
 
-        response = self.complete(request)
+        response = self._complete(request, stream_json=self.stream_json)
         content = response.content.strip()
 
+        with self._stats_lock:
+            self._json_stats["requests"] += 1
+            if schema_constrained:
+                self._json_stats["schema_constrained"] += 1
+
+        # Con esquema la salida ya es JSON válido: parseo directo sin limpieza
+        if schema_constrained:
+            try:
+                parsed = json.loads(content)
+                self._count_json_parse("parsed_direct")
+                return parsed, response.tokens_used
+            except json.JSONDecodeError:
+                pass  # Respuesta truncada por max_tokens: continuar con reparación
+
         # Limpiar markdown wrapper si existe
         content_cleaned = self._clean_markdown_wrapper(content)
 
         # Intentar parsear JSON directamente
         try:
-            return json.loads(content_cleaned)
+            parsed = json.loads(content_cleaned)
+            self._count_json_parse("parsed_direct")
+            return parsed, response.tokens_used
         except json.JSONDecodeError as e:
-            # Fallback: buscar JSON con regex
-            parsed_json = self._extract_json_with_regex(content_cleaned)
-            if parsed_json is not None:
-                return parsed_json
+            # Fallback: escaneo tolerante en una pasada (texto extra, comas, truncado)
+            scan = scan_json(content_cleaned)
+            if scan is not None:
+                self._count_json_parse("repaired")
+                get_metrics_collector().record_json_repair("ollama", request.model or self.default_model)
+                if self.enable_logging and scan.repairs:
+                    print(f"[Ollama] JSON reparado: {', '.join(scan.repairs)}")
+                return scan.value, response.tokens_used
 
             # Si todo falla, lanzar error con contenido original
+            self._count_json_parse("failed")
             if self.enable_logging:
                 print(f"[Ollama] Error parseando JSON. Contenido: {content_cleaned[:500]}")
 
@@ -222,9 +423,115 @@ class OllamaProvider:
             "base_url": self.base_url,
             "timeout": self.timeout,
             "max_retries": self.max_retries,
+            "keep_alive": self.keep_alive,
+            "num_ctx": self.num_ctx,
+            "schema_format": self.schema_format,
+            "circuit_state": self.circuit_breaker.state,
             "litellm_available": LITELLM_AVAILABLE
         }
 
+    def warm_up(self, model: Optional[str] = None, background: bool = False) -> bool:
+        """
+        Pre-carga el modelo en memoria para que la primera llamada no pague la carga.
+
+        Args:
+            model: Modelo a cargar (default: default_model)
+            background: Si True, carga en un hilo de fondo y retorna de inmediato
+
+        Returns:
+            True si el modelo quedó residente (siempre True con background=True)
+        """
+        if background:
+            self.residency.warm_up_async(model or self.default_model)
+            return True
+        return self.residency.warm_up(model or self.default_model)
+
+    def batch_session(self, model: Optional[str] = None):
+        """
+        Context manager para lotes: pre-carga el modelo y envía pings de keep_alive.
+
+        Args:
+            model: Modelo a mantener residente (default: default_model)
+        """
+        return self.residency.batch_session(model or self.default_model)
+
+    def get_residency_stats(self) -> Dict[str, Any]:
+        """Estadísticas de residencia de modelos (ver ModelResidencyManager)"""
+        return self.residency.get_residency_stats()
+
+    def get_health_stats(self) -> Dict[str, Any]:
+        """
+        Estado de salud del servidor: circuit breaker y concurrencia adaptativa.
+
+        Returns:
+            Dict con "circuit_breaker" y "concurrency" (None si está desactivada)
+        """
+        return {
+            "circuit_breaker": self.circuit_breaker.get_stats(),
+            "concurrency": self.concurrency_limiter.get_stats() if self.concurrency_limiter else None
+        }
+
+    def get_json_stats(self) -> Dict[str, Any]:
+        """
+        Estadísticas de parseo de JSON en complete_json().
+
+        "repaired" cuenta las respuestas que requirieron extracción/reparación
+        (ruta lenta); con response_schema debería tender a cero.
+
+        Returns:
+            Dict con contadores acumulados y tasa de reparación
+        """
+        with self._stats_lock:
+            stats = dict(self._json_stats)
+        stats["repair_rate"] = stats["repaired"] / stats["requests"] if stats["requests"] else 0.0
+        return stats
+
+    def get_stream_stats(self) -> Dict[str, Any]:
+        """
+        Estadísticas del modo streaming con corte temprano de JSON.
+
+        tokens_saved_max es una cota superior: tokens del presupuesto (max_tokens)
+        que no se generaron por cortar la generación al cerrar el JSON.
+
+        Returns:
+            Dict con contadores acumulados
+        """
+        with self._stats_lock:
+            stats = dict(self._stream_stats)
+        stats["early_stop_rate"] = stats["early_stops"] / stats["requests"] if stats["requests"] else 0.0
+        return stats
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Estadísticas de reutilización de caché de prompt (KV cache de llama.cpp).
+
+        Un request cuenta como acierto cuando Ollama evaluó menos de la mitad de los
+        tokens estimados del prompt (el resto se reutilizó del prefijo en caché).
+        El tiempo de evaluación del prompt (+ carga del modelo) es el tiempo hasta
+        el primer token, por lo que la diferencia entre aciertos y fallos estima
+        el ahorro en time-to-first-token.
+
+        Returns:
+            Dict con contadores y promedios
+        """
+        with self._stats_lock:
+            stats = dict(self._cache_stats)
+
+        hits = stats["cache_hits"]
+        misses = stats["requests_with_counters"] - hits
+        avg_hit = stats["prompt_eval_seconds_hits"] / hits if hits else 0.0
+        avg_miss = stats["prompt_eval_seconds_misses"] / misses if misses else 0.0
+        estimated = stats["prompt_tokens_estimated"]
+
+        stats.update({
+            "hit_rate": hits / stats["requests_with_counters"] if stats["requests_with_counters"] else 0.0,
+            "cached_token_ratio": max(0.0, 1 - stats["prompt_tokens_evaluated"] / estimated) if estimated else 0.0,
+            "avg_prompt_eval_s_hit": avg_hit,
+            "avg_prompt_eval_s_miss": avg_miss,
+            "ttft_savings_s_per_hit": max(0.0, avg_miss - avg_hit) if hits and misses else 0.0
+        })
+        return stats
+
     def is_available(self) -> bool:
         """
         Verifica si el proveedor está disponible.
@@ -251,6 +558,248 @@ class OllamaProvider:
     # MÉTODOS PRIVADOS
     # ==========================================
 
+    def _record_health(self, latency_s: Optional[float] = None, error: Optional[LLMProviderError] = None) -> None:
+        """
+        Actualiza circuit breaker y limitador AIMD con el resultado de una llamada.
+
+        Solo timeouts y errores de conexión cuentan como fallos de disponibilidad.
+        """
+        if error is None:
+            self.circuit_breaker.record_success()
+            if self.concurrency_limiter:
+                self.concurrency_limiter.on_success(latency_s or 0.0)
+            return
+
+        if isinstance(error, (LLMProviderTimeoutError, LLMProviderUnavailableError)):
+            self.circuit_breaker.record_failure()
+            if self.concurrency_limiter:
+                self.concurrency_limiter.on_overload()
+        else:
+            self.circuit_breaker.record_neutral()
+
+    def _record_call_metrics(
+        self,
+        model: str,
+        start_time: float,
+        attempt: int,
+        response: Optional[LLMResponse] = None
+    ) -> None:
+        """Registra la llamada en el colector global de métricas (response=None → error)"""
+        tokens = response.tokens_used if response is not None else {}
+        get_metrics_collector().record_call(
+            "ollama",
+            model[len("ollama/"):] if model.startswith("ollama/") else model,
+            prompt_tokens=tokens.get("prompt", 0),
+            completion_tokens=tokens.get("completion", 0),
+            latency_s=time.time() - start_time,
+            retries=attempt,
+            error=response is None,
+            tokens_estimated=bool(response is not None and response.metadata.get("tokens_estimated"))
+        )
+
+    def _count_json_parse(self, outcome: str) -> None:
+        with self._stats_lock:
+            self._json_stats[outcome] += 1
+
+    def _complete_streaming(
+        self,
+        request: LLMRequest,
+        call_params: Dict[str, Any],
+        model: str,
+        start_time: float,
+        attempt: int
+    ) -> LLMResponse:
+        """
+        Ejecuta la llamada en streaming y corta en cuanto el JSON de nivel superior cierra.
+
+        Si el stream llega a su último chunk, sus contadores (usage / prompt_eval_count)
+        alimentan tokens_used y las métricas de caché de prompt. Si se corta, Ollama no
+        envía contadores: el request se registra sin ellos y los tokens se estiman.
+
+        Returns:
+            LLMResponse con el JSON recibido (sin texto posterior) y telemetría de
+            corte temprano en metadata["early_stop"]
+        """
+        detector = BalancedJSONDetector()
+        tokens_received = 0
+        finish_reason = None
+        early_stop = False
+        last_chunk = None
+        usage = None
+
+        stream = completion(**{**call_params, "stream": True})
+        try:
+            for chunk in stream:
+                last_chunk = chunk
+                usage = getattr(chunk, "usage", None) or usage
+                choice = chunk.choices[0] if chunk.choices else None
+                if choice is None:
+                    continue
+                finish_reason = getattr(choice, "finish_reason", None) or finish_reason
+                delta = getattr(choice.delta, "content", None) or ""
+                if not delta:
+                    continue
+
+                tokens_received += 1  # Ollama emite ~1 token por chunk
+                if detector.feed(delta) is not None:
+                    early_stop = True
+                    break
+        finally:
+            # Cerrar el stream corta la conexión HTTP: Ollama aborta la generación
+            close = getattr(stream, "close", None)
+            if early_stop and callable(close):
+                try:
+                    close()
+                except Exception:
+                    pass
+
+        duration = time.time() - start_time
+        content = detector.value_text if early_stop else detector.text
+        if not content:
+            raise LLMProviderError("Ollama devolvió respuesta vacía")
+
+        chars_discarded = len(detector.text) - detector.end if early_stop else 0
+        tokens_saved_max = max(0, request.max_tokens - tokens_received) if early_stop else 0
+
+        with self._stats_lock:
+            self._stream_stats["requests"] += 1
+            self._stream_stats["tokens_received"] += tokens_received
+            if early_stop:
+                self._stream_stats["early_stops"] += 1
+                self._stream_stats["tokens_saved_max"] += tokens_saved_max
+                self._stream_stats["chars_discarded"] += chars_discarded
+
+        if self.enable_logging:
+            status = "corte temprano al cerrar JSON" if early_stop else "generación completa"
+            print(f"[Ollama] Stream recibido en {duration:.2f}s ({tokens_received} tokens, {status})")
+
+        tokens_used = self._stream_usage(usage) if not early_stop else None
+        tokens_estimated = tokens_used is None
+        if tokens_estimated:
+            # Sin contadores finales de Ollama (stream cortado): tokens estimados
+            prompt_tokens = (len(request.prompt or "") + len(request.system_message or "")) // 4
+            tokens_used = {
+                "prompt": prompt_tokens,
+                "completion": tokens_received,
+                "total": prompt_tokens + tokens_received
+            }
+            prompt_cache = self._record_prompt_cache(request, None, {})
+        else:
+            prompt_cache = self._record_prompt_cache(request, last_chunk, tokens_used)
+
+        return LLMResponse(
+            content=content,
+            model=model,
+            tokens_used=tokens_used,
+            finish_reason="json_complete" if early_stop else (finish_reason or "stop"),
+            metadata={
+                "duration": duration,
+                "attempt": attempt + 1,
+                "base_url": self.base_url,
+                "streamed": True,
+                "tokens_estimated": tokens_estimated,
+                "prompt_cache": prompt_cache,
+                "early_stop": {
+                    "stopped": early_stop,
+                    "tokens_received": tokens_received,
+                    "tokens_saved_max": tokens_saved_max,
+                    "chars_discarded": chars_discarded
+                }
+            }
+        )
+
+    @staticmethod
+    def _stream_usage(usage: Any) -> Optional[Dict[str, int]]:
+        """tokens_used a partir del usage del último chunk (None si el stream no lo trae)"""
+        if not usage:
+            return None
+
+        def valor(clave: str) -> int:
+            dato = usage.get(clave) if isinstance(usage, dict) else getattr(usage, clave, None)
+            return int(dato) if isinstance(dato, (int, float)) else 0
+
+        prompt, completion_tokens = valor("prompt_tokens"), valor("completion_tokens")
+        if not prompt and not completion_tokens:
+            return None
+        return {
+            "prompt": prompt,
+            "completion": completion_tokens,
+            "total": valor("total_tokens") or prompt + completion_tokens
+        }
+
+    def _record_prompt_cache(
+        self,
+        request: LLMRequest,
+        response: Any,
+        tokens_used: Dict[str, int]
+    ) -> Dict[str, Any]:
+        """
+        Registra métricas de caché de prompt de una respuesta de Ollama.
+
+        Returns:
+            Dict con métricas del request (para LLMResponse.metadata)
+        """
+        counters = self._extract_ollama_counters(response)
+        evaluated = counters.get("prompt_eval_count", tokens_used.get("prompt", 0))
+        chars = len(request.prompt or "") + len(request.system_message or "")
+        estimated = max(1, chars // 4)  # ~4 caracteres por token
+        prompt_eval_s = counters.get("prompt_eval_duration", 0) / 1e9
+        load_s = counters.get("load_duration", 0) / 1e9
+        has_counters = "prompt_eval_count" in counters or bool(evaluated)
+        hit = has_counters and evaluated < estimated * 0.5
+
+        with self._stats_lock:
+            stats = self._cache_stats
+            stats["requests"] += 1
+            stats["load_seconds"] += load_s
+            if has_counters:
+                stats["requests_with_counters"] += 1
+                stats["prompt_tokens_estimated"] += estimated
+                stats["prompt_tokens_evaluated"] += min(evaluated, estimated)
+                if hit:
+                    stats["cache_hits"] += 1
+                    stats["prompt_eval_seconds_hits"] += prompt_eval_s + load_s
+                else:
+                    stats["prompt_eval_seconds_misses"] += prompt_eval_s + load_s
+
+        return {
+            "hit": hit,
+            "prompt_tokens_estimated": estimated,
+            "prompt_tokens_evaluated": evaluated,
+            "cached_tokens_estimated": max(0, estimated - evaluated) if has_counters else 0,
+            "prompt_eval_s": round(prompt_eval_s, 4),
+            "load_s": round(load_s, 4)
+        }
+
+    def _extract_ollama_counters(self, response: Any) -> Dict[str, int]:
+        """
+        Extrae contadores nativos de Ollama (prompt_eval_count, prompt_eval_duration,
+        load_duration, en nanosegundos) si LiteLLM los conserva en la respuesta.
+        """
+        keys = ("prompt_eval_count", "prompt_eval_duration", "load_duration", "eval_count", "eval_duration")
+        sources = [response]
+        hidden = getattr(response, "_hidden_params", None) or {}
+        if isinstance(hidden, dict):
+            sources.append(hidden)
+            original = hidden.get("original_response")
+            if isinstance(original, str):
+                try:
+                    original = json.loads(original)
+                except (json.JSONDecodeError, ValueError):
+                    original = None
+            if isinstance(original, dict):
+                sources.append(original)
+
+        counters = {}
+        for source in sources:
+            for key in keys:
+                if key in counters:
+                    continue
+                value = source.get(key) if isinstance(source, dict) or hasattr(source, "get") else None
+                if isinstance(value, (int, float)):
+                    counters[key] = int(value)
+        return counters
+
     def _clean_markdown_wrapper(self, content: str) -> str:
         """
         Limpia markdown code blocks que envuelven JSON.
@@ -278,127 +827,6 @@ class OllamaProvider:
 
         return content
 
-    def _extract_json_with_regex(self, content: str) -> Optional[Dict[str, Any]]:
-        """
-        Intenta extraer JSON usando regex como fallback.
-        Mejorado para manejar JSON truncado por modelos pequeños como Phi-3.5.
-
-        Args:
-            content: Contenido donde buscar JSON
-
-        Returns:
-            Dict parseado o None si no se encuentra
-        """
-        # Método 1: Buscar desde primer '{' hasta el último '}' válido
-        try:
-            first_brace = content.find('{')
-            if first_brace != -1:
-                # Encontrar el último '}' y trabajar hacia atrás
-                for i in range(len(content) - 1, first_brace, -1):
-                    if content[i] == '}':
-                        candidate = content[first_brace:i+1]
-                        try:
-                            return json.loads(candidate)
-                        except json.JSONDecodeError:
-                            # Intentar reparar JSON truncado
-                            repaired = self._repair_truncated_json(candidate)
-                            if repaired:
-                                try:
-                                    return json.loads(repaired)
-                                except:
-                                    continue
-        except:
-            pass
-
-        # Método 2: Regex patterns (fallback original)
-        json_patterns = [
-            r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}',  # Objetos anidados
-            r'\[[^\[\]]*(?:\[[^\[\]]*\][^\[\]]*)*\]'  # Arrays anidados
-        ]
-
-        for pattern in json_patterns:
-            matches = re.findall(pattern, content, re.DOTALL)
-            for match in matches:
-                try:
-                    return json.loads(match)
-                except:
-                    continue
-
-        return None
-
-    def _repair_truncated_json(self, json_str: str) -> Optional[str]:
-        """
-        Intenta reparar JSON truncado/malformado agregando comillas, paréntesis y llaves faltantes.
-        Optimizado para manejar errores de Phi-3.5 Mini.
-
-        Args:
-            json_str: String de JSON potencialmente truncado
-
-        Returns:
-            String de JSON reparado o None si no se puede reparar
-        """
-        try:
-            original = json_str
-            lines = json_str.strip().split('\n')
-
-            # Paso 1: Reparar última línea incompleta
-            last_line = lines[-1].strip()
-            if last_line and not any(last_line.endswith(c) for c in ['}', ']', '"', ',']):
-                # Verificar si es un valor de string truncado (ej: "key": "value_incomplete)
-                if '": "' in last_line or "': '" in last_line:
-                    # Cerrar paréntesis/corchetes abiertos en el string
-                    open_parens = last_line.count('(') - last_line.count(')')
-                    if open_parens > 0:
-                        last_line += ')' * open_parens
-
-                    open_brackets = last_line.count('[') - last_line.count(']')
-                    if open_brackets > 0:
-                        last_line += ']' * open_brackets
-
-                    # Cerrar comilla del string
-                    quote_char = '"' if '": "' in last_line else "'"
-                    if not last_line.endswith(quote_char):
-                        last_line += quote_char
-
-                    # Actualizar línea
-                    lines[-1] = last_line
-                    json_str = '\n'.join(lines)
-                else:
-                    # Remover línea completamente incompleta
-                    json_str = '\n'.join(lines[:-1])
-                    # Si la línea anterior termina en coma, removerla
-                    if json_str.rstrip().endswith(','):
-                        json_str = json_str.rstrip()[:-1]
-
-            # Paso 2: Cerrar comillas abiertas globalmente
-            quote_count = json_str.count('"') - json_str.count('\\"')
-            if quote_count % 2 != 0:  # Comillas impares
-                json_str += '"'
-
-            # Paso 3: Balancear llaves
-            open_braces = json_str.count('{') - json_str.count('\\{')
-            close_braces = json_str.count('}') - json_str.count('\\}')
-
-            if open_braces > close_braces:
-                # Agregar comas si el último elemento no la tiene
-                if json_str.rstrip()[-1] not in [',', '{', '[']:
-                    json_str = json_str.rstrip() + ','
-
-                # Cerrar llaves
-                json_str += '\n' + '}' * (open_braces - close_braces)
-
-            # Paso 4: Balancear corchetes (arrays)
-            open_brackets = json_str.count('[') - json_str.count('\\[')
-            close_brackets = json_str.count(']') - json_str.count('\\]')
-
-            if open_brackets > close_brackets:
-                json_str += ']' * (open_brackets - close_brackets)
-
-            return json_str.strip()
-        except Exception as e:
-            # En caso de error, retornar None
-            return None
-
     def _classify_error(self, error: Exception) -> LLMProviderError:
         """
         Clasifica un error genérico en el tipo específico de LLMProviderError.
@@ -417,7 +845,7 @@ class OllamaProvider:
             )
 
         if "connection" in error_str or "refused" in error_str:
-            return LLMProviderError(
+            return LLMProviderUnavailableError(
                 f"No se pudo conectar a Ollama en {self.base_url}. "
                 f"¿Está Ollama corriendo?: {error}"
             )
@@ -438,7 +866,8 @@ class OllamaProvider:
 def create_ollama_provider(
     model_name: str = "phi3.5",
     base_url: str = "http://localhost:11434",
-    enable_logging: bool = True
+    enable_logging: bool = True,
+    keep_alive: Optional[str] = "30m"
 ) -> OllamaProvider:
     """
     Factory function para crear un OllamaProvider configurado.
@@ -447,6 +876,7 @@ def create_ollama_provider(
         model_name: Nombre del modelo (phi3.5, llama3.2, qwen2.5, etc.)
         base_url: URL de Ollama
         enable_logging: Habilitar logging
+        keep_alive: Tiempo de residencia del modelo en memoria
 
     Returns:
         OllamaProvider configurado
@@ -459,5 +889,6 @@ def create_ollama_provider(
     return OllamaProvider(
         base_url=base_url,
         default_model=model_name,
-        enable_logging=enable_logging
+        enable_logging=enable_logging,
+        keep_alive=keep_alive
     )
@@ -0,0 +1,329 @@
+"""
+Ollama Residency - Pre-carga, keep-alive y agrupación de llamadas por modelo
+
+Con OLLAMA_MAX_LOADED_MODELS=1 solo un modelo cabe en VRAM: la primera llamada
+tras un periodo inactivo paga la carga completa del modelo, y alternar entre
+modelos (p. ej. qwen2.5:3b y un modelo grande del router) descarga y recarga
+pesos en cada llamada. El ModelResidencyManager:
+
+- warm_up(): carga el modelo con una petición vacía a /api/generate (sin generar
+  tokens) para que la primera validación no pague la carga
+- batch_session(): durante un lote envía pings de keep_alive periódicos al modelo
+  residente cuando no hay actividad, para que no se descargue entre puestos
+- model_slot(): compuerta por modelo. Las llamadas al modelo residente pasan; las
+  llamadas a otro modelo esperan a que se vacíe la cola del residente y entonces
+  se cambia al modelo con más llamadas en espera. Así el cambio de modelo ocurre
+  una vez por grupo de llamadas en lugar de en cada llamada. Para no bloquear
+  indefinidamente a un modelo minoritario, si una llamada espera más de
+  max_group_wait_s el grupo residente deja de admitir llamadas y se cambia
+
+Los managers se comparten por servidor (get_residency_manager), igual que el
+circuit breaker y el limitador de concurrencia.
+
+Fecha: 2025-11-12
+Versión: 5.43
+"""
+
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+
+def _strip_prefix(model: str) -> str:
+    return model[len("ollama/"):] if model.startswith("ollama/") else model
+
+
+class ModelResidencyManager:
+    """
+    Gestiona qué modelo está cargado en un servidor Ollama.
+
+    Thread-safe: la compuerta por modelo y los contadores se comparten entre los
+    hilos de una validación en lote.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:11434",
+        keep_alive: Optional[str] = "30m",
+        ping_interval_s: float = 240.0,
+        load_timeout_s: float = 300.0,
+        max_group_wait_s: float = 120.0,
+        enable_logging: bool = True
+    ):
+        """
+        Args:
+            base_url: URL base de Ollama
+            keep_alive: Tiempo de residencia enviado en warm-up y pings (None = default del servidor)
+            ping_interval_s: Inactividad tras la cual batch_session() envía un ping
+            load_timeout_s: Timeout de la petición de carga (modelos grandes en CPU tardan)
+            max_group_wait_s: Espera máxima de una llamada a otro modelo antes de forzar
+                el cambio (acota la inanición del modelo minoritario)
+            enable_logging: Habilitar logging
+        """
+        self.base_url = base_url.rstrip("/")
+        self.keep_alive = keep_alive
+        self.ping_interval_s = ping_interval_s
+        self.load_timeout_s = load_timeout_s
+        self.max_group_wait_s = max_group_wait_s
+        self.enable_logging = enable_logging
+
+        self._cond = threading.Condition()
+        self._active_model: Optional[str] = None
+        self._in_flight = 0
+        self._waiting: Counter = Counter()
+        self._waiting_since: Dict[str, float] = {}
+        self._last_activity = 0.0
+
+        self.stats = {
+            "warm_ups": 0,
+            "warm_up_failures": 0,
+            "load_seconds": 0.0,
+            "keepalive_pings": 0,
+            "model_switches": 0,
+            "calls": 0,
+            "wait_time_total": 0.0
+        }
+
+    @property
+    def active_model(self) -> Optional[str]:
+        with self._cond:
+            return self._active_model
+
+    # ==========================================
+    # PRE-CARGA Y KEEP-ALIVE
+    # ==========================================
+
+    def warm_up(self, model: str, _ping: bool = False) -> bool:
+        """
+        Carga el modelo en memoria sin generar tokens.
+
+        Ollama carga el modelo al recibir /api/generate con prompt vacío y lo
+        mantiene residente durante keep_alive.
+
+        Args:
+            model: Nombre del modelo (con o sin prefijo "ollama/")
+
+        Returns:
+            True si el servidor confirmó la carga
+        """
+        model = _strip_prefix(model)
+        payload = {"model": model, "prompt": "", "stream": False}
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+
+        start = time.time()
+        try:
+            body = self._post("/api/generate", payload, timeout=self.load_timeout_s)
+        except Exception as e:
+            with self._cond:
+                self.stats["warm_up_failures"] += 1
+            if self.enable_logging:
+                print(f"[OllamaResidency] No se pudo pre-cargar {model}: {e}")
+            return False
+
+        load_seconds = body.get("load_duration", 0) / 1e9
+        with self._cond:
+            self.stats["keepalive_pings" if _ping else "warm_ups"] += 1
+            self.stats["load_seconds"] += load_seconds
+            self._last_activity = time.monotonic()
+            if self._in_flight == 0:
+                self._active_model = model
+                self._cond.notify_all()
+
+        if self.enable_logging and not _ping:
+            print(f"[OllamaResidency] Modelo {model} residente "
+                  f"(carga {load_seconds:.1f}s, total {time.time() - start:.1f}s)")
+        return True
+
+    def warm_up_async(self, model: str) -> threading.Thread:
+        """warm_up() en un hilo de fondo (no bloquea el arranque de la app)"""
+        thread = threading.Thread(target=self.warm_up, args=(model,), name="ollama-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def loaded_models(self) -> List[str]:
+        """
+        Modelos cargados actualmente en el servidor (GET /api/ps).
+
+        Returns:
+            Lista de nombres (vacía si el servidor no responde)
+        """
+        try:
+            with urllib.request.urlopen(f"{self.base_url}/api/ps", timeout=5) as response:
+                body = json.loads(response.read().decode("utf-8"))
+            return [m.get("name", "") for m in body.get("models", [])]
+        except Exception:
+            return []
+
+    @contextmanager
+    def batch_session(self, model: Optional[str] = None) -> Iterator["ModelResidencyManager"]:
+        """
+        Mantiene residente el modelo activo durante un lote.
+
+        Pre-carga `model` (si se indica) y lanza un hilo que envía un ping de
+        keep_alive cuando pasan ping_interval_s sin llamadas. El ping siempre va
+        al modelo activo para no provocar un cambio de modelo.
+
+        Args:
+            model: Modelo a pre-cargar al iniciar el lote (None = no pre-cargar)
+        """
+        if model:
+            self.warm_up(model)
+
+        stop = threading.Event()
+
+        def keepalive_loop():
+            while not stop.wait(min(self.ping_interval_s, 30.0)):
+                with self._cond:
+                    target = self._active_model
+                    idle = time.monotonic() - self._last_activity
+                if target and idle >= self.ping_interval_s:
+                    self.warm_up(target, _ping=True)
+
+        pinger = threading.Thread(target=keepalive_loop, name="ollama-keepalive", daemon=True)
+        pinger.start()
+        try:
+            yield self
+        finally:
+            stop.set()
+            pinger.join(timeout=1.0)
+
+    # ==========================================
+    # AGRUPACIÓN POR MODELO
+    # ==========================================
+
+    @contextmanager
+    def model_slot(self, model: str) -> Iterator[None]:
+        """
+        Compuerta por modelo: espera hasta que `model` sea el modelo activo.
+
+        Args:
+            model: Modelo de la llamada (con o sin prefijo "ollama/")
+        """
+        waited = self.acquire(model)
+        try:
+            yield
+        finally:
+            self.release()
+        if self.enable_logging and waited > 1.0:
+            print(f"[OllamaResidency] Llamada a {_strip_prefix(model)} esperó {waited:.1f}s por cambio de modelo")
+
+    def acquire(self, model: str) -> float:
+        model = _strip_prefix(model)
+        start = time.monotonic()
+        with self._cond:
+            self._waiting[model] += 1
+            self._waiting_since.setdefault(model, start)
+            try:
+                # Timeout para reevaluar la espera máxima aunque nadie notifique
+                while not self._can_run(model, time.monotonic()):
+                    self._cond.wait(timeout=1.0)
+            finally:
+                self._waiting[model] -= 1
+                if self._waiting[model] <= 0:
+                    del self._waiting[model]
+                    self._waiting_since.pop(model, None)
+
+            if self._active_model is not None and self._active_model != model:
+                self.stats["model_switches"] += 1
+                if self.enable_logging:
+                    print(f"[OllamaResidency] Cambio de modelo: {self._active_model} → {model}")
+            self._active_model = model
+            if model in self._waiting_since:
+                self._waiting_since[model] = time.monotonic()  # Sus otras llamadas ya no esperan cambio
+            self._in_flight += 1
+            self.stats["calls"] += 1
+            waited = time.monotonic() - start
+            self.stats["wait_time_total"] += waited
+            return waited
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._last_activity = time.monotonic()
+            self._cond.notify_all()
+
+    def get_residency_stats(self) -> Dict[str, Any]:
+        """
+        Estadísticas de residencia.
+
+        Returns:
+            Dict con contadores, modelo activo y llamadas en espera por modelo
+        """
+        with self._cond:
+            return {
+                **self.stats,
+                "active_model": self._active_model,
+                "in_flight": self._in_flight,
+                "waiting": dict(self._waiting)
+            }
+
+    # ==========================================
+    # MÉTODOS PRIVADOS
+    # ==========================================
+
+    def _can_run(self, model: str, now: float) -> bool:
+        active = self._active_model
+        starved = self._starved_model(now)
+        if active is None:
+            return starved is None or starved == model
+        if active == model:
+            return starved is None  # Si otro modelo lleva demasiado esperando, drenar
+        if self._in_flight > 0:
+            return False
+        if starved is not None:
+            return starved == model
+        if self._waiting.get(active, 0) > 0:
+            return False  # Terminar primero el grupo del modelo residente
+        # Cambiar al modelo con más llamadas en espera (empate: orden alfabético)
+        next_model = max(sorted(self._waiting), key=lambda m: self._waiting[m])
+        return next_model == model
+
+    def _starved_model(self, now: float) -> Optional[str]:
+        """Modelo no residente que espera desde hace más de max_group_wait_s (el más antiguo)"""
+        candidates = [
+            (since, m) for m, since in self._waiting_since.items()
+            if m != self._active_model and now - since > self.max_group_wait_s
+        ]
+        return min(candidates)[1] if candidates else None
+
+    def _post(self, path: str, payload: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        request = urllib.request.Request(
+            f"{self.base_url}{path}",
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return json.loads(response.read().decode("utf-8") or "{}")
+        except urllib.error.HTTPError as e:
+            detail = e.read().decode("utf-8", errors="replace")[:200]
+            raise RuntimeError(f"HTTP {e.code}: {detail}") from e
+
+
+# ==========================================
+# REGISTRO COMPARTIDO POR SERVIDOR
+# ==========================================
+
+_registry_lock = threading.Lock()
+_managers: Dict[str, ModelResidencyManager] = {}
+
+
+def get_residency_manager(base_url: str, **kwargs: Any) -> ModelResidencyManager:
+    """
+    ModelResidencyManager compartido para un servidor (se crea en la primera llamada).
+
+    Args:
+        base_url: URL base de Ollama
+        **kwargs: Parámetros de ModelResidencyManager (solo se usan al crear)
+    """
+    with _registry_lock:
+        if base_url not in _managers:
+            _managers[base_url] = ModelResidencyManager(base_url, **kwargs)
+        return _managers[base_url]
@@ -0,0 +1,662 @@
+"""
+OpenAI Batch - Modo diferido con la Batch API de OpenAI
+
+Para corridas nocturnas de miles de puestos la latencia no importa, pero el costo
+y el throughput sí: la Batch API cobra ~50% menos y no consume los límites de
+rate de la API síncrona. Este módulo expone un provider con la misma interfaz que
+OpenAIProvider (complete / complete_json) que, en lugar de llamar a la API:
+
+1. Encola el request en un BatchScheduler compartido y bloquea al llamador
+2. El scheduler junta los requests de todos los hilos en un archivo JSONL
+   (cuando se alcanza max_batch_requests o no llegan requests durante idle_flush_s)
+3. Sube el archivo (POST /files, purpose="batch") y crea el batch (POST /batches)
+4. Consulta el estado (GET /batches/{id}) hasta que termina
+5. Descarga el archivo de salida y resuelve cada request por su custom_id
+
+IntegratedValidator.validate_batch(deferred=True) valida muchos puestos en paralelo
+sobre este provider: cada "ronda" de llamadas LLM de todos los puestos viaja en un
+solo batch.
+
+El cliente HTTP usa urllib y base_url configurable, de modo que puede probarse
+contra un servidor stub local.
+
+Fecha: 2025-11-12
+Versión: 5.43
+"""
+
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .json_scanner import scan_json
+from .metrics import get_metrics_collector
+from ..interfaces.llm_provider import (
+    LLMRequest,
+    LLMResponse,
+    LLMProviderError,
+    LLMProviderAuthError,
+    LLMProviderRateLimitError,
+    LLMProviderTimeoutError,
+    LLMProviderUnavailableError
+)
+
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+CHAT_COMPLETIONS_ENDPOINT = "/v1/chat/completions"
+
+# Estados terminales de un batch
+_TERMINAL_STATES = ("completed", "failed", "expired", "cancelled")
+
+# Espera máxima por resultado: ventana de 24h + margen para subida, polling y descarga
+DEFAULT_RESULT_TIMEOUT_S = 26 * 3600
+
+
+# ==========================================
+# CLIENTE HTTP (Files + Batches)
+# ==========================================
+
+class OpenAIBatchClient:
+    """Cliente mínimo de los endpoints /files y /batches"""
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None, timeout: int = 120):
+        """
+        Args:
+            api_key: API key (default: variable de entorno OPENAI_API_KEY)
+            base_url: URL base de la API (default: OPENAI_BASE_URL o api.openai.com/v1)
+            timeout: Timeout de cada petición HTTP en segundos
+        """
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.base_url = (base_url or os.getenv("OPENAI_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+        self.timeout = timeout
+
+    def upload_file(self, content: bytes, filename: str) -> str:
+        """Sube un archivo JSONL con purpose="batch". Retorna el file_id"""
+        boundary = uuid.uuid4().hex
+        body = (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="purpose"\r\n\r\nbatch\r\n'
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            f"Content-Type: application/jsonl\r\n\r\n"
+        ).encode("utf-8") + content + f"\r\n--{boundary}--\r\n".encode("utf-8")
+
+        result = self._request("POST", "/files", body, f"multipart/form-data; boundary={boundary}")
+        return result["id"]
+
+    def create_batch(self, input_file_id: str, completion_window: str = "24h",
+                     metadata: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        payload = {
+            "input_file_id": input_file_id,
+            "endpoint": CHAT_COMPLETIONS_ENDPOINT,
+            "completion_window": completion_window
+        }
+        if metadata:
+            payload["metadata"] = metadata
+        return self._request("POST", "/batches", json.dumps(payload).encode("utf-8"), "application/json")
+
+    def get_batch(self, batch_id: str) -> Dict[str, Any]:
+        return self._request("GET", f"/batches/{batch_id}")
+
+    def cancel_batch(self, batch_id: str) -> Dict[str, Any]:
+        return self._request("POST", f"/batches/{batch_id}/cancel", b"", "application/json")
+
+    def download_file(self, file_id: str) -> str:
+        return self._request("GET", f"/files/{file_id}/content", raw=True)
+
+    def _request(self, method: str, path: str, body: Optional[bytes] = None,
+                 content_type: Optional[str] = None, raw: bool = False) -> Any:
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        if content_type:
+            headers["Content-Type"] = content_type
+        request = urllib.request.Request(f"{self.base_url}{path}", data=body, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                text = response.read().decode("utf-8")
+        except urllib.error.HTTPError as e:
+            detail = e.read().decode("utf-8", errors="replace")[:300]
+            if e.code == 401:
+                raise LLMProviderAuthError(f"Error de autenticación con OpenAI Batch API: {detail}")
+            if e.code == 429:
+                raise LLMProviderRateLimitError(f"Límite de la Batch API excedido: {detail}")
+            if e.code >= 500:
+                raise LLMProviderUnavailableError(f"Batch API no disponible (HTTP {e.code}): {detail}")
+            raise LLMProviderError(f"Error HTTP {e.code} en {method} {path}: {detail}")
+        except urllib.error.URLError as e:
+            raise LLMProviderUnavailableError(f"No se pudo conectar a {self.base_url}: {e.reason}")
+        return text if raw else json.loads(text or "{}")
+
+
+# ==========================================
+# SCHEDULER
+# ==========================================
+
+class BatchScheduler:
+    """
+    Junta requests de muchos hilos en batches y resuelve un Future por request.
+
+    Thread-safe. Cada batch enviado se sigue en su propio hilo de polling.
+    """
+
+    def __init__(
+        self,
+        client: OpenAIBatchClient,
+        max_batch_requests: int = 5000,
+        idle_flush_s: float = 2.0,
+        max_wait_s: float = 30.0,
+        poll_interval_s: float = 30.0,
+        completion_window: str = "24h",
+        work_dir: Optional[str] = None,
+        enable_logging: bool = True
+    ):
+        """
+        Args:
+            client: Cliente de la Batch API
+            max_batch_requests: Requests por batch (la API admite hasta 50,000)
+            idle_flush_s: Enviar el batch si no llegan requests durante este tiempo
+            max_wait_s: Enviar el batch a más tardar este tiempo después del primer request
+            poll_interval_s: Intervalo de consulta del estado del batch
+            completion_window: Ventana de la Batch API ("24h")
+            work_dir: Directorio donde guardar los JSONL de entrada/salida (auditoría)
+            enable_logging: Habilitar logging
+        """
+        self.client = client
+        self.max_batch_requests = max_batch_requests
+        self.idle_flush_s = idle_flush_s
+        self.max_wait_s = max_wait_s
+        self.poll_interval_s = poll_interval_s
+        self.completion_window = completion_window
+        self.work_dir = Path(work_dir) if work_dir else None
+        self.enable_logging = enable_logging
+
+        self._cond = threading.Condition()
+        self._pending: List[Tuple[str, Dict[str, Any], Future]] = []
+        self._first_at = 0.0
+        self._last_at = 0.0
+        self._flusher: Optional[threading.Thread] = None
+        self._closed = False
+        self._cancelled = threading.Event()
+        self._active_batches: Set[str] = set()
+        self._counter = 0
+
+        self.stats = {
+            "requests": 0,
+            "batches_submitted": 0,
+            "batches_completed": 0,
+            "batches_failed": 0,
+            "results_ok": 0,
+            "results_error": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0
+        }
+
+    def submit(self, body: Dict[str, Any]) -> Future:
+        """
+        Encola el body de un chat completion.
+
+        Returns:
+            Future que se resuelve con el body de la respuesta (chat.completion) o
+            con una excepción LLMProviderError
+        """
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise LLMProviderError("BatchScheduler cerrado")
+            self._counter += 1
+            custom_id = f"req-{self._counter}"
+            now = time.monotonic()
+            if not self._pending:
+                self._first_at = now
+            self._last_at = now
+            self._pending.append((custom_id, body, future))
+            self.stats["requests"] += 1
+            self._ensure_flusher()
+            self._cond.notify_all()
+        return future
+
+    def flush(self) -> None:
+        """Envía de inmediato los requests pendientes"""
+        with self._cond:
+            items = self._take_pending()
+        if items:
+            self._start_batch(items)
+
+    def close(self) -> None:
+        """Envía lo pendiente y detiene el hilo de envío (los batches en curso siguen)"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self.flush()
+
+    def cancel(self) -> None:
+        """
+        Cancela todo: descarta lo pendiente, cancela los batches en curso en la API
+        y falla sus requests, liberando a los hilos que esperan resultado.
+        """
+        with self._cond:
+            self._closed = True
+            self._cancelled.set()
+            items = self._take_pending()
+            active = list(self._active_batches)
+            self._cond.notify_all()
+
+        # Los requests de batches en curso los falla su hilo de polling al ver la cancelación
+        self._fail_remaining({custom_id: future for custom_id, _, future in items},
+                             LLMProviderError("Batch de OpenAI cancelado"))
+        for batch_id in active:
+            try:
+                self.client.cancel_batch(batch_id)
+            except LLMProviderError as e:
+                if self.enable_logging:
+                    print(f"[OpenAIBatch] No se pudo cancelar el batch {batch_id}: {e}")
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {**self.stats, "pending": len(self._pending)}
+
+    # ==========================================
+    # MÉTODOS PRIVADOS
+    # ==========================================
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(target=self._flush_loop, name="openai-batch-flusher", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed and not self._pending:
+                    return
+                now = time.monotonic()
+                due = (
+                    len(self._pending) >= self.max_batch_requests or
+                    now - self._last_at >= self.idle_flush_s or
+                    now - self._first_at >= self.max_wait_s
+                )
+                if not due:
+                    wait = min(self._last_at + self.idle_flush_s, self._first_at + self.max_wait_s) - now
+                    self._cond.wait(timeout=max(0.01, wait))
+                    continue
+                items = self._take_pending()
+            self._start_batch(items)
+
+    def _take_pending(self) -> List[Tuple[str, Dict[str, Any], Future]]:
+        items = self._pending[:self.max_batch_requests]
+        self._pending = self._pending[self.max_batch_requests:]
+        if self._pending:
+            self._first_at = self._last_at = time.monotonic()
+        return items
+
+    def _start_batch(self, items: List[Tuple[str, Dict[str, Any], Future]]) -> None:
+        threading.Thread(target=self._run_batch, args=(items,), name="openai-batch-poll", daemon=True).start()
+
+    def _run_batch(self, items: List[Tuple[str, Dict[str, Any], Future]]) -> None:
+        futures = {custom_id: future for custom_id, _, future in items}
+        batch_id = None
+        try:
+            lines = [
+                json.dumps({"custom_id": custom_id, "method": "POST",
+                            "url": CHAT_COMPLETIONS_ENDPOINT, "body": body}, ensure_ascii=False)
+                for custom_id, body, _ in items
+            ]
+            content = ("\n".join(lines) + "\n").encode("utf-8")
+            batch_name = f"homologacion_{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+            self._save(f"{batch_name}_input.jsonl", content.decode("utf-8"))
+
+            file_id = self.client.upload_file(content, f"{batch_name}.jsonl")
+            batch = self.client.create_batch(file_id, self.completion_window, metadata={"origen": batch_name})
+            with self._cond:
+                self.stats["batches_submitted"] += 1
+                batch_id = batch["id"]
+                self._active_batches.add(batch_id)
+            if self._cancelled.is_set():
+                self.client.cancel_batch(batch["id"])
+                raise LLMProviderError("Batch de OpenAI cancelado")
+            if self.enable_logging:
+                print(f"[OpenAIBatch] Batch {batch['id']} enviado con {len(items)} requests")
+
+            batch = self._poll(batch)
+            status = batch.get("status")
+
+            resolved = 0
+            for file_key in ("output_file_id", "error_file_id"):
+                if batch.get(file_key):
+                    output = self.client.download_file(batch[file_key])
+                    self._save(f"{batch_name}_{file_key.split('_')[0]}.jsonl", output)
+                    resolved += self._resolve(output, futures)
+
+            with self._cond:
+                self.stats["batches_completed" if status == "completed" else "batches_failed"] += 1
+            if self.enable_logging:
+                print(f"[OpenAIBatch] Batch {batch['id']} terminado ({status}): {resolved}/{len(items)} resultados")
+
+            self._fail_remaining(futures, LLMProviderError(
+                f"Batch {batch['id']} terminó con estado '{status}' sin resultado para el request"
+            ))
+
+        except Exception as e:
+            error = e if isinstance(e, LLMProviderError) else LLMProviderError(f"Error en batch de OpenAI: {e}")
+            with self._cond:
+                self.stats["batches_failed"] += 1
+            if self.enable_logging:
+                print(f"[OpenAIBatch] Error procesando batch: {e}")
+            self._fail_remaining(futures, error)
+
+        finally:
+            with self._cond:
+                self._active_batches.discard(batch_id)
+
+    def _poll(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        while batch.get("status") not in _TERMINAL_STATES:
+            if self._cancelled.wait(self.poll_interval_s):
+                raise LLMProviderError(f"Batch {batch['id']} cancelado")
+            try:
+                batch = self.client.get_batch(batch["id"])
+            except (LLMProviderUnavailableError, LLMProviderRateLimitError) as e:
+                if self.enable_logging:
+                    print(f"[OpenAIBatch] Error consultando batch {batch['id']}, se reintenta: {e}")
+        return batch
+
+    def _resolve(self, output: str, futures: Dict[str, Future]) -> int:
+        resolved = 0
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            future = futures.pop(item.get("custom_id"), None)
+            if future is None:
+                continue
+
+            response = item.get("response") or {}
+            body = response.get("body") or {}
+            if item.get("error") or response.get("status_code", 200) != 200 or "error" in body:
+                error = item.get("error") or body.get("error") or {}
+                message = error.get("message", str(error)) if isinstance(error, dict) else str(error)
+                future.set_exception(LLMProviderError(f"Request {item.get('custom_id')} falló en batch: {message}"))
+                with self._cond:
+                    self.stats["results_error"] += 1
+            else:
+                usage = body.get("usage") or {}
+                with self._cond:
+                    self.stats["results_ok"] += 1
+                    self.stats["prompt_tokens"] += usage.get("prompt_tokens", 0)
+                    self.stats["completion_tokens"] += usage.get("completion_tokens", 0)
+                future.set_result(body)
+            resolved += 1
+        return resolved
+
+    def _fail_remaining(self, futures: Dict[str, Future], error: Exception) -> None:
+        for future in futures.values():
+            if not future.done():
+                future.set_exception(error)
+                with self._cond:
+                    self.stats["results_error"] += 1
+        futures.clear()
+
+    def _save(self, filename: str, content: str) -> None:
+        if self.work_dir is None:
+            return
+        try:
+            self.work_dir.mkdir(parents=True, exist_ok=True)
+            (self.work_dir / filename).write_text(content, encoding="utf-8")
+        except OSError as e:
+            if self.enable_logging:
+                print(f"[OpenAIBatch] No se pudo guardar {filename}: {e}")
+
+
+# ==========================================
+# PROVIDER
+# ==========================================
+
+class OpenAIBatchProvider:
+    """
+    Provider de OpenAI en modo diferido (Batch API).
+
+    Misma interfaz que OpenAIProvider; complete() bloquea al hilo llamador hasta
+    que el batch que contiene su request termina. Requiere muchos llamadores
+    concurrentes para que los batches sean útiles (ver validate_batch(deferred=True)).
+
+    Example:
+        >>> provider = OpenAIBatchProvider(default_model="openai/gpt-4o-mini")
+        >>> # Desde muchos hilos:
+        >>> response = provider.complete(LLMRequest(prompt="..."))
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        default_model: str = "openai/gpt-4o-mini",
+        base_url: Optional[str] = None,
+        scheduler: Optional[BatchScheduler] = None,
+        fallback_provider: Optional[Any] = None,
+        result_timeout_s: Optional[float] = DEFAULT_RESULT_TIMEOUT_S,
+        enable_logging: bool = True,
+        **scheduler_kwargs: Any
+    ):
+        """
+        Args:
+            api_key: API key de OpenAI (default: variable de entorno OPENAI_API_KEY)
+            default_model: Modelo por defecto (con o sin prefijo "openai/")
+            base_url: URL base de la API (útil para un servidor stub en pruebas)
+            scheduler: BatchScheduler a usar (default: uno nuevo)
+            fallback_provider: Provider síncrono para reintentar los requests que
+                fallen dentro del batch (None = propagar el error)
+            result_timeout_s: Espera máxima por resultado; al agotarse el request falla
+                con LLMProviderTimeoutError (default: ventana de 24h + margen; None =
+                sin límite)
+            enable_logging: Habilitar logging
+            **scheduler_kwargs: Parámetros de BatchScheduler (max_batch_requests,
+                idle_flush_s, poll_interval_s, work_dir, ...)
+        """
+        self.api_key = api_key
+        self.default_model = default_model
+        self.fallback_provider = fallback_provider
+        self.result_timeout_s = result_timeout_s
+        self.enable_logging = enable_logging
+        self.scheduler = scheduler or BatchScheduler(
+            OpenAIBatchClient(api_key=api_key, base_url=base_url),
+            enable_logging=enable_logging,
+            **scheduler_kwargs
+        )
+        self._stats_lock = threading.Lock()
+        self._fallback_calls = 0
+
+    @classmethod
+    def from_provider(cls, provider: Any, **kwargs: Any) -> "OpenAIBatchProvider":
+        """
+        Crea el provider diferido a partir de un OpenAIProvider (o de la ruta cloud
+        de un LLMRouterProvider). El provider original queda como fallback síncrono.
+
+        Raises:
+            ValueError: Si no hay un provider de OpenAI del cual derivar
+        """
+        from .openai_provider import OpenAIProvider
+
+        source = getattr(provider, "cloud_provider", None) or provider
+        if not isinstance(source, OpenAIProvider):
+            raise ValueError(
+                f"El modo diferido requiere un provider de OpenAI (recibido: {type(provider).__name__})"
+            )
+        kwargs.setdefault("fallback_provider", source)
+        kwargs.setdefault("enable_logging", source.enable_logging)
+        return cls(api_key=source.api_key, default_model=source.default_model, **kwargs)
+
+    def complete(self, request: LLMRequest) -> LLMResponse:
+        """
+        Encola el request en el siguiente batch y espera su resultado.
+
+        Args:
+            request: Objeto LLMRequest con prompt y parámetros
+
+        Returns:
+            LLMResponse con el contenido generado
+
+        Raises:
+            LLMProviderError: Si el request falló en el batch y no hay fallback
+        """
+        model = request.model or self.default_model
+        start_time = time.time()
+
+        try:
+            body = self.scheduler.submit(self._build_body(request, model)).result(timeout=self.result_timeout_s)
+        except FutureTimeoutError:
+            # Sin fallback síncrono: tras horas de espera sería una avalancha de llamadas
+            get_metrics_collector().record_call(
+                "openai_batch", model, latency_s=time.time() - start_time, error=True
+            )
+            raise LLMProviderTimeoutError(
+                f"Sin resultado del batch de OpenAI tras {self.result_timeout_s:.0f}s"
+            )
+        except Exception as e:
+            if self.fallback_provider is None or self.scheduler.cancelled:
+                get_metrics_collector().record_call(
+                    "openai_batch", model, latency_s=time.time() - start_time, error=True
+                )
+                raise e if isinstance(e, LLMProviderError) else LLMProviderError(f"Error en batch de OpenAI: {e}")
+            # El fallback registra su propia llamada; aquí solo se cuenta el reintento
+            # (get_batch_stats()["fallback_calls"]) para no contar el request dos veces
+            if self.enable_logging:
+                print(f"[OpenAIBatch] Request sin resultado en batch, reintento síncrono: {e}")
+            with self._stats_lock:
+                self._fallback_calls += 1
+            return self.fallback_provider.complete(request)
+
+        choice = (body.get("choices") or [{}])[0]
+        content = (choice.get("message") or {}).get("content")
+        if not content:
+            raise LLMProviderError("OpenAI Batch devolvió respuesta vacía")
+
+        usage = body.get("usage") or {}
+        get_metrics_collector().record_call(
+            "openai_batch", model,
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            completion_tokens=usage.get("completion_tokens", 0),
+            latency_s=time.time() - start_time
+        )
+        return LLMResponse(
+            content=content,
+            model=body.get("model", model),
+            tokens_used={
+                "prompt": usage.get("prompt_tokens", 0),
+                "completion": usage.get("completion_tokens", 0),
+                "total": usage.get("total_tokens", 0)
+            },
+            finish_reason=choice.get("finish_reason"),
+            metadata={
+                "duration": time.time() - start_time,
+                "deferred": True
+            }
+        )
+
+    def complete_json(self, request: LLMRequest) -> Dict[str, Any]:
+        """
+        Genera una completion en formato JSON (parsing tolerante como OpenAIProvider).
+
+        Raises:
+            LLMProviderError: Si hay error en la llamada o parsing
+        """
+        return self.complete_json_with_usage(request)[0]
+
+    def complete_json_with_usage(self, request: LLMRequest) -> Tuple[Dict[str, Any], Dict[str, int]]:
+        """
+        complete_json() que además devuelve los tokens usados.
+
+        Returns:
+            Tupla (dict parseado, tokens_used de la respuesta)
+        """
+        response = self.complete(request)
+        content = response.content.strip()
+        if content.startswith("```"):
+            content = content.strip("`").removeprefix("json").strip()
+
+        try:
+            return json.loads(content), response.tokens_used
+        except json.JSONDecodeError as e:
+            scan = scan_json(content)
+            if scan is not None:
+                get_metrics_collector().record_json_repair("openai_batch", request.model or self.default_model)
+                if self.enable_logging and scan.repairs:
+                    print(f"[OpenAIBatch] JSON reparado: {', '.join(scan.repairs)}")
+                return scan.value, response.tokens_used
+            raise LLMProviderError(
+                f"No se pudo parsear JSON: {str(e)}\n"
+                f"Contenido: {content[:200]}..."
+            )
+
+    def flush(self) -> None:
+        """Envía de inmediato los requests pendientes"""
+        self.scheduler.flush()
+
+    def close(self) -> None:
+        """Envía lo pendiente; los batches en curso se siguen resolviendo"""
+        self.scheduler.close()
+
+    def cancel(self) -> None:
+        """Cancela los batches en curso y falla sus requests (libera a los llamadores)"""
+        self.scheduler.cancel()
+
+    def get_model_info(self) -> Dict[str, Any]:
+        return {
+            "provider": "OpenAI (Batch API, diferido)",
+            "default_model": self.default_model,
+            "base_url": self.scheduler.client.base_url,
+            "max_batch_requests": self.scheduler.max_batch_requests,
+            "completion_window": self.scheduler.completion_window
+        }
+
+    def is_available(self) -> bool:
+        return bool(self.scheduler.client.api_key)
+
+    def get_batch_stats(self) -> Dict[str, Any]:
+        """
+        Estadísticas del modo diferido.
+
+        Returns:
+            Dict con contadores del scheduler y llamadas resueltas por fallback síncrono
+        """
+        with self._stats_lock:
+            fallback_calls = self._fallback_calls
+        return {**self.scheduler.get_stats(), "fallback_calls": fallback_calls}
+
+    # ==========================================
+    # MÉTODOS PRIVADOS
+    # ==========================================
+
+    @staticmethod
+    def _build_body(request: LLMRequest, model: str) -> Dict[str, Any]:
+        messages = []
+        if request.system_message:
+            messages.append({"role": "system", "content": request.system_message})
+        messages.append({"role": "user", "content": request.prompt})
+
+        body = {
+            "model": model.removeprefix("openai/"),
+            "messages": messages,
+            "max_tokens": request.max_tokens,
+            "temperature": request.temperature
+        }
+        if request.stop_sequences:
+            body["stop"] = request.stop_sequences
+        if request.response_schema:
+            body["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": request.response_schema.get("title", "respuesta"),
+                    "schema": request.response_schema
+                }
+            }
+        return body
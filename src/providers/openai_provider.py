@@ -6,11 +6,13 @@ Incluye manejo robusto de errores, parsing de JSON y reintentos.
 """
 
 import json
-import re
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from dataclasses import replace
 
+from .json_scanner import scan_json
+from .metrics import get_metrics_collector
+from .resilience import CircuitBreaker, backoff_delay, get_circuit_breaker
 from ..interfaces.llm_provider import (
     ILLMProvider,
     LLMRequest,
@@ -18,7 +20,8 @@ from ..interfaces.llm_provider import (
     LLMProviderError,
     LLMProviderTimeoutError,
     LLMProviderAuthError,
-    LLMProviderRateLimitError
+    LLMProviderRateLimitError,
+    LLMProviderUnavailableError
 )
 
 try:
@@ -46,7 +49,8 @@ class OpenAIProvider:
         default_model: str = "openai/gpt-4o",
         timeout: int = 60,
         max_retries: int = 3,
-        enable_logging: bool = True
+        enable_logging: bool = True,
+        circuit_breaker: Optional[CircuitBreaker] = None
     ):
         """
         Inicializa el provider de OpenAI.
@@ -57,6 +61,7 @@ class OpenAIProvider:
             timeout: Timeout en segundos para llamadas
             max_retries: Número máximo de reintentos en caso de error
             enable_logging: Habilitar logging de llamadas
+            circuit_breaker: Circuit breaker a usar (default: compartido "openai")
         """
         if not LITELLM_AVAILABLE:
             raise LLMProviderError(
@@ -68,6 +73,7 @@ class OpenAIProvider:
         self.timeout = timeout
         self.max_retries = max_retries
         self.enable_logging = enable_logging
+        self.circuit_breaker = circuit_breaker or get_circuit_breaker("openai")
 
     def complete(self, request: LLMRequest) -> LLMResponse:
         """
@@ -106,12 +112,25 @@ class OpenAIProvider:
         if request.stop_sequences:
             call_params["stop"] = request.stop_sequences
 
+        # Structured outputs: la respuesta se restringe al JSON Schema del request
+        if request.response_schema:
+            call_params["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": request.response_schema.get("title", "respuesta"),
+                    "schema": request.response_schema
+                }
+            }
+
         # Intentar llamada con reintentos
         last_error = None
         for attempt in range(self.max_retries):
             try:
+                # Fail fast si la API está marcada como caída
+                self.circuit_breaker.before_call()
                 response = completion(**call_params)
                 duration = time.time() - start_time
+                self.circuit_breaker.record_success()
 
                 content = response.choices[0].message.content
                 if not content:
@@ -128,6 +147,14 @@ class OpenAIProvider:
                     "total": usage.get('total_tokens', 0)
                 }
 
+                get_metrics_collector().record_call(
+                    "openai", model,
+                    prompt_tokens=tokens_used["prompt"],
+                    completion_tokens=tokens_used["completion"],
+                    latency_s=duration,
+                    retries=attempt
+                )
+
                 return LLMResponse(
                     content=content,
                     model=model,
@@ -139,13 +166,32 @@ class OpenAIProvider:
                     }
                 )
 
+            except LLMProviderUnavailableError:
+                get_metrics_collector().record_call(
+                    "openai", model, latency_s=time.time() - start_time, retries=attempt, error=True
+                )
+                raise
+
             except Exception as e:
                 last_error = self._classify_error(e)
+                if isinstance(last_error, (LLMProviderTimeoutError, LLMProviderUnavailableError)):
+                    self.circuit_breaker.record_failure()
+                else:
+                    self.circuit_breaker.record_neutral()
+
+                final = isinstance(last_error, LLMProviderAuthError) or attempt >= self.max_retries - 1
+                if final:
+                    get_metrics_collector().record_call(
+                        "openai", model, latency_s=time.time() - start_time, retries=attempt, error=True
+                    )
+
+                if isinstance(last_error, LLMProviderAuthError):
+                    raise last_error  # Reintentar no cambia una API key inválida
 
                 if attempt < self.max_retries - 1:
-                    wait_time = 2 ** attempt  # Exponential backoff
+                    wait_time = backoff_delay(attempt)  # Exponential backoff con jitter
                     if self.enable_logging:
-                        print(f"[OpenAI] Error en intento {attempt + 1}, reintentando en {wait_time}s...")
+                        print(f"[OpenAI] Error en intento {attempt + 1}, reintentando en {wait_time:.1f}s...")
                     time.sleep(wait_time)
                 else:
                     raise last_error
@@ -162,6 +208,19 @@ class OpenAIProvider:
         Returns:
             Dict parseado del JSON generado
 
+        Raises:
+            LLMProviderError: Si hay error en la llamada o parsing
+        """
+        return self.complete_json_with_usage(request)[0]
+
+    def complete_json_with_usage(self, request: LLMRequest) -> Tuple[Dict[str, Any], Dict[str, int]]:
+        """
+        complete_json() que además devuelve los tokens usados (para conciliar
+        límites de tokens por minuto).
+
+        Returns:
+            Tupla (dict parseado, tokens_used de la respuesta)
+
         Raises:
             LLMProviderError: Si hay error en la llamada o parsing
         """
@@ -173,12 +232,15 @@ class OpenAIProvider:
 
         # Intentar parsear JSON directamente
         try:
-            return json.loads(content_cleaned)
+            return json.loads(content_cleaned), response.tokens_used
         except json.JSONDecodeError as e:
-            # Fallback: buscar JSON con regex
-            parsed_json = self._extract_json_with_regex(content_cleaned)
-            if parsed_json is not None:
-                return parsed_json
+            # Fallback: escaneo tolerante en una pasada (texto extra, comas, truncado)
+            scan = scan_json(content_cleaned)
+            if scan is not None:
+                get_metrics_collector().record_json_repair("openai", request.model or self.default_model)
+                if self.enable_logging and scan.repairs:
+                    print(f"[OpenAI] JSON reparado: {', '.join(scan.repairs)}")
+                return scan.value, response.tokens_used
 
             # Si todo falla, lanzar error con contenido original
             raise LLMProviderError(
@@ -198,6 +260,7 @@ class OpenAIProvider:
             "default_model": self.default_model,
             "timeout": self.timeout,
             "max_retries": self.max_retries,
+            "circuit_state": self.circuit_breaker.state,
             "litellm_available": LITELLM_AVAILABLE
         }
 
@@ -241,31 +304,6 @@ class OpenAIProvider:
 
         return content
 
-    def _extract_json_with_regex(self, content: str) -> Optional[Dict[str, Any]]:
-        """
-        Intenta extraer JSON usando regex como fallback.
-
-        Args:
-            content: Contenido donde buscar JSON
-
-        Returns:
-            Dict parseado o None si no se encuentra
-        """
-        json_patterns = [
-            r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}',  # Objetos anidados
-            r'\[[^\[\]]*(?:\[[^\[\]]*\][^\[\]]*)*\]'  # Arrays anidados
-        ]
-
-        for pattern in json_patterns:
-            matches = re.findall(pattern, content, re.DOTALL)
-            for match in matches:
-                try:
-                    return json.loads(match)
-                except:
-                    continue
-
-        return None
-
     def _classify_error(self, error: Exception) -> LLMProviderError:
         """
         Clasifica un error genérico en el tipo específico de LLMProviderError.
@@ -287,4 +325,7 @@ class OpenAIProvider:
         if "rate limit" in error_str or "429" in error_str:
             return LLMProviderRateLimitError(f"Rate limit excedido en OpenAI: {error}")
 
+        if "connection" in error_str or "503" in error_str or "502" in error_str:
+            return LLMProviderUnavailableError(f"API de OpenAI no disponible: {error}")
+
         return LLMProviderError(f"Error en llamada a OpenAI: {error}")
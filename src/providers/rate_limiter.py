@@ -0,0 +1,228 @@
+"""
+Rate Limiter - Limitador global de requests/min y tokens/min para providers LLM
+
+Implementa dos token buckets (requests y tokens) compartidos entre hilos, y un
+wrapper RateLimitedProvider que aplica el límite a cualquier ILLMProvider.
+
+Uso típico (validación en lote contra OpenAI):
+    >>> limiter = RateLimiter(requests_per_minute=500, tokens_per_minute=200_000)
+    >>> provider = RateLimitedProvider(OpenAIProvider(api_key=...), limiter)
+"""
+
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
+
+from ..interfaces.llm_provider import LLMRequest, LLMResponse, LLMProviderError
+from .json_scanner import scan_json
+
+
+# Aproximación conservadora de caracteres por token (español, tokenizers BPE)
+CHARS_PER_TOKEN = 4
+
+
+def estimate_request_tokens(request: LLMRequest) -> int:
+    """
+    Estima los tokens que consumirá un request (prompt + max_tokens).
+
+    Los proveedores (OpenAI) contabilizan max_tokens contra el límite TPM al recibir
+    el request, por lo que se reserva completo y se ajusta al conocer el uso real.
+
+    Args:
+        request: Request a estimar
+
+    Returns:
+        Número estimado de tokens
+    """
+    chars = len(request.prompt or "") + len(request.system_message or "")
+    return chars // CHARS_PER_TOKEN + (request.max_tokens or 0)
+
+
+class _TokenBucket:
+    """Token bucket con recarga continua (capacidad = límite por minuto)"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = float(per_minute) / 60.0
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        # Un request mayor que la capacidad se deja pasar con el bucket lleno
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        self.tokens -= amount
+
+    def refund(self, amount: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RateLimiter:
+    """
+    Limitador global de requests por minuto y tokens por minuto (thread-safe).
+
+    Ambos límites son opcionales; None significa sin límite.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None
+    ):
+        """
+        Args:
+            requests_per_minute: Máximo de requests por minuto (None = sin límite)
+            tokens_per_minute: Máximo de tokens por minuto (None = sin límite)
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = _TokenBucket(requests_per_minute) if requests_per_minute else None
+        self._tokens = _TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "requests": 0,
+            "tokens_reserved": 0,
+            "tokens_used": 0,
+            "wait_time_total": 0.0
+        }
+
+    def acquire(self, tokens: int = 0) -> float:
+        """
+        Bloquea hasta que haya capacidad para un request de `tokens` tokens.
+
+        Args:
+            tokens: Tokens estimados del request
+
+        Returns:
+            Segundos esperados
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = 0.0
+                if self._requests:
+                    wait = max(wait, self._requests.wait_time(1, now))
+                if self._tokens:
+                    wait = max(wait, self._tokens.wait_time(tokens, now))
+
+                if wait <= 0:
+                    if self._requests:
+                        self._requests.consume(1)
+                    if self._tokens:
+                        self._tokens.consume(tokens)
+                    self.stats["requests"] += 1
+                    self.stats["tokens_reserved"] += tokens
+                    self.stats["wait_time_total"] += waited
+                    return waited
+
+            time.sleep(wait)
+            waited += wait
+
+    def reconcile(self, reserved_tokens: int, actual_tokens: int) -> None:
+        """
+        Ajusta el bucket de tokens con el uso real reportado por el proveedor.
+
+        Args:
+            reserved_tokens: Tokens reservados en acquire()
+            actual_tokens: Tokens realmente consumidos
+        """
+        with self._lock:
+            self.stats["tokens_used"] += actual_tokens
+            if not self._tokens:
+                return
+            diff = reserved_tokens - actual_tokens
+            if diff > 0:
+                self._tokens.refund(diff)
+            elif diff < 0:
+                self._tokens.consume(-diff)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas acumuladas del limitador"""
+        with self._lock:
+            return {
+                **self.stats,
+                "requests_per_minute": self.requests_per_minute,
+                "tokens_per_minute": self.tokens_per_minute
+            }
+
+
+class RateLimitedProvider:
+    """
+    Wrapper de ILLMProvider que aplica un RateLimiter compartido.
+
+    Delegación transparente: get_model_info/is_available y cualquier otro
+    atributo se resuelven en el provider envuelto.
+    """
+
+    def __init__(self, provider: Any, limiter: RateLimiter):
+        """
+        Args:
+            provider: Provider a envolver (OpenAIProvider, OllamaProvider, ...)
+            limiter: Limitador compartido entre hilos
+        """
+        self.provider = provider
+        self.limiter = limiter
+
+    def complete(self, request: LLMRequest) -> LLMResponse:
+        reserved = estimate_request_tokens(request)
+        self.limiter.acquire(reserved)
+        try:
+            response = self.provider.complete(request)
+        except Exception:
+            # Timeout, 5xx, circuito abierto...: devolver la reserva al bucket
+            self.limiter.reconcile(reserved, 0)
+            raise
+        self.limiter.reconcile(reserved, response.tokens_used.get("total", reserved))
+        return response
+
+    def complete_json(self, request: LLMRequest) -> Dict[str, Any]:
+        return self.complete_json_with_usage(request)[0]
+
+    def complete_json_with_usage(self, request: LLMRequest) -> Tuple[Dict[str, Any], Dict[str, int]]:
+        """
+        complete_json() conciliando la reserva con los tokens reales.
+
+        Si el provider no expone complete_json_with_usage() se usa complete() y
+        se parsea la respuesta, para no dejar reservado el max_tokens completo.
+        """
+        reserved = estimate_request_tokens(request)
+        self.limiter.acquire(reserved)
+        con_usage = hasattr(self.provider, "complete_json_with_usage")
+        try:
+            if con_usage:
+                result, tokens_used = self.provider.complete_json_with_usage(request)
+            else:
+                response = self.provider.complete(request)
+        except Exception:
+            self.limiter.reconcile(reserved, 0)
+            raise
+
+        if not con_usage:
+            tokens_used = response.tokens_used or {}
+            self.limiter.reconcile(reserved, tokens_used.get("total", reserved))
+            scan = scan_json(response.content or "")
+            if scan is None:
+                raise LLMProviderError(f"No se pudo parsear JSON: {(response.content or '')[:200]}...")
+            return scan.value, tokens_used
+        self.limiter.reconcile(reserved, (tokens_used or {}).get("total", reserved))
+        return result, tokens_used
+
+    def get_model_info(self) -> Dict[str, Any]:
+        return self.provider.get_model_info()
+
+    def is_available(self) -> bool:
+        return self.provider.is_available()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.provider, name)
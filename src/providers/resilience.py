@@ -0,0 +1,305 @@
+"""
+Resilience - Circuit breaker, concurrencia adaptativa (AIMD) y backoff con jitter
+
+Protege la capa de providers cuando el servidor LLM no está sano (p. ej. Ollama
+reiniciándose por falta de memoria):
+
+- CircuitBreaker: tras N fallos consecutivos de disponibilidad (timeout, conexión)
+  abre el circuito y las llamadas fallan de inmediato con
+  LLMProviderUnavailableError en lugar de esperar el timeout completo. Tras
+  recovery_timeout deja pasar una llamada de prueba (half-open).
+- AdaptiveConcurrencyLimiter: limita las llamadas simultáneas con AIMD: +1/límite
+  por cada éxito con latencia aceptable, ×0.5 ante error o latencia excesiva.
+- backoff_delay: backoff exponencial con "full jitter" para no sincronizar reintentos.
+
+Los breakers y limitadores se comparten por servidor (get_circuit_breaker /
+get_concurrency_limiter), de modo que todos los hilos de una validación en lote
+ven el mismo estado de salud.
+"""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from ..interfaces.llm_provider import LLMProviderUnavailableError
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """
+    Backoff exponencial con full jitter: uniforme en [0, min(cap, base * 2^attempt)].
+
+    Args:
+        attempt: Número de intento (0 = primer reintento)
+        base: Espera base en segundos
+        cap: Espera máxima en segundos
+
+    Returns:
+        Segundos a esperar
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+# ==========================================
+# CIRCUIT BREAKER
+# ==========================================
+
+class CircuitBreaker:
+    """
+    Circuit breaker thread-safe (closed → open → half_open → closed).
+
+    Solo los fallos de disponibilidad (timeouts, errores de conexión) deben
+    registrarse con record_failure(); errores de request (auth, JSON) no indican
+    un servidor caído.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1
+    ):
+        """
+        Args:
+            name: Identificador (normalmente la URL del servidor)
+            failure_threshold: Fallos consecutivos para abrir el circuito
+            recovery_timeout: Segundos en estado abierto antes de probar de nuevo
+            half_open_max_calls: Llamadas de prueba simultáneas en half-open
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self.stats = {
+            "calls": 0,
+            "failures": 0,
+            "rejected": 0,
+            "times_opened": 0
+        }
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def before_call(self) -> None:
+        """
+        Registra el inicio de una llamada.
+
+        Raises:
+            LLMProviderUnavailableError: Si el circuito está abierto (fail fast)
+        """
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == self.OPEN or (
+                state == self.HALF_OPEN and self._half_open_in_flight >= self.half_open_max_calls
+            ):
+                self.stats["rejected"] += 1
+                remaining = max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+                raise LLMProviderUnavailableError(
+                    f"Circuito abierto para {self.name} tras {self._consecutive_failures} fallos "
+                    f"consecutivos (reintento en {remaining:.0f}s)"
+                )
+            if state == self.HALF_OPEN:
+                self._half_open_in_flight += 1
+            self.stats["calls"] += 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+            self._state = self.CLOSED
+            self._consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.stats["failures"] += 1
+            self._consecutive_failures += 1
+            now = time.monotonic()
+            state = self._current_state(now)
+            if state == self.HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+            if state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.stats["times_opened"] += 1
+                self._state = self.OPEN
+                self._opened_at = now
+
+    def record_neutral(self) -> None:
+        """Fin de una llamada que no dice nada de la salud del servidor (p. ej. auth)"""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                "name": self.name,
+                "state": self._current_state(time.monotonic()),
+                "consecutive_failures": self._consecutive_failures
+            }
+
+    def _current_state(self, now: float) -> str:
+        if self._state == self.OPEN and now - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._half_open_in_flight = 0
+        return self._state
+
+
+# ==========================================
+# CONCURRENCIA ADAPTATIVA (AIMD)
+# ==========================================
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Límite de llamadas simultáneas con Additive Increase / Multiplicative Decrease.
+
+    - Éxito con latencia <= latency_target_s: límite += 1 / límite (≈ +1 por ventana)
+    - Error o latencia > latency_target_s: límite *= decrease_factor
+    """
+
+    def __init__(
+        self,
+        initial_limit: float = 4,
+        min_limit: int = 1,
+        max_limit: int = 16,
+        latency_target_s: Optional[float] = 60.0,
+        decrease_factor: float = 0.5
+    ):
+        """
+        Args:
+            initial_limit: Límite inicial de llamadas simultáneas
+            min_limit: Límite mínimo
+            max_limit: Límite máximo
+            latency_target_s: Latencia a partir de la cual se reduce el límite
+                (None = solo los errores reducen)
+            decrease_factor: Factor multiplicativo de reducción
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target_s = latency_target_s
+        self.decrease_factor = decrease_factor
+
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self.stats = {
+            "acquired": 0,
+            "increases": 0,
+            "decreases": 0,
+            "wait_time_total": 0.0
+        }
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None) -> Iterator[None]:
+        """
+        Context manager que ocupa un slot de concurrencia.
+
+        Raises:
+            LLMProviderUnavailableError: Si no se obtuvo slot antes de `timeout`
+        """
+        self.acquire(timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def acquire(self, timeout: Optional[float] = None) -> float:
+        start = time.monotonic()
+        with self._cond:
+            ok = self._cond.wait_for(lambda: self._in_flight < int(self._limit), timeout=timeout)
+            if not ok:
+                raise LLMProviderUnavailableError(
+                    f"Sin capacidad de concurrencia tras {timeout}s (límite actual {int(self._limit)})"
+                )
+            self._in_flight += 1
+            waited = time.monotonic() - start
+            self.stats["acquired"] += 1
+            self.stats["wait_time_total"] += waited
+            return waited
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._cond.notify()
+
+    def on_success(self, latency_s: float) -> None:
+        if self.latency_target_s is not None and latency_s > self.latency_target_s:
+            self.on_overload()
+            return
+        with self._cond:
+            if self._limit < self.max_limit:
+                self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+                self.stats["increases"] += 1
+            self._cond.notify_all()
+
+    def on_overload(self) -> None:
+        with self._cond:
+            new_limit = max(self.min_limit, self._limit * self.decrease_factor)
+            if new_limit < self._limit:
+                self.stats["decreases"] += 1
+            self._limit = new_limit
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                **self.stats,
+                "limit": round(self._limit, 2),
+                "in_flight": self._in_flight,
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit
+            }
+
+
+# ==========================================
+# REGISTROS COMPARTIDOS POR SERVIDOR
+# ==========================================
+
+_registry_lock = threading.Lock()
+_breakers: Dict[str, CircuitBreaker] = {}
+_limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+
+
+def get_circuit_breaker(key: str, **kwargs: Any) -> CircuitBreaker:
+    """
+    Circuit breaker compartido para un servidor (se crea en la primera llamada).
+
+    Args:
+        key: Identificador del servidor (ej: base_url de Ollama, "openai")
+        **kwargs: Parámetros de CircuitBreaker (solo se usan al crear)
+    """
+    with _registry_lock:
+        if key not in _breakers:
+            _breakers[key] = CircuitBreaker(key, **kwargs)
+        return _breakers[key]
+
+
+def get_concurrency_limiter(key: str, **kwargs: Any) -> AdaptiveConcurrencyLimiter:
+    """
+    Limitador de concurrencia adaptativo compartido para un servidor.
+
+    Args:
+        key: Identificador del servidor
+        **kwargs: Parámetros de AdaptiveConcurrencyLimiter (solo se usan al crear)
+    """
+    with _registry_lock:
+        if key not in _limiters:
+            _limiters[key] = AdaptiveConcurrencyLimiter(**kwargs)
+        return _limiters[key]
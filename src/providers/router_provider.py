@@ -0,0 +1,354 @@
+"""
+Router Provider - Enrutamiento local-first con desborde a la nube
+
+Implementa ILLMProvider sobre dos providers (típicamente OllamaProvider local y
+OpenAIProvider en la nube):
+
+- Local primero: mientras la cola local (llamadas en curso) y la latencia
+  reciente (EWMA) estén dentro de presupuesto y el circuito local no esté abierto
+- Desborde: si la cola local se satura, la latencia excede el presupuesto o el
+  servidor local no está disponible, el request se envía a la nube
+- Tamaño de tarea: prompts pequeños (clasificación, análisis de impacto) y
+  prompts largos (auditoría de calidad, evaluación SABG) pueden usar modelos
+  distintos en cada ruta
+- Métricas por ruta: llamadas, errores, desbordes, latencia y costo estimado
+
+Uso típico:
+    >>> router = LLMRouterProvider(
+    ...     local_provider=OllamaProvider(default_model="qwen2.5:3b"),
+    ...     cloud_provider=OpenAIProvider(api_key=...),
+    ...     local_models={"small": "qwen2.5:3b", "large": "qwen2.5:7b"},
+    ...     cloud_models={"small": "openai/gpt-4o-mini", "large": "openai/gpt-4o-mini"}
+    ... )
+    >>> validator = IntegratedValidator(normativa_fragments, llm_provider=router)
+"""
+
+import json
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import replace
+from typing import Any, Dict, Optional, Tuple
+
+from .rate_limiter import CHARS_PER_TOKEN
+from ..interfaces.llm_provider import (
+    LLMRequest,
+    LLMResponse,
+    LLMProviderError,
+    LLMProviderTimeoutError,
+    LLMProviderUnavailableError
+)
+
+
+LOCAL = "local"
+CLOUD = "cloud"
+SMALL = "small"
+LARGE = "large"
+
+# Costo por 1K tokens (USD) de entrada / salida por ruta. Local = 0 (infraestructura propia)
+DEFAULT_COST_PER_1K: Dict[str, Tuple[float, float]] = {
+    LOCAL: (0.0, 0.0),
+    CLOUD: (0.00015, 0.0006)  # gpt-4o-mini
+}
+
+
+class _RouteStats:
+    """Métricas acumuladas de una ruta (route/tamaño)"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.overflow = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost_usd = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "overflow": self.overflow,
+            "avg_latency_s": round(self.latency_total / self.calls, 3) if self.calls else 0.0,
+            "max_latency_s": round(self.latency_max, 3),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost_usd": round(self.cost_usd, 6)
+        }
+
+
+class LLMRouterProvider:
+    """
+    Provider que enruta cada request a un provider local o de nube.
+
+    El estado de la cola local se comparte entre hilos (validación en lote).
+    """
+
+    def __init__(
+        self,
+        local_provider: Any,
+        cloud_provider: Optional[Any] = None,
+        max_local_in_flight: int = 2,
+        local_latency_budget_s: float = 60.0,
+        small_task_max_tokens: int = 3000,
+        local_models: Optional[Dict[str, str]] = None,
+        cloud_models: Optional[Dict[str, str]] = None,
+        cost_per_1k_tokens: Optional[Dict[str, Tuple[float, float]]] = None,
+        latency_ewma_alpha: float = 0.3,
+        enable_logging: bool = True
+    ):
+        """
+        Args:
+            local_provider: Provider local (OllamaProvider)
+            cloud_provider: Provider de desborde (OpenAIProvider). None = solo local
+            max_local_in_flight: Llamadas simultáneas máximas en local antes de desbordar
+            local_latency_budget_s: Latencia local (EWMA) a partir de la cual se desborda
+            small_task_max_tokens: Tokens estimados (prompt + max_tokens) hasta los que
+                un request se considera tarea pequeña
+            local_models: Modelo local por tamaño {"small": ..., "large": ...}
+                (None/ausente = modelo por defecto del provider)
+            cloud_models: Modelo de nube por tamaño
+            cost_per_1k_tokens: Costo (entrada, salida) por 1K tokens por ruta
+            latency_ewma_alpha: Peso de la última latencia en el promedio móvil
+            enable_logging: Habilitar logging de decisiones de enrutamiento
+        """
+        self.local_provider = local_provider
+        self.cloud_provider = cloud_provider
+        self.max_local_in_flight = max(1, max_local_in_flight)
+        self.local_latency_budget_s = local_latency_budget_s
+        self.small_task_max_tokens = small_task_max_tokens
+        self.local_models = local_models or {}
+        self.cloud_models = cloud_models or {}
+        self.cost_per_1k_tokens = {**DEFAULT_COST_PER_1K, **(cost_per_1k_tokens or {})}
+        self.latency_ewma_alpha = latency_ewma_alpha
+        self.enable_logging = enable_logging
+
+        self._lock = threading.Lock()
+        self._local_in_flight = 0
+        self._local_latency_ewma: Optional[float] = None
+        self._local_latency_updated = 0.0
+        self._stats: Dict[str, _RouteStats] = {}
+
+    # ==========================================
+    # ILLMProvider
+    # ==========================================
+
+    def complete(self, request: LLMRequest) -> LLMResponse:
+        """
+        Genera una completion en la ruta seleccionada (con desborde a nube si local falla).
+
+        Raises:
+            LLMProviderError: Si la ruta elegida (y el desborde, si aplica) fallan
+        """
+        def call(provider: Any, routed: LLMRequest) -> Tuple[LLMResponse, int, int]:
+            response = provider.complete(routed)
+            tokens = response.tokens_used or {}
+            prompt_tokens = tokens.get("prompt") or self._estimate_prompt_tokens(routed)
+            completion_tokens = tokens.get("completion") or len(response.content) // CHARS_PER_TOKEN
+            return response, prompt_tokens, completion_tokens
+
+        response, route, size = self._dispatch(request, call)
+        response.metadata = {**(response.metadata or {}), "route": route, "task_size": size}
+        return response
+
+    def complete_json(self, request: LLMRequest) -> Dict[str, Any]:
+        """Genera una completion JSON en la ruta seleccionada"""
+        return self.complete_json_with_usage(request)[0]
+
+    def complete_json_with_usage(self, request: LLMRequest) -> Tuple[Dict[str, Any], Dict[str, int]]:
+        """
+        complete_json() en la ruta seleccionada, con los tokens usados.
+
+        Si el provider de la ruta no expone complete_json_with_usage() los tokens
+        se estiman por caracteres.
+        """
+        def call(provider: Any, routed: LLMRequest) -> Tuple[Tuple[Dict[str, Any], Dict[str, int]], int, int]:
+            if hasattr(provider, "complete_json_with_usage"):
+                result, tokens = provider.complete_json_with_usage(routed)
+                tokens = tokens or {}
+            else:
+                result, tokens = provider.complete_json(routed), {}
+            prompt_tokens = tokens.get("prompt") or self._estimate_prompt_tokens(routed)
+            completion_tokens = (tokens.get("completion")
+                                 or len(json.dumps(result, ensure_ascii=False)) // CHARS_PER_TOKEN)
+            usage = {"prompt": prompt_tokens, "completion": completion_tokens,
+                     "total": tokens.get("total") or prompt_tokens + completion_tokens}
+            return (result, usage), prompt_tokens, completion_tokens
+
+        (result, usage), _, _ = self._dispatch(request, call)
+        return result, usage
+
+    def get_model_info(self) -> Dict[str, Any]:
+        return {
+            "provider": "Router (local-first)",
+            "local": self.local_provider.get_model_info(),
+            "cloud": self.cloud_provider.get_model_info() if self.cloud_provider else None,
+            "max_local_in_flight": self.max_local_in_flight,
+            "local_latency_budget_s": self.local_latency_budget_s,
+            "small_task_max_tokens": self.small_task_max_tokens,
+            "local_models": self.local_models,
+            "cloud_models": self.cloud_models
+        }
+
+    def is_available(self) -> bool:
+        if self.local_provider.is_available():
+            return True
+        return bool(self.cloud_provider and self.cloud_provider.is_available())
+
+    def batch_session(self):
+        """
+        Context manager para lotes: delega en el provider local (pre-carga del modelo
+        pequeño y keep_alive). Sin soporte de residencia no hace nada.
+        """
+        session = getattr(self.local_provider, "batch_session", None)
+        return session(self.local_models.get("small")) if callable(session) else nullcontext()
+
+    def get_routing_stats(self) -> Dict[str, Any]:
+        """
+        Métricas por ruta ("local/small", "cloud/large", ...) y totales.
+
+        Returns:
+            Dict con "routes", "local_share", "overflow_rate", "cost_usd_total",
+            latencia local EWMA y cola local actual
+        """
+        with self._lock:
+            routes = {key: stats.to_dict() for key, stats in sorted(self._stats.items())}
+            in_flight = self._local_in_flight
+            ewma = self._local_latency_ewma
+
+        total_calls = sum(r["calls"] for r in routes.values())
+        local_calls = sum(r["calls"] for key, r in routes.items() if key.startswith(LOCAL))
+        overflow = sum(r["overflow"] for r in routes.values())
+
+        return {
+            "routes": routes,
+            "total_calls": total_calls,
+            "local_share": local_calls / total_calls if total_calls else 0.0,
+            "overflow_rate": overflow / total_calls if total_calls else 0.0,
+            "cost_usd_total": round(sum(r["cost_usd"] for r in routes.values()), 6),
+            "local_in_flight": in_flight,
+            "local_latency_ewma_s": round(ewma, 3) if ewma is not None else None
+        }
+
+    # ==========================================
+    # ENRUTAMIENTO
+    # ==========================================
+
+    def classify_task(self, request: LLMRequest) -> str:
+        """
+        Clasifica el request como tarea pequeña o grande.
+
+        request.metadata["task_size"] ("small"/"large") tiene prioridad; si no,
+        se usa el tamaño estimado (prompt + system + max_tokens).
+        """
+        hint = (request.metadata or {}).get("task_size")
+        if hint in (SMALL, LARGE):
+            return hint
+        estimated = self._estimate_prompt_tokens(request) + (request.max_tokens or 0)
+        return SMALL if estimated <= self.small_task_max_tokens else LARGE
+
+    def _select_route(self) -> Tuple[str, Optional[str]]:
+        """
+        Decide la ruta para el siguiente request según el estado local.
+
+        Si la ruta es local, reserva el lugar en la cola local en la misma sección
+        crítica (el llamador debe liberarlo).
+
+        Returns:
+            (ruta, motivo_de_desborde) — motivo es None si la ruta es local
+        """
+        if self.cloud_provider is not None:
+            breaker = getattr(self.local_provider, "circuit_breaker", None)
+            if breaker is not None and breaker.state == "open":
+                return CLOUD, "circuito local abierto"
+
+        with self._lock:
+            if self.cloud_provider is None:
+                self._local_in_flight += 1
+                return LOCAL, None
+
+            if self._local_in_flight >= self.max_local_in_flight:
+                return CLOUD, f"cola local saturada ({self._local_in_flight})"
+            # Una latencia alta sin llamadas locales recientes se olvida (permite volver a local)
+            if time.time() - self._local_latency_updated > self.local_latency_budget_s:
+                self._local_latency_ewma = None
+            if self._local_latency_ewma is not None and self._local_latency_ewma > self.local_latency_budget_s:
+                return CLOUD, f"latencia local {self._local_latency_ewma:.1f}s > {self.local_latency_budget_s:.0f}s"
+            self._local_in_flight += 1
+
+        return LOCAL, None
+
+    def _dispatch(self, request: LLMRequest, call) -> Tuple[Any, str, str]:
+        size = self.classify_task(request)
+        route, reason = self._select_route()
+
+        if route == LOCAL:
+            try:
+                result = self._run(LOCAL, size, request, call, overflow=False)
+                return result, LOCAL, size
+            except (LLMProviderUnavailableError, LLMProviderTimeoutError) as e:
+                if self.cloud_provider is None:
+                    raise
+                reason = f"local no disponible: {e}"
+
+        if self.enable_logging:
+            print(f"[Router] Desborde a nube ({size}): {reason}")
+        result = self._run(CLOUD, size, request, call, overflow=True)
+        return result, CLOUD, size
+
+    def _run(self, route: str, size: str, request: LLMRequest, call, overflow: bool) -> Any:
+        provider = self.local_provider if route == LOCAL else self.cloud_provider
+        models = self.local_models if route == LOCAL else self.cloud_models
+        routed = replace(request, model=models[size]) if models.get(size) else request
+        stats_key = f"{route}/{size}"
+
+        start = time.time()
+        try:
+            result, prompt_tokens, completion_tokens = call(provider, routed)
+        except LLMProviderError:
+            self._record(stats_key, route, time.time() - start, overflow, error=True)
+            raise
+        finally:
+            if route == LOCAL:
+                with self._lock:
+                    self._local_in_flight -= 1
+
+        self._record(stats_key, route, time.time() - start, overflow,
+                     prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        return result
+
+    def _record(
+        self,
+        stats_key: str,
+        route: str,
+        latency_s: float,
+        overflow: bool,
+        error: bool = False,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0
+    ) -> None:
+        cost_in, cost_out = self.cost_per_1k_tokens.get(route, (0.0, 0.0))
+        with self._lock:
+            stats = self._stats.setdefault(stats_key, _RouteStats())
+            stats.calls += 1
+            stats.overflow += int(overflow)
+            stats.latency_total += latency_s
+            stats.latency_max = max(stats.latency_max, latency_s)
+            if error:
+                stats.errors += 1
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+            stats.cost_usd += (prompt_tokens * cost_in + completion_tokens * cost_out) / 1000
+
+            if route == LOCAL and not error:
+                self._local_latency_updated = time.time()
+                if self._local_latency_ewma is None:
+                    self._local_latency_ewma = latency_s
+                else:
+                    a = self.latency_ewma_alpha
+                    self._local_latency_ewma = a * latency_s + (1 - a) * self._local_latency_ewma
+
+    @staticmethod
+    def _estimate_prompt_tokens(request: LLMRequest) -> int:
+        return (len(request.prompt or "") + len(request.system_message or "")) // CHARS_PER_TOKEN
@@ -3,5 +3,6 @@ Módulo de reportes y análisis de resultados en lote.
 """
 
 from .batch_reporter import BatchReporter
+from .streaming_aggregator import StreamingBatchAggregator
 
-__all__ = ['BatchReporter']
+__all__ = ['BatchReporter', 'StreamingBatchAggregator']
@@ -3,11 +3,13 @@ Generador de reportes consolidados para procesamiento en lote.
 Soporta múltiples formatos de salida (Excel, JSON, HTML).
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
 from pathlib import Path
 import json
 from datetime import datetime
 
+from .streaming_aggregator import StreamingBatchAggregator
+
 try:
     import pandas as pd
     PANDAS_AVAILABLE = True
@@ -35,6 +37,21 @@ class BatchReporter:
         """
         self.resultado = resultado_batch
 
+    def _iterar_resultados(self) -> Iterator[Dict[str, Any]]:
+        """Resultados por puesto (en modo streaming se leen del JSONL, sin cargarlos todos)"""
+        if hasattr(self.resultado, "iterar_resultados"):
+            return self.resultado.iterar_resultados()
+        return iter(self.resultado.resultados)
+
+    def _stats_por_nivel(self) -> Dict[str, Dict[str, int]]:
+        """Totales por nivel: del agregador del lote si existe, si no en una pasada"""
+        agregador = getattr(self.resultado, "agregador", None)
+        if agregador is None:
+            agregador = StreamingBatchAggregator()
+            for resultado in self._iterar_resultados():
+                agregador.agregar(resultado)
+        return agregador.get_estadisticas_por_nivel()
+
     def generar_reporte_excel(self, archivo: str):
         """
         Genera reporte completo en Excel con múltiples hojas.
@@ -108,7 +125,7 @@ class BatchReporter:
         """Genera hoja con detalle de cada puesto"""
         datos_detalle = []
 
-        for resultado in self.resultado.resultados:
+        for resultado in self._iterar_resultados():
             datos_detalle.append({
                 "Código": resultado.get("codigo", "N/A"),
                 "Denominación": resultado.get("denominacion", "N/A"),
@@ -126,7 +143,7 @@ class BatchReporter:
 
     def _generar_hoja_errores(self, writer):
         """Genera hoja con puestos que tuvieron errores"""
-        errores = [r for r in self.resultado.resultados if r.get("status") != "success"]
+        errores = [r for r in self._iterar_resultados() if r.get("status") != "success"]
 
         if not errores:
             # Crear hoja vacía con mensaje
@@ -148,25 +165,7 @@ class BatchReporter:
 
     def _generar_hoja_estadisticas_nivel(self, writer):
         """Genera hoja con estadísticas por nivel salarial"""
-        # Agrupar por nivel
-        stats_por_nivel = {}
-
-        for resultado in self.resultado.resultados:
-            nivel = resultado.get("nivel", "N/A")
-
-            if nivel not in stats_por_nivel:
-                stats_por_nivel[nivel] = {
-                    "total": 0,
-                    "exitosos": 0,
-                    "fallidos": 0
-                }
-
-            stats_por_nivel[nivel]["total"] += 1
-
-            if resultado.get("status") == "success":
-                stats_por_nivel[nivel]["exitosos"] += 1
-            else:
-                stats_por_nivel[nivel]["fallidos"] += 1
+        stats_por_nivel = self._stats_por_nivel()
 
         # Convertir a DataFrame
         datos_nivel = []
@@ -209,34 +208,13 @@ class BatchReporter:
         Calcula estadísticas agrupadas por nivel salarial.
 
         Returns:
-            Dict con estadísticas por nivel
+            Dict nivel → {total, exitosos, fallidos} (sin nivel = "N/A")
         """
-        stats_por_nivel = {}
-
-        for resultado in self.resultado.resultados:
-            nivel = resultado.get("nivel", "N/A")
-
-            if nivel not in stats_por_nivel:
-                stats_por_nivel[nivel] = {
-                    "total": 0,
-                    "exitosos": 0,
-                    "fallidos": 0,
-                    "puestos": []
-                }
-
-            stats_por_nivel[nivel]["total"] += 1
-            stats_por_nivel[nivel]["puestos"].append(resultado.get("codigo", "N/A"))
-
-            if resultado.get("status") == "success":
-                stats_por_nivel[nivel]["exitosos"] += 1
-            else:
-                stats_por_nivel[nivel]["fallidos"] += 1
-
-        return stats_por_nivel
+        return self._stats_por_nivel()
 
     def imprimir_estadisticas_por_nivel(self):
         """Imprime estadísticas por nivel en consola"""
-        stats = self.get_estadisticas_por_nivel()
+        stats = self._stats_por_nivel()
 
         print(f"\n{'='*70}")
         print("📊 ESTADÍSTICAS POR NIVEL SALARIAL")
@@ -0,0 +1,199 @@
+"""
+Agregación incremental de resultados de procesamiento en lote.
+
+En lotes grandes (decenas de miles de puestos) conservar cada resultado en una
+lista, incluyendo el payload anidado de "validacion", hace que la memoria crezca
+con el lote, y el consolidado y los reportes recorren esa lista varias veces.
+El StreamingBatchAggregator:
+
+- Escribe cada resultado como una línea JSON en un archivo (sink) al terminar
+- Mantiene contadores incrementales por status, nivel, UR, conversión y
+  resultado de validación
+- Conserva solo una muestra acotada de errores
+
+La memoria depende del número de niveles/URs distintos, no del tamaño del lote.
+Los resultados completos se vuelven a leer del sink bajo demanda
+(iterar_resultados).
+
+Fecha: 2025-11-12
+Versión: 5.43
+"""
+
+import json
+import threading
+from collections import Counter, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, Optional, Union
+
+SIN_DATO = "N/A"
+
+
+def _clave(valor: Any) -> str:
+    """Clave de agrupación estable (JSON solo admite claves str)"""
+    if valor is None or valor == "":
+        return SIN_DATO
+    return str(valor)
+
+
+class StreamingBatchAggregator:
+    """
+    Acumula estadísticas de un lote sin retener los resultados en memoria.
+
+    Thread-safe: el lote paralelo agrega resultados desde varios hilos.
+
+    Example:
+        >>> agregador = StreamingBatchAggregator("output/batch/resultados/run.jsonl")
+        >>> agregador.agregar({"codigo": "27-100-...", "status": "success", "nivel": "P11", ...})
+        >>> agregador.cerrar()
+        >>> agregador.get_estadisticas()["por_status"]
+        >>> for resultado in agregador.iterar_resultados(): ...
+    """
+
+    def __init__(self,
+                 sink_path: Optional[Union[str, Path]] = None,
+                 max_errores: int = 200):
+        """
+        Inicializa el agregador (el sink se sobrescribe si ya existe).
+
+        Args:
+            sink_path: Archivo JSONL donde se escriben los resultados (None = solo
+                estadísticas, sin conservar los resultados)
+            max_errores: Errores de muestra retenidos para reportes
+        """
+        self.sink_path = Path(sink_path) if sink_path else None
+        self.max_errores = max_errores
+
+        self._lock = threading.Lock()
+        self._sink = None
+        if self.sink_path is not None:
+            self.sink_path.parent.mkdir(parents=True, exist_ok=True)
+            self._sink = open(self.sink_path, 'w', encoding='utf-8')
+
+        self.total = 0
+        self.por_status: Counter = Counter()
+        self.por_conversion: Counter = Counter()
+        self.por_validacion: Counter = Counter()
+        self.por_nivel: Dict[str, Dict[str, int]] = {}
+        self.por_ur: Dict[str, Dict[str, int]] = {}
+        self.errores: Deque[Dict[str, Any]] = deque(maxlen=max_errores)
+
+    @property
+    def exitosos(self) -> int:
+        with self._lock:
+            return self.por_status.get("success", 0)
+
+    def agregar(self, resultado: Dict[str, Any]) -> None:
+        """
+        Registra el resultado de un puesto: lo escribe en el sink y actualiza contadores.
+
+        Args:
+            resultado: Dict del puesto (codigo, status, nivel, ur, validacion, ...)
+        """
+        linea = None
+        if self._sink is not None:
+            linea = json.dumps(resultado, ensure_ascii=False, default=str)
+
+        status = resultado.get("status") or "unknown"
+        exitoso = status == "success"
+
+        with self._lock:
+            if linea is not None:
+                if self._sink is None or self._sink.closed:
+                    raise ValueError("El agregador ya fue cerrado")
+                self._sink.write(linea + "\n")
+
+            self.total += 1
+            self.por_status[status] += 1
+            if resultado.get("conversion_status"):
+                self.por_conversion[str(resultado["conversion_status"])] += 1
+            self.por_validacion[self._estado_validacion(resultado)] += 1
+
+            for grupos, clave in ((self.por_nivel, _clave(resultado.get("nivel"))),
+                                  (self.por_ur, _clave(resultado.get("ur")))):
+                stats = grupos.setdefault(clave, {"total": 0, "exitosos": 0, "fallidos": 0})
+                stats["total"] += 1
+                stats["exitosos" if exitoso else "fallidos"] += 1
+
+            if not exitoso:
+                self.errores.append({
+                    "codigo": resultado.get("codigo", SIN_DATO),
+                    "status": status,
+                    "error": resultado.get("error", SIN_DATO)
+                })
+
+    def iterar_resultados(self) -> Iterator[Dict[str, Any]]:
+        """
+        Resultados escritos en el sink, leídos uno por uno.
+
+        Raises:
+            ValueError: Si el agregador no tiene sink
+        """
+        if self.sink_path is None:
+            raise ValueError("El agregador no tiene sink: los resultados no se conservaron")
+
+        with self._lock:
+            if self._sink is not None and not self._sink.closed:
+                self._sink.flush()
+
+        with open(self.sink_path, 'r', encoding='utf-8') as f:
+            for linea in f:
+                linea = linea.strip()
+                if linea:
+                    yield json.loads(linea)
+
+    def get_estadisticas_por_nivel(self) -> Dict[str, Dict[str, int]]:
+        """Estadísticas por nivel salarial (total, exitosos, fallidos)"""
+        with self._lock:
+            return {nivel: dict(stats) for nivel, stats in self.por_nivel.items()}
+
+    def get_estadisticas(self) -> Dict[str, Any]:
+        """
+        Estadísticas acumuladas del lote.
+
+        Returns:
+            Dict con totales y desgloses por status, nivel, UR, conversión y
+            validación, más la muestra de errores
+        """
+        with self._lock:
+            return {
+                "total": self.total,
+                "exitosos": self.por_status.get("success", 0),
+                "fallidos": self.total - self.por_status.get("success", 0),
+                "por_status": dict(self.por_status),
+                "por_nivel": {k: dict(v) for k, v in sorted(self.por_nivel.items())},
+                "por_ur": {k: dict(v) for k, v in sorted(self.por_ur.items())},
+                "por_conversion": dict(self.por_conversion),
+                "por_validacion": dict(self.por_validacion),
+                "errores_muestra": list(self.errores),
+                "resultados_jsonl": str(self.sink_path) if self.sink_path else None
+            }
+
+    def cerrar(self) -> None:
+        """Cierra el sink (las estadísticas y iterar_resultados siguen disponibles)"""
+        with self._lock:
+            if self._sink is not None and not self._sink.closed:
+                self._sink.close()
+
+    def __enter__(self) -> "StreamingBatchAggregator":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.cerrar()
+
+    # ==========================================
+    # MÉTODOS PRIVADOS
+    # ==========================================
+
+    @staticmethod
+    def _estado_validacion(resultado: Dict[str, Any]) -> str:
+        """Resultado de validación del puesto ("sin_validar" si no se validó)"""
+        validacion = resultado.get("validacion")
+        if not isinstance(validacion, dict):
+            return "sin_validar"
+        if "error" in validacion:
+            return "error"
+        # Modo directo: {"validacion": {"resultado": ...}}; modo documento: {"status": ...}
+        anidada = validacion.get("validacion")
+        if isinstance(anidada, dict) and anidada.get("resultado"):
+            return str(anidada["resultado"])
+        return str(validacion.get("status") or "unknown")
@@ -57,122 +57,10 @@ class AdvancedQualityValidator:
     - Detecta patrones globales y correlaciones
     """
 
-    def __init__(self, context: APFContext):
-        """
-        Inicializa el validador.
-
-        Args:
-            context: APFContext con API keys y configuración
-        """
-        self.context = context
-        logger.info("[AdvancedQualityValidator] Inicializado con análisis holístico v5.33")
-
-    def validate_puesto_completo(
-        self,
-        puesto_data: Dict[str, Any],
-        normativa_text: Optional[str] = None
-    ) -> QualityValidationResult:
-        """
-        Analiza el puesto COMPLETO y detecta todos los problemas de calidad.
-
-        Args:
-            puesto_data: Diccionario con datos completos del puesto
-                {
-                    "codigo": str,
-                    "denominacion": str,
-                    "nivel_salarial": str,
-                    "objetivo_general": str,
-                    "funciones": List[Dict]
-                }
-            normativa_text: Texto completo de normativa institucional (opcional)
-
-        Returns:
-            QualityValidationResult con todos los flags detectados
-        """
-        logger.info(f"[AdvancedQualityValidator] Analizando puesto {puesto_data.get('codigo', 'UNKNOWN')}")
-
-        # Construir prompt inteligente
-        prompt = self._build_analysis_prompt(puesto_data, normativa_text)
-
-        # Construir prompt completo con system message
-        full_prompt = """Eres un auditor experto de la Administración Pública Federal de México. Tu tarea es analizar puestos de trabajo y detectar problemas de calidad de manera exhaustiva y precisa.
-
-""" + prompt
-
-        # Llamar a LLM con robust_openai_call
-        try:
-            response = robust_openai_call(
-                prompt=full_prompt,
-                temperature=0.1,  # Baja para consistencia
-                max_tokens=3000,  # Aumentar para respuesta JSON completa
-                context=self.context
-            )
-
-            # Parsear respuesta de robust_openai_call
-            if response.get("status") == "success":
-                result_dict = response.get("data")
-                # Convertir a dataclass
-                return self._parse_llm_response(result_dict)
-            else:
-                # Error en la llamada LLM
-                error_msg = response.get("error", "Error desconocido")
-                logger.error(f"[AdvancedQualityValidator] Error en llamada LLM: {error_msg}")
-                raise Exception(f"Error en llamada LLM: {error_msg}")
-
-        except Exception as e:
-            logger.error(f"[AdvancedQualityValidator] Error en análisis: {e}")
-            # Retornar resultado vacío en caso de error
-            return QualityValidationResult(
-                duplicacion={"tiene_duplicados": False, "total_duplicados": 0, "pares_duplicados": []},
-                malformacion={"tiene_malformadas": False, "total_malformadas": 0, "funciones_problematicas": []},
-                marco_legal={"tiene_problemas": False, "total_problemas": 0, "problemas": []},
-                objetivo_general={"es_adecuado": True, "calificacion": 1.0, "problemas": []},
-                total_flags=0,
-                flags_critical=0,
-                flags_high=0,
-                flags_moderate=0,
-                flags_low=0
-            )
-
-    def _build_analysis_prompt(self, puesto_data: Dict[str, Any], normativa_text: Optional[str]) -> str:
-        """Construye el prompt de análisis holístico"""
-
-        codigo = puesto_data.get("codigo", "N/A")
-        denominacion = puesto_data.get("denominacion", "N/A")
-        nivel = puesto_data.get("nivel_salarial", "N/A")
-        objetivo = puesto_data.get("objetivo_general", "")
-        funciones = puesto_data.get("funciones", [])
-
-        # Preparar lista de funciones para análisis
-        funciones_text = ""
-        for i, func in enumerate(funciones, 1):
-            desc = func.get("descripcion_completa", func.get("descripcion", ""))
-            verbo = func.get("verbo_accion", "")
-            funciones_text += f"{i}. [{verbo}] {desc}\n"
-
-        # Preparar contexto normativo (si existe)
-        normativa_context = ""
-        if normativa_text:
-            # Truncar normativa a ~2000 chars para no exceder tokens
-            normativa_context = f"\n**NORMATIVA INSTITUCIONAL:**\n{normativa_text[:2000]}\n"
-
-        prompt = f"""
-Analiza EXHAUSTIVAMENTE este puesto de trabajo de la Administración Pública Federal y detecta TODOS los problemas de calidad.
-
-════════════════════════════════════════════════════════════════════════════════
-📋 DATOS DEL PUESTO
-════════════════════════════════════════════════════════════════════════════════
-
-**Código:** {codigo}
-**Denominación:** {denominacion}
-**Nivel Salarial:** {nivel}
-
-**OBJETIVO GENERAL:**
-{objetivo}
-
-**FUNCIONES ({len(funciones)} total):**
-{funciones_text}
-{normativa_context}
+    # Prefijo estático (v5.43): instrucciones + formato de respuesta van en el system
+    # message, idéntico para todos los puestos, para reutilizar la caché de prompt
+    # (KV cache) del modelo local. Los datos del puesto van al final (sufijo variable).
+    SYSTEM_PROMPT = """Eres un auditor experto de la Administración Pública Federal de México. Tu tarea es analizar puestos de trabajo y detectar problemas de calidad de manera exhaustiva y precisa.
 
 ════════════════════════════════════════════════════════════════════════════════
 🔍 INSTRUCCIONES DE ANÁLISIS
@@ -225,62 +113,62 @@ Sé TOLERANTE con objetivos de 200-700 caracteres si están bien estructurados y
 
 Retorna un JSON con la siguiente estructura EXACTA:
 
-{{
-  "duplicacion": {{
+{
+  "duplicacion": {
     "tiene_duplicados": boolean,
     "total_duplicados": int,
     "pares_duplicados": [
-      {{
+      {
         "funcion_1_id": int,
         "funcion_2_id": int,
         "similitud_porcentaje": int (0-100),
         "descripcion": "string explicando POR QUÉ son similares",
         "sugerencia": "string con recomendación"
-      }}
+      }
     ]
-  }},
-  "malformacion": {{
+  },
+  "malformacion": {
     "tiene_malformadas": boolean,
     "total_malformadas": int,
     "funciones_problematicas": [
-      {{
+      {
         "funcion_id": int,
         "problemas": [
-          {{
+          {
             "tipo": "string (VACIA|PLACEHOLDER|MUY_CORTA|SIN_VERBO|SIN_COMPLEMENTO|SIN_RESULTADO|SIN_SENTIDO)",
             "severidad": "string (CRITICAL|HIGH|MODERATE|LOW)",
             "descripcion": "string explicando el problema",
             "texto_problematico": "string con fragmento del texto (max 100 chars)"
-          }}
+          }
         ]
-      }}
+      }
     ]
-  }},
-  "marco_legal": {{
+  },
+  "marco_legal": {
     "tiene_problemas": boolean,
     "total_problemas": int,
     "problemas": [
-      {{
+      {
         "tipo": "string (ORGANISMO_EXTINTO|LEY_OBSOLETA|REFERENCIA_INVALIDA|INCONSISTENCIA)",
         "severidad": "string (CRITICAL|HIGH|MODERATE|LOW)",
         "descripcion": "string explicando el problema detectado",
         "referencia_problematica": "string con texto específico",
         "sugerencia": "string con recomendación de corrección"
-      }}
+      }
     ]
-  }},
-  "objetivo_general": {{
+  },
+  "objetivo_general": {
     "es_adecuado": boolean,
     "calificacion": float (0.0-1.0),
     "problemas": [
-      {{
+      {
         "tipo": "string (MUY_CORTO|MUY_LARGO|SIN_VERBO|SIN_FINALIDAD|GENERICO|INCOHERENTE)",
         "severidad": "string (CRITICAL|HIGH|MODERATE|LOW)",
         "descripcion": "string explicando el problema"
-      }}
+      }
     ]
-  }}
-}}
+  }
+}
 
 ════════════════════════════════════════════════════════════════════════════════
 ⚠️ IMPORTANTE
@@ -312,6 +200,120 @@ Si NO encuentras problemas en alguna categoría, retorna arrays vacíos:
 RETORNA ÚNICAMENTE UN OBJETO JSON VÁLIDO CON LA ESTRUCTURA ESPECIFICADA ARRIBA.
 NO incluyas texto adicional, comentarios, ni markdown.
 SOLO el JSON puro.
+"""
+
+    def __init__(self, context: APFContext):
+        """
+        Inicializa el validador.
+
+        Args:
+            context: APFContext con API keys y configuración
+        """
+        self.context = context
+        logger.info("[AdvancedQualityValidator] Inicializado con análisis holístico v5.33")
+
+    def validate_puesto_completo(
+        self,
+        puesto_data: Dict[str, Any],
+        normativa_text: Optional[str] = None
+    ) -> QualityValidationResult:
+        """
+        Analiza el puesto COMPLETO y detecta todos los problemas de calidad.
+
+        Args:
+            puesto_data: Diccionario con datos completos del puesto
+                {
+                    "codigo": str,
+                    "denominacion": str,
+                    "nivel_salarial": str,
+                    "objetivo_general": str,
+                    "funciones": List[Dict]
+                }
+            normativa_text: Texto completo de normativa institucional (opcional)
+
+        Returns:
+            QualityValidationResult con todos los flags detectados
+        """
+        logger.info(f"[AdvancedQualityValidator] Analizando puesto {puesto_data.get('codigo', 'UNKNOWN')}")
+
+        # Construir prompt inteligente
+        prompt = self._build_analysis_prompt(puesto_data, normativa_text)
+
+        # Llamar a LLM con robust_openai_call (system estático + datos variables)
+        try:
+            response = robust_openai_call(
+                prompt=prompt,
+                system_message=self.SYSTEM_PROMPT,
+                temperature=0.1,  # Baja para consistencia
+                max_tokens=3000,  # Aumentar para respuesta JSON completa
+                context=self.context
+            )
+
+            # Parsear respuesta de robust_openai_call
+            if response.get("status") == "success":
+                result_dict = response.get("data")
+                # Convertir a dataclass
+                return self._parse_llm_response(result_dict)
+            else:
+                # Error en la llamada LLM
+                error_msg = response.get("error", "Error desconocido")
+                logger.error(f"[AdvancedQualityValidator] Error en llamada LLM: {error_msg}")
+                raise Exception(f"Error en llamada LLM: {error_msg}")
+
+        except Exception as e:
+            logger.error(f"[AdvancedQualityValidator] Error en análisis: {e}")
+            # Retornar resultado vacío en caso de error
+            return QualityValidationResult(
+                duplicacion={"tiene_duplicados": False, "total_duplicados": 0, "pares_duplicados": []},
+                malformacion={"tiene_malformadas": False, "total_malformadas": 0, "funciones_problematicas": []},
+                marco_legal={"tiene_problemas": False, "total_problemas": 0, "problemas": []},
+                objetivo_general={"es_adecuado": True, "calificacion": 1.0, "problemas": []},
+                total_flags=0,
+                flags_critical=0,
+                flags_high=0,
+                flags_moderate=0,
+                flags_low=0
+            )
+
+    def _build_analysis_prompt(self, puesto_data: Dict[str, Any], normativa_text: Optional[str]) -> str:
+        """Construye el prompt de análisis holístico"""
+
+        codigo = puesto_data.get("codigo", "N/A")
+        denominacion = puesto_data.get("denominacion", "N/A")
+        nivel = puesto_data.get("nivel_salarial", "N/A")
+        objetivo = puesto_data.get("objetivo_general", "")
+        funciones = puesto_data.get("funciones", [])
+
+        # Preparar lista de funciones para análisis
+        funciones_text = ""
+        for i, func in enumerate(funciones, 1):
+            desc = func.get("descripcion_completa", func.get("descripcion", ""))
+            verbo = func.get("verbo_accion", "")
+            funciones_text += f"{i}. [{verbo}] {desc}\n"
+
+        # Preparar contexto normativo (si existe)
+        normativa_context = ""
+        if normativa_text:
+            # Truncar normativa a ~2000 chars para no exceder tokens
+            normativa_context = f"\n**NORMATIVA INSTITUCIONAL:**\n{normativa_text[:2000]}\n"
+
+        prompt = f"""
+Analiza EXHAUSTIVAMENTE este puesto de trabajo de la Administración Pública Federal y detecta TODOS los problemas de calidad.
+
+════════════════════════════════════════════════════════════════════════════════
+📋 DATOS DEL PUESTO
+════════════════════════════════════════════════════════════════════════════════
+
+**Código:** {codigo}
+**Denominación:** {denominacion}
+**Nivel Salarial:** {nivel}
+
+**OBJETIVO GENERAL:**
+{objetivo}
+
+**FUNCIONES ({len(funciones)} total):**
+{funciones_text}
+{normativa_context}
 
 Procede con el análisis:
 """
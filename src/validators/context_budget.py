@@ -0,0 +1,305 @@
+"""
+Presupuesto de Tokens para Contexto Normativo
+
+Ensambla el contexto normativo de los prompts con un presupuesto de tokens por
+modelo, en lugar de pegar fragmentos con cortes fijos de caracteres:
+
+1. Ordena la evidencia por relevancia (confidence_score)
+2. Descarta fragmentos duplicados o que se traslapan con uno ya incluido
+3. Recorta cada fragmento a un máximo de tokens (en frontera de oración/palabra)
+4. Empaqueta fragmentos hasta agotar el presupuesto
+
+El conteo usa el tokenizer del modelo cuando está disponible (tiktoken para
+modelos OpenAI, tokenizer de HuggingFace en caché local para modelos Ollama) y
+cae a la aproximación de 4 caracteres por token.
+
+En modelos locales el tiempo de procesamiento del prompt escala linealmente con
+su longitud, por lo que el presupuesto controla directamente la latencia.
+
+Fecha: 2025-11-12
+Versión: 5.43
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+try:
+    from transformers import AutoTokenizer
+    TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    TRANSFORMERS_AVAILABLE = False
+
+
+CHARS_PER_TOKEN = 4
+
+# Presupuesto de tokens de contexto normativo por modelo (prefijo del nombre)
+MODEL_CONTEXT_BUDGETS: Dict[str, int] = {
+    "phi3.5": 1200,
+    "llama3.2": 1200,
+    "qwen2.5:3b": 1500,
+    "qwen2.5:7b": 2500,
+    "gpt-4o-mini": 4000,
+    "gpt-4o": 4000
+}
+DEFAULT_CONTEXT_BUDGET = 2000
+
+# Tokenizers de HuggingFace por familia de modelo Ollama (solo si están en caché local)
+HF_TOKENIZERS: Dict[str, str] = {
+    "qwen2.5": "Qwen/Qwen2.5-3B-Instruct",
+    "phi3.5": "microsoft/Phi-3.5-mini-instruct",
+    "llama3.2": "meta-llama/Llama-3.2-3B-Instruct"
+}
+
+
+def _normalize_model(model: Optional[str]) -> str:
+    model = (model or "").lower()
+    for prefix in ("ollama/", "openai/"):
+        if model.startswith(prefix):
+            model = model[len(prefix):]
+    return model
+
+
+def get_context_budget(model: Optional[str]) -> int:
+    """
+    Presupuesto de tokens de contexto normativo para un modelo.
+
+    Se usa la entrada con el prefijo más largo que coincida (ej: "qwen2.5:3b-instruct"
+    → "qwen2.5:3b").
+    """
+    name = _normalize_model(model)
+    matches = [key for key in MODEL_CONTEXT_BUDGETS if name.startswith(key)]
+    if not matches:
+        return DEFAULT_CONTEXT_BUDGET
+    return MODEL_CONTEXT_BUDGETS[max(matches, key=len)]
+
+
+class TokenCounter:
+    """Cuenta tokens con el tokenizer del modelo o aproximación por caracteres"""
+
+    def __init__(self, model: Optional[str] = None):
+        self.model = _normalize_model(model)
+        self.backend = "chars"
+        self._encode: Optional[Callable[[str], List[int]]] = None
+
+        family = self.model.split(":")[0]
+        if TRANSFORMERS_AVAILABLE and family in HF_TOKENIZERS:
+            try:
+                tokenizer = AutoTokenizer.from_pretrained(HF_TOKENIZERS[family], local_files_only=True)
+                self._encode = lambda text: tokenizer.encode(text, add_special_tokens=False)
+                self.backend = f"hf:{HF_TOKENIZERS[family]}"
+            except Exception:
+                self._encode = None
+
+        if self._encode is None and TIKTOKEN_AVAILABLE:
+            try:
+                try:
+                    encoding = tiktoken.encoding_for_model(self.model)
+                except KeyError:
+                    # Modelos no OpenAI: cl100k_base es una aproximación razonable de BPE
+                    encoding = tiktoken.get_encoding("cl100k_base")
+                self._encode = encoding.encode
+                self.backend = f"tiktoken:{encoding.name}"
+            except Exception:
+                self._encode = None
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._encode is not None:
+            return len(self._encode(text))
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+@lru_cache(maxsize=16)
+def get_token_counter(model: Optional[str] = None) -> TokenCounter:
+    """TokenCounter por modelo (cacheado: cargar un tokenizer es costoso)"""
+    counter = TokenCounter(model)
+    logger.info(f"[ContextBudget] Conteo de tokens para '{model or 'default'}': {counter.backend}")
+    return counter
+
+
+@dataclass
+class AssembledContext:
+    """Contexto normativo ensamblado y contabilidad de tokens"""
+    text: str
+    tokens_used: int
+    budget_tokens: int
+    included: int
+    dropped_duplicates: int = 0
+    dropped_budget: int = 0
+    included_scores: List[float] = field(default_factory=list)
+
+
+class NormativaContextAssembler:
+    """
+    Ensambla evidencia normativa dentro de un presupuesto de tokens.
+
+    Example:
+        >>> assembler = NormativaContextAssembler(context=apf_context)
+        >>> ctx = assembler.assemble(loader.semantic_search(query, max_results=15))
+        >>> prompt = f"...{ctx.text}..."
+    """
+
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        context: Any = None,
+        budget_tokens: Optional[int] = None,
+        max_snippet_tokens: int = 300,
+        overlap_threshold: float = 0.6
+    ):
+        """
+        Args:
+            model: Modelo destino (para tokenizer y presupuesto). Si es None se toma
+                el default_model del llm_provider del contexto en cada llamada
+            context: APFContext (opcional) de donde resolver el modelo y el presupuesto
+                configurado ('normativa_context_tokens')
+            budget_tokens: Presupuesto fijo (None = contexto o MODEL_CONTEXT_BUDGETS del modelo)
+            max_snippet_tokens: Máximo de tokens por fragmento
+            overlap_threshold: Fracción de palabras compartidas (sobre el fragmento más
+                corto) a partir de la cual dos fragmentos se consideran duplicados
+        """
+        self.model = model
+        self.context = context
+        self.budget_tokens = budget_tokens
+        self.max_snippet_tokens = max_snippet_tokens
+        self.overlap_threshold = overlap_threshold
+
+    def resolve_model(self) -> Optional[str]:
+        if self.model:
+            return self.model
+        if self.context is not None:
+            provider = self.context.get_data("llm_provider")
+            return getattr(provider, "default_model", None) if provider else None
+        return None
+
+    def resolve_budget(self, model: Optional[str]) -> int:
+        if self.budget_tokens:
+            return self.budget_tokens
+        if self.context is not None:
+            configured = self.context.get_data("normativa_context_tokens")
+            if configured:
+                return int(configured)
+        return get_context_budget(model)
+
+    def assemble(
+        self,
+        matches: List[Any],
+        header: str = "FRAGMENTOS NORMATIVOS RELEVANTES:\n",
+        budget_tokens: Optional[int] = None,
+        text_getter: Optional[Callable[[Any], str]] = None,
+        empty_text: str = "No se encontraron fragmentos normativos relevantes."
+    ) -> AssembledContext:
+        """
+        Empaqueta los fragmentos más relevantes dentro del presupuesto.
+
+        Args:
+            matches: Resultados de semantic_search (SemanticMatch o similar con
+                content_snippet y confidence_score)
+            header: Encabezado del bloque (cuenta contra el presupuesto)
+            budget_tokens: Presupuesto para esta llamada (prioridad sobre el del constructor)
+            text_getter: Función que obtiene el texto de un match (default: content_snippet)
+            empty_text: Texto si no hay fragmentos
+
+        Returns:
+            AssembledContext
+        """
+        model = self.resolve_model()
+        counter = get_token_counter(model)
+        budget = budget_tokens or self.resolve_budget(model)
+
+        if not matches:
+            return AssembledContext(text=empty_text, tokens_used=counter.count(empty_text),
+                                    budget_tokens=budget, included=0)
+
+        get_text = text_getter or (lambda m: m.content_snippet)
+        ranked = sorted(matches, key=lambda m: getattr(m, "confidence_score", 0.0), reverse=True)
+
+        parts = [header]
+        used = counter.count(header)
+        selected_words: List[set] = []
+        included_scores: List[float] = []
+        dropped_duplicates = dropped_budget = 0
+
+        for match in ranked:
+            text = (get_text(match) or "").strip()
+            if not text:
+                continue
+
+            words = set(re.findall(r"\w+", text.lower()))
+            if self._is_duplicate(words, selected_words):
+                dropped_duplicates += 1
+                continue
+
+            snippet = self._truncate(text, counter)
+            score = getattr(match, "confidence_score", 0.0)
+            entry = f"\n[Fragmento {len(included_scores) + 1}] (Relevancia: {score:.2f})\n{snippet}\n"
+            entry_tokens = counter.count(entry)
+
+            if used + entry_tokens > budget:
+                dropped_budget += 1
+                continue  # Un fragmento posterior más corto aún puede caber
+
+            parts.append(entry)
+            used += entry_tokens
+            selected_words.append(words)
+            included_scores.append(score)
+
+        if not included_scores:
+            return AssembledContext(text=empty_text, tokens_used=counter.count(empty_text),
+                                    budget_tokens=budget, included=0,
+                                    dropped_duplicates=dropped_duplicates, dropped_budget=dropped_budget)
+
+        logger.debug(
+            f"[ContextBudget] {len(included_scores)} fragmentos, {used}/{budget} tokens "
+            f"(duplicados: {dropped_duplicates}, fuera de presupuesto: {dropped_budget})"
+        )
+
+        return AssembledContext(
+            text="".join(parts),
+            tokens_used=used,
+            budget_tokens=budget,
+            included=len(included_scores),
+            dropped_duplicates=dropped_duplicates,
+            dropped_budget=dropped_budget,
+            included_scores=included_scores
+        )
+
+    # ==========================================
+    # MÉTODOS PRIVADOS
+    # ==========================================
+
+    def _is_duplicate(self, words: set, selected: List[set]) -> bool:
+        if not words:
+            return True
+        for other in selected:
+            shared = len(words & other)
+            if shared / min(len(words), len(other)) >= self.overlap_threshold:
+                return True
+        return False
+
+    def _truncate(self, text: str, counter: TokenCounter) -> str:
+        tokens = counter.count(text)
+        if tokens <= self.max_snippet_tokens:
+            return text
+
+        # Recorte proporcional en caracteres, luego frontera de oración o palabra
+        cut = int(len(text) * self.max_snippet_tokens / tokens)
+        truncated = text[:cut]
+        boundary = truncated.rfind(". ")
+        if boundary < cut * 0.6:
+            boundary = truncated.rfind(" ")
+        if boundary > 0:
+            truncated = truncated[:boundary + 1]
+        return truncated.rstrip() + " [...]"
@@ -24,6 +24,7 @@ from src.validators.shared_utilities import (
     APFContext, robust_openai_call, VERB_HIERARCHY, WEAK_VERBS,
     LOGGING_CONFIG
 )
+from src.validators.context_budget import NormativaContextAssembler
 
 # ==========================================
 # CONFIGURACIÓN
@@ -128,6 +129,8 @@ class ContextualVerbValidator:
         self.normativa_loader = normativa_loader
         self.context = context or APFContext()
         self.validation_mode = VALIDATION_CONFIG["validation_mode"]
+        # Chunks completos (~1500 caracteres) dentro del presupuesto de tokens (v5.43)
+        self.context_assembler = NormativaContextAssembler(context=self.context, max_snippet_tokens=375)
 
     def set_validation_mode(self, mode: str):
         """Cambia el modo de validación"""
@@ -570,6 +573,7 @@ RESPONDE EN JSON:
 
         # Segundo: contenido relevante mediante búsqueda semántica
         content_chunks = []
+        relevant_content = None
         if search_query:
             # Buscar chunks relevantes usando semantic search
             try:
@@ -579,16 +583,13 @@ RESPONDE EN JSON:
                     use_cache=True
                 )
 
-                for i, match in enumerate(search_results, 1):
-                    # Obtener contenido completo del chunk, no solo snippet
-                    doc = self.normativa_loader.documents.get(match.document_id)
-                    if doc and hasattr(doc, 'semantic_chunks'):
-                        chunk_idx = match.position_info.get('chunk_index', 0)
-                        if chunk_idx < len(doc.semantic_chunks):
-                            full_chunk = doc.semantic_chunks[chunk_idx]
-                            content_chunks.append(
-                                f"[Fragmento {i} - Similitud: {match.confidence_score:.2f}]\n{full_chunk[:1500]}"
-                            )
+                assembled = self.context_assembler.assemble(
+                    search_results or [],
+                    header="CONTENIDO NORMATIVO RELEVANTE:\n",
+                    text_getter=self._full_chunk_text
+                )
+                if assembled.included:
+                    relevant_content = assembled.text
             except Exception as e:
                 print(f"⚠️ Error en búsqueda semántica de contexto: {e}")
                 # Fallback mejorado: tomar múltiples chunks iniciales de cada documento
@@ -601,7 +602,9 @@ RESPONDE EN JSON:
         # Construir resumen completo
         result = f"DOCUMENTOS NORMATIVOS CARGADOS:\n{metadata}\n\n"
 
-        if content_chunks:
+        if relevant_content:
+            result += relevant_content
+        elif content_chunks:
             result += "CONTENIDO NORMATIVO RELEVANTE:\n"
             result += "\n\n".join(content_chunks)
         else:
@@ -609,6 +612,15 @@ RESPONDE EN JSON:
 
         return result
 
+    def _full_chunk_text(self, match) -> str:
+        """Contenido completo del chunk de un match (no solo el snippet)"""
+        doc = self.normativa_loader.documents.get(match.document_id)
+        if doc and hasattr(doc, 'semantic_chunks'):
+            chunk_idx = match.position_info.get('chunk_index', 0)
+            if chunk_idx < len(doc.semantic_chunks):
+                return doc.semantic_chunks[chunk_idx]
+        return match.content_snippet
+
     def _get_relevant_normativa_chunks(self, function_text: str, max_chunks: int = 3) -> str:
         """Obtiene chunks de normativa relevantes para una función"""
         if not self.normativa_loader or not hasattr(self.normativa_loader, 'documents'):
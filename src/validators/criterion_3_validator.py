@@ -71,7 +71,8 @@ class Criterion3Validator:
         threshold: float = 0.50,
         context: Optional[APFContext] = None,
         use_llm: bool = True,
-        use_dynamic_threshold: bool = True
+        use_dynamic_threshold: bool = True,
+        batch_llm_analysis: bool = False
     ):
         """
         Inicializa el validador.
@@ -82,12 +83,18 @@ class Criterion3Validator:
             context: APFContext con API keys (requerido si use_llm=True)
             use_llm: Si True, usa LLM para análisis de impacto y búsqueda normativa
             use_dynamic_threshold: Si True, ajusta threshold según nivel jerárquico
+            batch_llm_analysis: Si True, analiza el impacto de todas las funciones del
+                puesto en una sola llamada LLM (v5.43). La respuesta pide hasta
+                200 + 250 tokens por función (máx. 6000): con Ollama requiere un contexto
+                fijo suficiente (OLLAMA_NUM_CTX); si no cabe, las funciones faltantes
+                usan el análisis de respaldo
         """
         self.normativa_fragments = normativa_fragments or []
         self.base_threshold = threshold
         self.use_dynamic_threshold = use_dynamic_threshold
         self.analyzer = ImpactAnalyzer()  # Mantener como fallback
         self.use_llm = use_llm
+        self.batch_llm_analysis = batch_llm_analysis
         self.llm_validator = None
 
         if use_llm:
@@ -196,11 +203,21 @@ class Criterion3Validator:
         critical_count = 0
         moderate_count = 0
 
-        for func in funciones:
+        # Análisis de impacto LLM de todas las funciones en una sola llamada (v5.43)
+        llm_analyses = [None] * len(funciones)
+        if self.use_llm and self.llm_validator and self.batch_llm_analysis and funciones:
+            llm_analyses = self.llm_validator.analyze_functions_impact(
+                [self._build_function_text(func) for func in funciones],
+                nivel_salarial,
+                expected_impact
+            )
+
+        for func, llm_analysis in zip(funciones, llm_analyses):
             analysis = self._analyze_function(
                 func,
                 nivel_salarial,
-                expected_impact
+                expected_impact,
+                llm_analysis=llm_analysis
             )
             function_analyses.append(analysis)
 
@@ -256,7 +273,8 @@ class Criterion3Validator:
         self,
         func: Dict[str, Any],
         nivel: str,
-        expected_impact: Dict[str, str]
+        expected_impact: Dict[str, str],
+        llm_analysis: Optional[Any] = None
     ) -> FunctionImpactAnalysis:
         """
         Analiza una función individual (CON o SIN LLM).
@@ -265,6 +283,8 @@ class Criterion3Validator:
             func: Diccionario con la función
             nivel: Nivel salarial
             expected_impact: Perfil de impacto esperado
+            llm_analysis: LLMImpactAnalysis precalculado (modo por lotes); si es None
+                y el LLM está habilitado, se analiza la función individualmente
 
         Returns:
             FunctionImpactAnalysis
@@ -273,7 +293,7 @@ class Criterion3Validator:
         descripcion = func.get("descripcion_completa", "")
         que_hace = func.get("que_hace", "")
         para_que = func.get("para_que_lo_hace", "")
-        funcion_text = f"{descripcion} {que_hace} {para_que}".strip()
+        funcion_text = self._build_function_text(func)
 
         # 1. Extraer verbo principal
         verbo = self.analyzer.extract_main_verb(que_hace)
@@ -285,12 +305,17 @@ class Criterion3Validator:
         # 3. Analizar impacto (CON LLM si está disponible)
         if self.use_llm and self.llm_validator:
             logger.debug(f"[Criterio 3] Analizando función {func_id} CON LLM")
-            llm_analysis = self.llm_validator.analyze_function_impact(
-                funcion_text,
-                nivel,
-                expected_impact
-            )
+            if llm_analysis is None:
+                llm_analysis = self.llm_validator.analyze_function_impact(
+                    funcion_text,
+                    nivel,
+                    expected_impact
+                )
+            if llm_analysis.degraded:
+                # LLM no disponible (circuito abierto, timeout): degradar a reglas
+                logger.warning(f"[Criterio 3] F{func_id} - LLM no disponible, análisis de impacto por reglas")
 
+        if self.use_llm and self.llm_validator and not llm_analysis.degraded:
             # Usar resultados del LLM
             impact_scope = llm_analysis.scope_level
             impact_consequences = llm_analysis.consequences_level
@@ -359,7 +384,23 @@ class Criterion3Validator:
                     discrepancy_desc
                 )
 
-                if llm_backing.has_backing and llm_backing.relevance_score >= 0.7:
+                if llm_backing.degraded:
+                    # LLM no disponible: degradar a búsqueda por reglas (como la rama sin LLM)
+                    backing_found = self._search_normative_backing(descripcion, que_hace, para_que)
+
+                    if backing_found:
+                        severity = ValidationSeverity.MODERATE
+                        normative_backing = backing_found
+                        logger.debug(
+                            f"[Criterio 3] Función {func_id}: Discrepancia MODERATE (con respaldo reglas, LLM no disponible)"
+                        )
+                    else:
+                        severity = ValidationSeverity.CRITICAL
+                        issue_detected = discrepancy_desc
+                        logger.debug(
+                            f"[Criterio 3] Función {func_id}: Discrepancia CRITICAL (sin respaldo, LLM no disponible) - {issue_detected}"
+                        )
+                elif llm_backing.has_backing and llm_backing.relevance_score >= 0.7:
                     # CON respaldo → MODERATE
                     severity = ValidationSeverity.MODERATE
                     normative_backing = llm_backing.backing_text
@@ -417,6 +458,14 @@ class Criterion3Validator:
             issue_detected=issue_detected
         )
 
+    @staticmethod
+    def _build_function_text(func: Dict[str, Any]) -> str:
+        """Texto completo de la función (descripción + qué hace + para qué)"""
+        descripcion = func.get("descripcion_completa", "")
+        que_hace = func.get("que_hace", "")
+        para_que = func.get("para_que_lo_hace", "")
+        return f"{descripcion} {que_hace} {para_que}".strip()
+
     def _search_normative_backing(
         self,
         descripcion: str,
@@ -0,0 +1,262 @@
+"""
+Pre-evaluación de Funciones por Reglas/Embeddings (Tiering de Modelos)
+
+Primer nivel barato antes de la evaluación LLM del Protocolo SABG (Criterio 1).
+Muchas funciones son inequívocas: el verbo está en VERB_HIERARCHY[nivel]
+['appropriate_verbs'], la redacción tiene VERBO + COMPLEMENTO + RESULTADO y la
+búsqueda semántica encuentra un fragmento normativo con alta similitud. Para esos
+casos se construye el FunctionEvaluationResult sin llamar al LLM; las funciones
+ambiguas se escalan a FunctionSemanticEvaluator.
+
+Los scores usan la misma ponderación que el protocolo SABG, de modo que una
+función solo se aprueba sin LLM si su score global por reglas alcanza el umbral
+de APROBADO (>= 0.85).
+
+Fecha: 2025-11-12
+Versión: 5.43
+"""
+
+import logging
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from src.config.verb_hierarchy import is_verb_appropriate, is_verb_forbidden
+from src.validators.function_semantic_evaluator import CriterionScore, FunctionEvaluationResult
+
+logger = logging.getLogger(__name__)
+
+
+# Pesos del Protocolo SABG (ver FunctionSemanticEvaluator._SCORING_RULES)
+SABG_WEIGHTS = {
+    "verbo": 0.25,
+    "normativa": 0.25,
+    "estructura": 0.20,
+    "semantica": 0.20,
+    "jerarquica": 0.10
+}
+
+# Conectores que introducen el RESULTADO / finalidad de la función
+_RESULT_CONNECTORS = re.compile(
+    r"\b(para|a fin de|con el (fin|objeto|propósito) de|con la finalidad de|"
+    r"mediante|que permitan?|asegurando|garantizando|contribuyendo)\b",
+    re.IGNORECASE
+)
+
+
+@dataclass
+class PrescreenResult:
+    """Resultado de la pre-evaluación de una función"""
+    score_verbo: float
+    score_normativa: float
+    score_estructura: float
+    score_jerarquica: float
+    score_global: float
+    decision: Optional[str]  # APROBADO | RECHAZADO si se resuelve sin LLM; None = escalar
+    reasons: List[str] = field(default_factory=list)
+    best_fragment: Optional[str] = None
+
+    @property
+    def escalate(self) -> bool:
+        return self.decision is None
+
+
+class FunctionPrescreener:
+    """
+    Pre-evaluador por reglas (jerarquía de verbos, estructura) y similitud normativa.
+
+    Thread-safe: las estadísticas de tiering se comparten entre puestos validados
+    en paralelo.
+    """
+
+    def __init__(
+        self,
+        normativa_loader: Any = None,
+        approve_threshold: float = 0.85,
+        allow_reject: bool = False,
+        weak_match_threshold: float = 0.20
+    ):
+        """
+        Args:
+            normativa_loader: NormativaLoader para la similitud normativa (None = sin respaldo)
+            approve_threshold: Score global por reglas para aprobar sin LLM
+            allow_reject: Si True, también rechaza sin LLM las funciones con verbo
+                prohibido para el nivel y sin coincidencia normativa (el LLM podría
+                encontrar una excepción normativa, por eso está desactivado por defecto)
+            weak_match_threshold: Similitud máxima considerada "sin respaldo normativo"
+        """
+        self.normativa_loader = normativa_loader
+        self.approve_threshold = approve_threshold
+        self.allow_reject = allow_reject
+        self.weak_match_threshold = weak_match_threshold
+
+        self._lock = threading.Lock()
+        self._stats = {
+            "evaluated": 0,
+            "approved_without_llm": 0,
+            "rejected_without_llm": 0,
+            "escalated": 0
+        }
+
+    def prescreen(
+        self,
+        funcion_text: str,
+        verbo: str,
+        nivel_salarial: str,
+        puesto_nombre: str = ""
+    ) -> PrescreenResult:
+        """
+        Calcula scores por reglas y decide si la función requiere evaluación LLM.
+
+        Args:
+            funcion_text: Texto completo de la función
+            verbo: Verbo principal
+            nivel_salarial: Nivel del puesto (ej: "M1", "K12")
+            puesto_nombre: Denominación del puesto (para la búsqueda normativa)
+
+        Returns:
+            PrescreenResult (decision=None → escalar al LLM)
+        """
+        reasons = []
+        verbo_norm = (verbo or "").strip().lower()
+
+        # 1. Verbo vs jerarquía del nivel
+        if is_verb_forbidden(verbo_norm, nivel_salarial):
+            score_verbo, score_jerarquica = 0.0, 0.0
+            reasons.append(f"verbo '{verbo_norm}' prohibido para nivel {nivel_salarial}")
+        elif is_verb_appropriate(verbo_norm, nivel_salarial):
+            score_verbo, score_jerarquica = 1.0, 1.0
+            reasons.append(f"verbo '{verbo_norm}' apropiado para nivel {nivel_salarial}")
+        else:
+            score_verbo, score_jerarquica = 0.5, 0.5
+            reasons.append(f"verbo '{verbo_norm}' no listado para nivel {nivel_salarial}")
+
+        # 2. Estructura VERBO + COMPLEMENTO + RESULTADO
+        score_estructura = self._score_structure(funcion_text)
+
+        # 3. Similitud normativa (misma consulta que FunctionSemanticEvaluator → caché compartida)
+        score_normativa, best_fragment = self._score_normativa(funcion_text, verbo, puesto_nombre)
+
+        # La semántica no se puede separar de la normativa sin LLM: se usa la misma similitud
+        score_global = (
+            score_verbo * SABG_WEIGHTS["verbo"] +
+            score_normativa * SABG_WEIGHTS["normativa"] +
+            score_estructura * SABG_WEIGHTS["estructura"] +
+            score_normativa * SABG_WEIGHTS["semantica"] +
+            score_jerarquica * SABG_WEIGHTS["jerarquica"]
+        )
+
+        decision = None
+        if score_verbo == 1.0 and score_global >= self.approve_threshold:
+            decision = "APROBADO"
+        elif self.allow_reject and score_jerarquica == 0.0 and score_normativa < self.weak_match_threshold:
+            decision = "RECHAZADO"
+            reasons.append("sin respaldo normativo que justifique el verbo")
+
+        self._record(decision)
+
+        return PrescreenResult(
+            score_verbo=score_verbo,
+            score_normativa=score_normativa,
+            score_estructura=score_estructura,
+            score_jerarquica=score_jerarquica,
+            score_global=round(score_global, 3),
+            decision=decision,
+            reasons=reasons,
+            best_fragment=best_fragment
+        )
+
+    def to_evaluation(self, result: PrescreenResult, funcion_text: str, verbo: str) -> FunctionEvaluationResult:
+        """
+        Convierte una pre-evaluación resuelta en FunctionEvaluationResult.
+
+        Los metadatos marcan "tier": "prescreen" para distinguirla de la evaluación LLM.
+        """
+        meta = {"tier": "prescreen"}
+        resumen = "; ".join(result.reasons)
+
+        return FunctionEvaluationResult(
+            funcion_text=funcion_text,
+            verbo=verbo,
+            criterio_verbo=CriterionScore(
+                score=result.score_verbo,
+                reasoning=f"Pre-evaluación por reglas: {resumen}",
+                metadata={**meta, "esta_autorizado": result.score_verbo == 1.0}
+            ),
+            criterio_normativa=CriterionScore(
+                score=result.score_normativa,
+                reasoning=f"Similitud normativa máxima {result.score_normativa:.2f}",
+                metadata={**meta, "articulo_respaldo": result.best_fragment}
+            ),
+            criterio_estructura=CriterionScore(
+                score=result.score_estructura,
+                reasoning="Estructura VERBO + COMPLEMENTO + RESULTADO evaluada por reglas",
+                metadata=meta
+            ),
+            criterio_semantica=CriterionScore(
+                score=result.score_normativa,
+                reasoning="Alineación semántica estimada por similitud normativa",
+                metadata=meta
+            ),
+            criterio_jerarquica=CriterionScore(
+                score=result.score_jerarquica,
+                reasoning="Verbo evaluado contra la jerarquía del nivel",
+                metadata=meta
+            ),
+            score_global=result.score_global,
+            clasificacion=result.decision,
+            razonamiento_final=(
+                f"Resuelta en pre-evaluación sin LLM (score por reglas {result.score_global:.2f}): {resumen}."
+            )
+        )
+
+    def get_tiering_stats(self) -> Dict[str, Any]:
+        """
+        Estadísticas de tiering.
+
+        Returns:
+            Dict con contadores y escalation_rate (fracción de funciones enviadas al LLM)
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["escalation_rate"] = stats["escalated"] / stats["evaluated"] if stats["evaluated"] else 0.0
+        return stats
+
+    # ==========================================
+    # MÉTODOS PRIVADOS
+    # ==========================================
+
+    def _record(self, decision: Optional[str]) -> None:
+        with self._lock:
+            self._stats["evaluated"] += 1
+            if decision == "APROBADO":
+                self._stats["approved_without_llm"] += 1
+            elif decision == "RECHAZADO":
+                self._stats["rejected_without_llm"] += 1
+            else:
+                self._stats["escalated"] += 1
+
+    @staticmethod
+    def _score_structure(funcion_text: str) -> float:
+        words = (funcion_text or "").split()
+        if len(words) < 5:
+            return 0.2  # Solo verbo + objeto mínimo
+        has_result = bool(_RESULT_CONNECTORS.search(funcion_text))
+        if has_result and len(words) >= 8:
+            return 1.0
+        return 0.7 if has_result else 0.5
+
+    def _score_normativa(self, funcion_text: str, verbo: str, puesto_nombre: str):
+        if not self.normativa_loader:
+            return 0.0, None
+        try:
+            query = f"{puesto_nombre} {verbo} {funcion_text[:100]}"
+            matches = self.normativa_loader.semantic_search(query=query, max_results=15) or []
+        except Exception as e:
+            logger.warning(f"[FunctionPrescreener] Error en búsqueda normativa: {e}")
+            return 0.0, None
+        if not matches:
+            return 0.0, None
+        best = max(matches, key=lambda m: m.confidence_score)
+        return min(1.0, float(best.confidence_score)), best.content_snippet[:200]
@@ -8,20 +8,103 @@ Implementa análisis contextual de funciones con 5 criterios:
 4. Semántica (20%) - ¿Alineación entre significado función vs normativa?
 5. Jerárquica (10%) - ¿Corresponde al nivel del puesto?
 
+Modo por lotes (v5.43): evalúa N funciones del mismo puesto en una sola
+llamada LLM (el preámbulo del protocolo se envía una sola vez). Las funciones
+cuya respuesta no se puede parsear se re-evalúan individualmente.
+
 Fecha: 2025-11-07
 Versión: 5.20 - ANÁLISIS SEMÁNTICO CON LLM
 """
 
 import logging
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 from dataclasses import dataclass, asdict
 
 from src.validators.shared_utilities import APFContext, robust_openai_call
+from src.validators.context_budget import NormativaContextAssembler
 
 logger = logging.getLogger(__name__)
 
 
+# ==========================================
+# ESQUEMAS DE RESPUESTA (v5.43: generación restringida por JSON Schema)
+# ==========================================
+
+CLASIFICACIONES = ("APROBADO", "OBSERVACION", "RECHAZADO")
+
+
+def _criterion_schema(extra_properties: Dict[str, Any]) -> Dict[str, Any]:
+    """Esquema de un criterio: score + reasoning + campos propios del criterio"""
+    return {
+        "type": "object",
+        "properties": {
+            "score": {"type": "number", "minimum": 0.0, "maximum": 1.0},
+            "reasoning": {"type": "string"},
+            **extra_properties
+        },
+        "required": ["score", "reasoning", *extra_properties.keys()]
+    }
+
+
+# Forma de FunctionEvaluationResult tal como la devuelve el LLM
+FUNCTION_EVALUATION_SCHEMA: Dict[str, Any] = {
+    "title": "evaluacion_funcion",
+    "type": "object",
+    "properties": {
+        "criterio_verbo": _criterion_schema({
+            "esta_autorizado": {"type": "boolean"},
+            "tiene_excepcion_normativa": {"type": "boolean"}
+        }),
+        "criterio_normativa": _criterion_schema({
+            "articulo_respaldo": {"type": ["string", "null"]},
+            "tipo_correspondencia": {"enum": ["DIRECTA", "SEMANTICA", "LEJANA", "NINGUNA"]}
+        }),
+        "criterio_estructura": _criterion_schema({
+            "tiene_verbo": {"type": "boolean"},
+            "tiene_complemento": {"type": "boolean"},
+            "tiene_resultado": {"type": "boolean"}
+        }),
+        "criterio_semantica": _criterion_schema({
+            "nucleo_semantico": {"type": "string"},
+            "nucleo_normativo": {"type": "string"},
+            "tipo_alineacion": {"enum": ["EQUIVALENTE", "SUPERPONE_CLARA", "SUPERPONE_DEBIL", "DISTINTA"]}
+        }),
+        "criterio_jerarquica": _criterion_schema({
+            "corresponde_nivel": {"type": "boolean"},
+            "hay_inversion_jerarquica": {"type": "boolean"}
+        }),
+        "score_global": {"type": "number", "minimum": 0.0, "maximum": 1.0},
+        "clasificacion": {"enum": list(CLASIFICACIONES)},
+        "razonamiento_final": {"type": "string"}
+    },
+    "required": [
+        "criterio_verbo", "criterio_normativa", "criterio_estructura",
+        "criterio_semantica", "criterio_jerarquica",
+        "score_global", "clasificacion", "razonamiento_final"
+    ]
+}
+
+BATCH_FUNCTION_EVALUATION_SCHEMA: Dict[str, Any] = {
+    "title": "evaluacion_funciones_lote",
+    "type": "object",
+    "properties": {
+        "evaluaciones": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "indice": {"type": "integer", "minimum": 1},
+                    **FUNCTION_EVALUATION_SCHEMA["properties"]
+                },
+                "required": ["indice", *FUNCTION_EVALUATION_SCHEMA["required"]]
+            }
+        }
+    },
+    "required": ["evaluaciones"]
+}
+
+
 @dataclass
 class CriterionScore:
     """Score de un criterio individual"""
@@ -127,6 +210,160 @@ class FunctionSemanticEvaluator:
         "jerarquica": 0.10
     }
 
+    # ==========================================
+    # PROMPTS (v5.43: prefijo estático en system message)
+    # ==========================================
+    # El protocolo SABG y el formato de respuesta son idénticos en todas las
+    # llamadas; van en el system message para que el servidor reutilice la caché
+    # de prompt (KV cache). Los datos del puesto/función van al final (sufijo).
+
+    _PROTOCOLO_SABG = """EVALÚA LOS 5 CRITERIOS CON ANÁLISIS SEMÁNTICO (NO LÉXICO):
+
+**1. CRITERIO VERBO (25%)**
+- ¿El verbo está autorizado para el nivel jerárquico del puesto?
+- Verbos típicos DG (G): EMITIR, APROBAR, PROPONER, ESTABLECER, DIRIGIR, ORDENAR
+- ¿Hay excepción normativa explícita (ej: REFRENDAR, RESOLVER, DESIGNAR en fragmentos)?
+- Score: 1.0 (autorizado) | 0.5 (excepción válida) | 0.0 (no autorizado)
+
+**2. CRITERIO NORMATIVA (25%)**
+- ¿Existe respaldo normativo en los fragmentos proporcionados?
+- Tipos de correspondencia:
+  * DIRECTA: Mismo concepto, mismas palabras
+  * SEMANTICA: Mismo concepto, palabras diferentes (ej: "emitir normas" = "expedir disposiciones")
+  * LEJANA: Concepto relacionado pero no claro
+  * NINGUNA: Sin respaldo
+- Score: 1.0 (directa) | 0.7 (semántica) | 0.4 (lejana) | 0.0 (ninguna)
+
+**3. CRITERIO ESTRUCTURA (20%)**
+- ¿Tiene VERBO + COMPLEMENTO (qué/a quién) + RESULTADO (para qué)?
+- Ejemplo completo: "EMITIR [verbo] los procedimientos [complemento] para la recopilación de información [resultado]"
+- Score: 1.0 (los 3 componentes claros) | 0.7 (2 componentes) | 0.4 (1 componente) | 0.0 (ninguno)
+
+**4. CRITERIO SEMÁNTICA (20%)**
+- PASO 1: Extraer NÚCLEO SEMÁNTICO de la función (significado esencial en 1 frase)
+- PASO 2: Extraer NÚCLEO NORMATIVO de fragmentos (significado esencial en 1 frase)
+- PASO 3: Comparar núcleos (¿son equivalentes/similares/distintos?)
+- IMPORTANTE: Comparar SIGNIFICADOS, no palabras exactas
+- Score: 1.0 (equivalentes) | 0.7 (superposición clara) | 0.4 (superposición débil) | 0.0 (distintos)
+
+**5. CRITERIO JERÁRQUICA (10%)**
+- ¿Corresponde al nivel jerárquico del puesto?
+  * Nivel G (DG): Estratégico, políticas, decisiones de alto nivel
+  * NO Nivel G: Operacional, ejecución, tareas administrativas
+- ¿Hay INVERSIÓN JERÁRQUICA? (Director hace tareas de operador)
+  * Síntomas: "interpretar normas" (trabajo jurídico), "ejecutar", "compilar", "verificar"
+- Score: 1.0 (corresponde) | 0.5 (requiere ajuste) | 0.0 (inversión clara)
+- IMPORTANTE: Si score = 0.0, la función se RECHAZA automáticamente
+"""
+
+    _SCORING_RULES = """CÁLCULO DE SCORE GLOBAL:
+score_global = (verbo×0.25) + (normativa×0.25) + (estructura×0.20) + (semantica×0.20) + (jerarquica×0.10)
+
+CLASIFICACIÓN:
+- Score >= 0.85: "APROBADO"
+- Score 0.60-0.84: "OBSERVACION"
+- Score < 0.60: "RECHAZADO"
+- Si jerarquica = 0.0: "RECHAZADO" (anula todo)"""
+
+    EVALUATION_SYSTEM_PROMPT = f"""Eres un experto en evaluación de descripciones de puestos de la Administración Pública Federal mexicana. Respondes únicamente en JSON válido.
+
+{_PROTOCOLO_SABG}
+---
+
+RESPONDE EN JSON (sin comentarios adicionales):
+{{
+    "criterio_verbo": {{
+        "score": 0.0,
+        "reasoning": "explicación breve (1-2 oraciones)",
+        "esta_autorizado": false,
+        "tiene_excepcion_normativa": false
+    }},
+    "criterio_normativa": {{
+        "score": 0.0,
+        "reasoning": "explicación",
+        "articulo_respaldo": "Fragmento X" o null,
+        "tipo_correspondencia": "DIRECTA|SEMANTICA|LEJANA|NINGUNA"
+    }},
+    "criterio_estructura": {{
+        "score": 0.0,
+        "reasoning": "explicación",
+        "tiene_verbo": false,
+        "tiene_complemento": false,
+        "tiene_resultado": false
+    }},
+    "criterio_semantica": {{
+        "score": 0.0,
+        "reasoning": "explicación",
+        "nucleo_semantico": "significado esencial de la función",
+        "nucleo_normativo": "significado esencial de la normativa",
+        "tipo_alineacion": "EQUIVALENTE|SUPERPONE_CLARA|SUPERPONE_DEBIL|DISTINTA"
+    }},
+    "criterio_jerarquica": {{
+        "score": 0.0,
+        "reasoning": "explicación",
+        "corresponde_nivel": false,
+        "hay_inversion_jerarquica": false
+    }},
+    "score_global": 0.0,
+    "clasificacion": "APROBADO|OBSERVACION|RECHAZADO",
+    "razonamiento_final": "justificación integrada de 2-3 oraciones"
+}}
+
+{_SCORING_RULES}
+"""
+
+    BATCH_EVALUATION_SYSTEM_PROMPT = f"""Eres un experto en evaluación de descripciones de puestos de la Administración Pública Federal mexicana. Respondes únicamente en JSON válido.
+
+{_PROTOCOLO_SABG}
+---
+
+RESPONDE EN JSON (sin comentarios adicionales), con UN elemento por función en "evaluaciones":
+{{
+    "evaluaciones": [
+        {{
+            "indice": 1,
+            "criterio_verbo": {{
+                "score": 0.0,
+                "reasoning": "explicación breve (1-2 oraciones)",
+                "esta_autorizado": false,
+                "tiene_excepcion_normativa": false
+            }},
+            "criterio_normativa": {{
+                "score": 0.0,
+                "reasoning": "explicación",
+                "articulo_respaldo": "Fragmento X" o null,
+                "tipo_correspondencia": "DIRECTA|SEMANTICA|LEJANA|NINGUNA"
+            }},
+            "criterio_estructura": {{
+                "score": 0.0,
+                "reasoning": "explicación",
+                "tiene_verbo": false,
+                "tiene_complemento": false,
+                "tiene_resultado": false
+            }},
+            "criterio_semantica": {{
+                "score": 0.0,
+                "reasoning": "explicación",
+                "nucleo_semantico": "significado esencial de la función",
+                "nucleo_normativo": "significado esencial de la normativa",
+                "tipo_alineacion": "EQUIVALENTE|SUPERPONE_CLARA|SUPERPONE_DEBIL|DISTINTA"
+            }},
+            "criterio_jerarquica": {{
+                "score": 0.0,
+                "reasoning": "explicación",
+                "corresponde_nivel": false,
+                "hay_inversion_jerarquica": false
+            }},
+            "score_global": 0.0,
+            "clasificacion": "APROBADO|OBSERVACION|RECHAZADO",
+            "razonamiento_final": "justificación integrada de 2-3 oraciones"
+        }}
+    ]
+}}
+
+{_SCORING_RULES}
+"""
+
     def __init__(self, normativa_loader, context: APFContext):
         """
         Inicializa el evaluador semántico.
@@ -137,9 +374,15 @@ class FunctionSemanticEvaluator:
         """
         self.normativa_loader = normativa_loader
         self.context = context
+        # Contexto normativo con presupuesto de tokens del modelo (v5.43)
+        self.context_assembler = NormativaContextAssembler(context=context)
 
         logger.info("[FunctionSemanticEvaluator] Inicializado con Protocolo SABG v1.1")
 
+    # Tokens de salida reservados por función en modo por lotes
+    BATCH_TOKENS_PER_FUNCTION = 1200
+    BATCH_MAX_TOKENS = 8000
+
     def evaluate_function(
         self,
         funcion_text: str,
@@ -192,6 +435,141 @@ class FunctionSemanticEvaluator:
             # Fallback: clasificar como RECHAZADO con baja confianza
             return self._create_fallback_result(funcion_text, verbo, str(e))
 
+    def evaluate_functions_batch(
+        self,
+        funciones: List[Dict[str, str]],
+        nivel_jerarquico: str,
+        puesto_nombre: str,
+        unidad: str,
+        batch_size: int = 5
+    ) -> List[FunctionEvaluationResult]:
+        """
+        Evalúa varias funciones del mismo puesto agrupándolas en lotes de `batch_size`
+        por llamada LLM (respuesta JSON con un arreglo de evaluaciones).
+
+        Las funciones cuya evaluación no se puede parsear (o si falla la llamada
+        del lote completo) se re-evalúan individualmente con evaluate_function().
+
+        Args:
+            funciones: Lista de {"funcion_text": str, "verbo": str}
+            nivel_jerarquico: Nivel del puesto (G, H, J, K, etc.)
+            puesto_nombre: Denominación del puesto
+            unidad: Unidad responsable
+            batch_size: Funciones por llamada LLM
+
+        Returns:
+            Lista de FunctionEvaluationResult en el mismo orden que `funciones`
+        """
+        batch_size = max(1, batch_size)
+        results: List[Optional[FunctionEvaluationResult]] = [None] * len(funciones)
+
+        for start in range(0, len(funciones), batch_size):
+            chunk = funciones[start:start + batch_size]
+            parsed = self._evaluate_chunk(chunk, nivel_jerarquico, puesto_nombre, unidad)
+
+            for offset, item in enumerate(chunk):
+                result = parsed.get(offset)
+                if result is None:
+                    logger.info(
+                        f"[FunctionSemanticEvaluator] Función {start + offset + 1}: "
+                        f"sin evaluación válida en lote → evaluación individual"
+                    )
+                    result = self.evaluate_function(
+                        funcion_text=item["funcion_text"],
+                        verbo=item["verbo"],
+                        nivel_jerarquico=nivel_jerarquico,
+                        puesto_nombre=puesto_nombre,
+                        unidad=unidad
+                    )
+                results[start + offset] = result
+
+        return results
+
+    def _evaluate_chunk(
+        self,
+        chunk: List[Dict[str, str]],
+        nivel_jerarquico: str,
+        puesto_nombre: str,
+        unidad: str
+    ) -> Dict[int, FunctionEvaluationResult]:
+        """
+        Evalúa un lote de funciones en una sola llamada LLM.
+
+        Returns:
+            Dict {posición_en_lote: resultado} solo para las funciones parseadas
+            correctamente (las ausentes requieren evaluación individual)
+        """
+        if len(chunk) == 1:
+            return {}  # Un lote de 1 no ahorra nada: usar ruta individual
+
+        contexto_normativo = self._get_batch_normativa_context(chunk, puesto_nombre)
+        prompt = self._create_batch_evaluation_prompt(
+            chunk, nivel_jerarquico, puesto_nombre, unidad, contexto_normativo
+        )
+
+        response = robust_openai_call(
+            prompt=prompt,
+            system_message=self.BATCH_EVALUATION_SYSTEM_PROMPT,
+            response_schema=BATCH_FUNCTION_EVALUATION_SCHEMA,
+            temperature=0.1,
+            max_tokens=min(self.BATCH_TOKENS_PER_FUNCTION * len(chunk), self.BATCH_MAX_TOKENS),
+            context=self.context
+        )
+
+        if response.get("status") != "success":
+            logger.warning(f"[FunctionSemanticEvaluator] Error en lote de {len(chunk)} funciones: {response.get('error', '')[:200]}")
+            return {}
+
+        data = response["data"]
+        items = data.get("evaluaciones", []) if isinstance(data, dict) else data
+        if not isinstance(items, list):
+            return {}
+
+        parsed: Dict[int, FunctionEvaluationResult] = {}
+        for position, item in enumerate(items):
+            if not isinstance(item, dict):
+                continue
+            # Preferir índice explícito (1-based); si falta, usar posición
+            indice = item.get("indice", position + 1)
+            try:
+                offset = int(indice) - 1
+            except (TypeError, ValueError):
+                offset = position
+            if not 0 <= offset < len(chunk) or offset in parsed:
+                continue
+
+            try:
+                result = self._parse_llm_response(item, chunk[offset]["funcion_text"], chunk[offset]["verbo"])
+                # Validar tipos mínimos antes de aceptar el item
+                result.score_global = float(result.score_global)
+                if result.clasificacion not in CLASIFICACIONES:
+                    raise ValueError(f"clasificación inválida: {result.clasificacion}")
+                parsed[offset] = result
+            except (KeyError, TypeError, ValueError) as e:
+                logger.debug(f"[FunctionSemanticEvaluator] Item {offset + 1} del lote inválido: {e}")
+
+        logger.info(f"[FunctionSemanticEvaluator] Lote: {len(parsed)}/{len(chunk)} funciones parseadas")
+        return parsed
+
+    def _get_batch_normativa_context(self, chunk: List[Dict[str, str]], puesto_nombre: str) -> str:
+        """Une (sin duplicados) los fragmentos normativos de todas las funciones del lote"""
+        if not self.normativa_loader or not hasattr(self.normativa_loader, 'semantic_search'):
+            return "No hay normativa cargada para validación."
+
+        try:
+            best: Dict[str, Any] = {}
+            for item in chunk:
+                for match in self._search_normativa(item["funcion_text"], item["verbo"], puesto_nombre):
+                    key = match.content_snippet.strip()
+                    if key not in best or match.confidence_score > best[key].confidence_score:
+                        best[key] = match
+
+            return self._format_normativa_context(list(best.values()))
+
+        except Exception as e:
+            logger.warning(f"[FunctionSemanticEvaluator] Error buscando contexto normativo del lote: {e}")
+            return "Error al buscar normativa relevante."
+
     def _get_normativa_context(
         self,
         funcion_text: str,
@@ -213,29 +591,30 @@ class FunctionSemanticEvaluator:
             return "No hay normativa cargada para validación."
 
         try:
-            # Buscar fragmentos relevantes usando búsqueda semántica
-            query = f"{puesto_nombre} {verbo} {funcion_text[:100]}"
-            search_results = self.normativa_loader.semantic_search(
-                query=query,
-                max_results=15  # Aumentado para cobertura normativa completa (fix v5.26)
-            )
-
-            if not search_results:
-                return "No se encontraron fragmentos normativos relevantes."
-
-            # Construir contexto con los mejores fragmentos
-            context_parts = ["FRAGMENTOS NORMATIVOS RELEVANTES:\n"]
-            for i, match in enumerate(search_results, 1):
-                snippet = match.content_snippet[:400] if len(match.content_snippet) > 400 else match.content_snippet
-                context_parts.append(f"\n[Fragmento {i}] (Relevancia: {match.confidence_score:.2f})")
-                context_parts.append(f"{snippet}\n")
-
-            return "\n".join(context_parts)
+            search_results = self._search_normativa(funcion_text, verbo, puesto_nombre)
+            return self._format_normativa_context(search_results)
 
         except Exception as e:
             logger.warning(f"[FunctionSemanticEvaluator] Error buscando contexto normativo: {e}")
             return "Error al buscar normativa relevante."
 
+    def _search_normativa(self, funcion_text: str, verbo: str, puesto_nombre: str) -> List[Any]:
+        """Búsqueda semántica de fragmentos normativos para una función"""
+        query = f"{puesto_nombre} {verbo} {funcion_text[:100]}"
+        return self.normativa_loader.semantic_search(
+            query=query,
+            max_results=15  # Aumentado para cobertura normativa completa (fix v5.26)
+        ) or []
+
+    def _format_normativa_context(self, search_results: List[Any]) -> str:
+        """
+        Construye el bloque de fragmentos normativos para el prompt.
+
+        v5.43: en lugar de 15 fragmentos cortados a 400 caracteres, empaqueta los
+        más relevantes (sin traslapes) dentro del presupuesto de tokens del modelo.
+        """
+        return self.context_assembler.assemble(search_results).text
+
     def _call_llm_evaluation(
         self,
         funcion_text: str,
@@ -260,13 +639,11 @@ class FunctionSemanticEvaluator:
             contexto_normativo=contexto_normativo
         )
 
-        # Preparar prompt completo (system + user)
-        system_instruction = "Eres un experto en evaluación de descripciones de puestos de la Administración Pública Federal mexicana. Respondes únicamente en JSON válido."
-        full_prompt = f"{system_instruction}\n\n{prompt}"
-
-        # Llamar a LLM
+        # Llamar a LLM (system estático + datos variables)
         response = robust_openai_call(
-            prompt=full_prompt,
+            prompt=prompt,
+            system_message=self.EVALUATION_SYSTEM_PROMPT,
+            response_schema=FUNCTION_EVALUATION_SCHEMA,
             temperature=0.1,  # Baja temperatura para mayor consistencia
             max_tokens=2500,  # Aumentado para Phi-3.5 (evitar truncamiento)
             context=self.context
@@ -289,11 +666,15 @@ class FunctionSemanticEvaluator:
         unidad: str,
         contexto_normativo: str
     ) -> str:
-        """Crea el prompt de evaluación para el LLM"""
+        """
+        Crea la parte VARIABLE del prompt de evaluación (datos del puesto y función).
 
-        return f"""Eres un experto en evaluación de descripciones de puestos de la APF mexicana.
+        El protocolo SABG y el formato de respuesta van en EVALUATION_SYSTEM_PROMPT.
+        El orden (puesto → función → normativa) mantiene el prefijo común entre
+        funciones del mismo puesto.
+        """
 
-TAREA: Evaluar esta función usando el Protocolo SABG v1.1 (5 criterios).
+        return f"""TAREA: Evaluar esta función usando el Protocolo SABG v1.1 (5 criterios).
 
 **CONTEXTO DEL PUESTO:**
 - Denominación: {puesto_nombre}
@@ -307,96 +688,36 @@ TAREA: Evaluar esta función usando el Protocolo SABG v1.1 (5 criterios).
 
 **NORMATIVA APLICABLE:**
 {contexto_normativo}
+"""
 
----
-
-EVALÚA LOS 5 CRITERIOS CON ANÁLISIS SEMÁNTICO (NO LÉXICO):
-
-**1. CRITERIO VERBO (25%)**
-- ¿El verbo está autorizado para nivel {nivel_jerarquico}?
-- Verbos típicos DG (G): EMITIR, APROBAR, PROPONER, ESTABLECER, DIRIGIR, ORDENAR
-- ¿Hay excepción normativa explícita (ej: REFRENDAR, RESOLVER, DESIGNAR en fragmentos)?
-- Score: 1.0 (autorizado) | 0.5 (excepción válida) | 0.0 (no autorizado)
-
-**2. CRITERIO NORMATIVA (25%)**
-- ¿Existe respaldo normativo en los fragmentos proporcionados?
-- Tipos de correspondencia:
-  * DIRECTA: Mismo concepto, mismas palabras
-  * SEMANTICA: Mismo concepto, palabras diferentes (ej: "emitir normas" = "expedir disposiciones")
-  * LEJANA: Concepto relacionado pero no claro
-  * NINGUNA: Sin respaldo
-- Score: 1.0 (directa) | 0.7 (semántica) | 0.4 (lejana) | 0.0 (ninguna)
-
-**3. CRITERIO ESTRUCTURA (20%)**
-- ¿Tiene VERBO + COMPLEMENTO (qué/a quién) + RESULTADO (para qué)?
-- Ejemplo completo: "EMITIR [verbo] los procedimientos [complemento] para la recopilación de información [resultado]"
-- Score: 1.0 (los 3 componentes claros) | 0.7 (2 componentes) | 0.4 (1 componente) | 0.0 (ninguno)
-
-**4. CRITERIO SEMÁNTICA (20%)**
-- PASO 1: Extraer NÚCLEO SEMÁNTICO de la función (significado esencial en 1 frase)
-- PASO 2: Extraer NÚCLEO NORMATIVO de fragmentos (significado esencial en 1 frase)
-- PASO 3: Comparar núcleos (¿son equivalentes/similares/distintos?)
-- IMPORTANTE: Comparar SIGNIFICADOS, no palabras exactas
-- Score: 1.0 (equivalentes) | 0.7 (superposición clara) | 0.4 (superposición débil) | 0.0 (distintos)
+    def _create_batch_evaluation_prompt(
+        self,
+        chunk: List[Dict[str, str]],
+        nivel_jerarquico: str,
+        puesto_nombre: str,
+        unidad: str,
+        contexto_normativo: str
+    ) -> str:
+        """Crea la parte VARIABLE del prompt de evaluación por lotes"""
 
-**5. CRITERIO JERÁRQUICA (10%)**
-- ¿Corresponde al nivel {nivel_jerarquico}?
-  * Nivel G (DG): Estratégico, políticas, decisiones de alto nivel
-  * NO Nivel G: Operacional, ejecución, tareas administrativas
-- ¿Hay INVERSIÓN JERÁRQUICA? (Director hace tareas de operador)
-  * Síntomas: "interpretar normas" (trabajo jurídico), "ejecutar", "compilar", "verificar"
-- Score: 1.0 (corresponde) | 0.5 (requiere ajuste) | 0.0 (inversión clara)
-- IMPORTANTE: Si score = 0.0, la función se RECHAZA automáticamente
+        funciones_txt = "\n".join(
+            f'{i}. [VERBO: {item["verbo"]}] "{item["funcion_text"]}"'
+            for i, item in enumerate(chunk, 1)
+        )
 
----
+        return f"""TAREA: Evaluar CADA UNA de las {len(chunk)} funciones usando el Protocolo SABG v1.1 (5 criterios).
+Evalúa cada función de forma independiente. Responde con UN elemento por función en "evaluaciones".
 
-RESPONDE EN JSON (sin comentarios adicionales):
-{{
-    "criterio_verbo": {{
-        "score": 0.0,
-        "reasoning": "explicación breve (1-2 oraciones)",
-        "esta_autorizado": false,
-        "tiene_excepcion_normativa": false
-    }},
-    "criterio_normativa": {{
-        "score": 0.0,
-        "reasoning": "explicación",
-        "articulo_respaldo": "Fragmento X" o null,
-        "tipo_correspondencia": "DIRECTA|SEMANTICA|LEJANA|NINGUNA"
-    }},
-    "criterio_estructura": {{
-        "score": 0.0,
-        "reasoning": "explicación",
-        "tiene_verbo": false,
-        "tiene_complemento": false,
-        "tiene_resultado": false
-    }},
-    "criterio_semantica": {{
-        "score": 0.0,
-        "reasoning": "explicación",
-        "nucleo_semantico": "significado esencial de la función",
-        "nucleo_normativo": "significado esencial de la normativa",
-        "tipo_alineacion": "EQUIVALENTE|SUPERPONE_CLARA|SUPERPONE_DEBIL|DISTINTA"
-    }},
-    "criterio_jerarquica": {{
-        "score": 0.0,
-        "reasoning": "explicación",
-        "corresponde_nivel": false,
-        "hay_inversion_jerarquica": false
-    }},
-    "score_global": 0.0,
-    "clasificacion": "APROBADO|OBSERVACION|RECHAZADO",
-    "razonamiento_final": "justificación integrada de 2-3 oraciones"
-}}
+**CONTEXTO DEL PUESTO:**
+- Denominación: {puesto_nombre}
+- Nivel Jerárquico: {nivel_jerarquico} (G=Dirección General, H=Subdirección, J=Jefatura, K=Enlace)
+- Unidad: {unidad}
 
-CÁLCULO DE SCORE GLOBAL:
-score_global = (verbo×0.25) + (normativa×0.25) + (estructura×0.20) + (semantica×0.20) + (jerarquica×0.10)
+**FUNCIONES A EVALUAR:**
+{funciones_txt}
 
-CLASIFICACIÓN:
-- Score >= 0.85: "APROBADO"
-- Score 0.60-0.84: "OBSERVACION"
-- Score < 0.60: "RECHAZADO"
-- Si jerarquica = 0.0: "RECHAZADO" (anula todo)
+**NORMATIVA APLICABLE:**
+{contexto_normativo}
 """
 
     def _parse_llm_response(
@@ -12,6 +12,11 @@ MEJORAS v5.37:
 - Nivel G: acepta complexity=[transformational, innovative, strategic, analytical]
 - LLM informado de rangos válidos para evaluación más precisa
 
+MEJORAS v5.43:
+- analyze_functions_impact(): clasifica todas las funciones de un puesto en una
+  sola llamada LLM (guía de rangos por nivel enviada una sola vez)
+- Fallback por función a _create_fallback_analysis() si un item no se puede parsear
+
 Versión: 5.37 (con rangos de impacto aceptables - filosofía de variedad legítima)
 Fecha: 2025-11-11
 """
@@ -24,6 +29,49 @@ from src.validators.shared_utilities import APFContext, robust_openai_call
 
 logger = logging.getLogger(__name__)
 
+# Valores válidos por dimensión de impacto (para validar respuestas LLM)
+VALID_SCOPES = ("local", "institutional", "interinstitutional", "strategic_national")
+VALID_CONSEQUENCES = ("operational", "tactical", "strategic", "systemic")
+VALID_COMPLEXITIES = ("routine", "analytical", "strategic", "transformational", "innovative")
+
+# Forma de LLMImpactAnalysis tal como la devuelve el LLM (generación restringida, v5.43)
+IMPACT_ANALYSIS_SCHEMA: Dict[str, Any] = {
+    "title": "analisis_impacto",
+    "type": "object",
+    "properties": {
+        "scope_level": {"enum": list(VALID_SCOPES)},
+        "consequences_level": {"enum": list(VALID_CONSEQUENCES)},
+        "complexity_level": {"enum": list(VALID_COMPLEXITIES)},
+        "is_appropriate": {"type": "boolean"},
+        "confidence": {"type": "number", "minimum": 0.0, "maximum": 1.0},
+        "reasoning": {"type": "string"},
+        "issues": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": [
+        "scope_level", "consequences_level", "complexity_level",
+        "is_appropriate", "confidence", "reasoning", "issues"
+    ]
+}
+
+BATCH_IMPACT_ANALYSIS_SCHEMA: Dict[str, Any] = {
+    "title": "analisis_impacto_lote",
+    "type": "object",
+    "properties": {
+        "analisis": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "indice": {"type": "integer", "minimum": 1},
+                    **IMPACT_ANALYSIS_SCHEMA["properties"]
+                },
+                "required": ["indice", *IMPACT_ANALYSIS_SCHEMA["required"]]
+            }
+        }
+    },
+    "required": ["analisis"]
+}
+
 
 @dataclass
 class LLMImpactAnalysis:
@@ -35,6 +83,7 @@ class LLMImpactAnalysis:
     confidence: float
     reasoning: str
     detected_issues: List[str]
+    degraded: bool = False  # True si el LLM no estaba disponible (circuito abierto/timeout): usar reglas
 
 
 @dataclass
@@ -44,6 +93,11 @@ class LLMNormativeBackingResult:
     backing_text: Optional[str]
     relevance_score: float
     reasoning: str
+    degraded: bool = False  # True si el LLM no estaba disponible (circuito abierto/timeout): usar reglas
+
+
+# error_type de robust_openai_call que indican un LLM no disponible (no un error de la respuesta)
+LLM_UNAVAILABLE_ERRORS = ("LLMProviderUnavailableError", "LLMProviderTimeoutError")
 
 
 class HierarchicalImpactLLMValidator:
@@ -56,6 +110,78 @@ class HierarchicalImpactLLMValidator:
     3. Evaluar coherencia con nivel jerárquico
     """
 
+    # ==========================================
+    # PROMPTS (v5.43: prefijo estático en system message)
+    # ==========================================
+    # Instrucciones y formato de respuesta son idénticos en todas las llamadas y
+    # van en el system message (reutilizable por la caché de prompt del servidor).
+
+    _IMPACT_ROLE = "Eres un experto en análisis de puestos de la Administración Pública Federal mexicana."
+
+    # Definición de dimensiones de impacto (compartida por prompts individual y por lote)
+    IMPACT_DIMENSIONS_GUIDE = """1. Analiza el ALCANCE real de esta función:
+   - local: afecta solo al departamento/área
+   - institutional: afecta a toda la institución
+   - interinstitutional: afecta a múltiples instituciones
+   - strategic_national: afecta a nivel nacional
+
+2. Analiza las CONSECUENCIAS de errores en esta función:
+   - operational: afecta operaciones diarias
+   - tactical: compromete metas/proyectos
+   - strategic: afecta objetivos estratégicos
+   - systemic: afecta sistema nacional
+
+3. Analiza la COMPLEJIDAD de esta función:
+   - routine: tareas repetitivas/procedimientos
+   - analytical: análisis/evaluación
+   - strategic: diseño/planeación estratégica
+   - transformational: transformación/reestructuración
+   - innovative: creación/innovación
+"""
+
+    IMPACT_SYSTEM_PROMPT = f"""{_IMPACT_ROLE}
+
+**TAREA:** Analiza el impacto jerárquico de la función indicada y determina si es apropiada para el nivel del puesto.
+
+**INSTRUCCIONES:**
+{IMPACT_DIMENSIONS_GUIDE}
+4. Determina si el impacto es APROPIADO para el nivel del puesto, considerando los rangos aceptables indicados
+
+Responde en JSON:
+{{
+  "scope_level": "local|institutional|interinstitutional|strategic_national",
+  "consequences_level": "operational|tactical|strategic|systemic",
+  "complexity_level": "routine|analytical|strategic|transformational|innovative",
+  "is_appropriate": true/false,
+  "confidence": 0.0-1.0,
+  "reasoning": "Explicación concisa de por qué es/no es apropiado",
+  "issues": ["lista", "de", "problemas"] // vacío si is_appropriate=true
+}}"""
+
+    BATCH_IMPACT_SYSTEM_PROMPT = f"""{_IMPACT_ROLE}
+
+**TAREA:** Analiza el impacto jerárquico de CADA UNA de las funciones indicadas y determina si es apropiada para el nivel del puesto.
+
+**INSTRUCCIONES (para cada función, de forma independiente):**
+{IMPACT_DIMENSIONS_GUIDE}
+4. Determina si el impacto es APROPIADO para el nivel del puesto, considerando los rangos aceptables indicados
+
+Responde en JSON con UN elemento por función en "analisis":
+{{
+  "analisis": [
+    {{
+      "indice": 1,
+      "scope_level": "local|institutional|interinstitutional|strategic_national",
+      "consequences_level": "operational|tactical|strategic|systemic",
+      "complexity_level": "routine|analytical|strategic|transformational|innovative",
+      "is_appropriate": true/false,
+      "confidence": 0.0-1.0,
+      "reasoning": "Explicación concisa (1 oración)",
+      "issues": []
+    }}
+  ]
+}}"""
+
     def __init__(self, context: APFContext):
         """
         Inicializa el validador LLM.
@@ -97,30 +223,122 @@ class HierarchicalImpactLLMValidator:
         try:
             response = robust_openai_call(
                 prompt=prompt,
+                system_message=self.IMPACT_SYSTEM_PROMPT,
+                response_schema=IMPACT_ANALYSIS_SCHEMA,
                 temperature=0.1,
                 max_tokens=800,
                 context=self.context
             )
 
             if response.get("status") == "success":
-                result = response["data"]
-
-                return LLMImpactAnalysis(
-                    scope_level=result.get("scope_level", "local"),
-                    consequences_level=result.get("consequences_level", "operational"),
-                    complexity_level=result.get("complexity_level", "routine"),
-                    is_appropriate_for_level=result.get("is_appropriate", False),
-                    confidence=result.get("confidence", 0.0),
-                    reasoning=result.get("reasoning", ""),
-                    detected_issues=result.get("issues", [])
-                )
+                return self._parse_impact_result(response["data"])
             else:
                 logger.error(f"[HierarchicalImpactLLMValidator] Error en LLM: {response.get('error')}")
-                return self._create_fallback_analysis()
+                return self._create_fallback_analysis(degraded=self._llm_unavailable(response))
 
         except Exception as e:
             logger.error(f"[HierarchicalImpactLLMValidator] Excepción en análisis: {e}")
-            return self._create_fallback_analysis()
+            return self._create_fallback_analysis(degraded=type(e).__name__ in LLM_UNAVAILABLE_ERRORS)
+
+    def analyze_functions_impact(
+        self,
+        funcs: List[str],
+        nivel_salarial: str,
+        expected_impact: Dict[str, str]
+    ) -> List[LLMImpactAnalysis]:
+        """
+        Analiza el impacto de TODAS las funciones de un puesto en una sola llamada LLM.
+
+        Args:
+            funcs: Textos completos de las funciones
+            nivel_salarial: Nivel del puesto (ej: "M1", "K12")
+            expected_impact: Perfil de impacto esperado para el nivel
+
+        Returns:
+            Lista de LLMImpactAnalysis en el mismo orden que `funcs`. Las funciones
+            sin análisis válido en la respuesta usan _create_fallback_analysis().
+        """
+        if not funcs:
+            return []
+
+        prompt = self._build_batch_impact_analysis_prompt(funcs, nivel_salarial, expected_impact)
+        analyses: List[Optional[LLMImpactAnalysis]] = [None] * len(funcs)
+        # Solo si el LLM no estaba disponible los fallbacks se marcan degraded
+        unavailable = False
+
+        try:
+            response = robust_openai_call(
+                prompt=prompt,
+                system_message=self.BATCH_IMPACT_SYSTEM_PROMPT,
+                response_schema=BATCH_IMPACT_ANALYSIS_SCHEMA,
+                temperature=0.1,
+                max_tokens=min(200 + 250 * len(funcs), 6000),
+                context=self.context
+            )
+
+            if response.get("status") == "success":
+                data = response["data"]
+                items = data.get("analisis", []) if isinstance(data, dict) else data
+                if not isinstance(items, list):
+                    items = []
+
+                for position, item in enumerate(items):
+                    if not isinstance(item, dict):
+                        continue
+                    try:
+                        offset = int(item.get("indice", position + 1)) - 1
+                    except (TypeError, ValueError):
+                        offset = position
+                    if not 0 <= offset < len(funcs) or analyses[offset] is not None:
+                        continue
+                    try:
+                        analyses[offset] = self._parse_impact_result(item, strict=True)
+                    except (KeyError, TypeError, ValueError) as e:
+                        logger.debug(f"[HierarchicalImpactLLMValidator] Item {offset + 1} inválido: {e}")
+            else:
+                logger.error(f"[HierarchicalImpactLLMValidator] Error en LLM (lote): {response.get('error')}")
+                unavailable = self._llm_unavailable(response)
+
+        except Exception as e:
+            logger.error(f"[HierarchicalImpactLLMValidator] Excepción en análisis por lote: {e}")
+            unavailable = type(e).__name__ in LLM_UNAVAILABLE_ERRORS
+
+        fallbacks = sum(1 for a in analyses if a is None)
+        if fallbacks:
+            logger.warning(
+                f"[HierarchicalImpactLLMValidator] {fallbacks}/{len(funcs)} funciones sin análisis válido → fallback"
+            )
+
+        return [a if a is not None else self._create_fallback_analysis(degraded=unavailable) for a in analyses]
+
+    def _parse_impact_result(self, result: Dict[str, Any], strict: bool = False) -> LLMImpactAnalysis:
+        """
+        Convierte el JSON del LLM en LLMImpactAnalysis.
+
+        Args:
+            result: Dict con scope_level, consequences_level, complexity_level, etc.
+            strict: Si True, exige niveles válidos (usado en modo por lotes)
+
+        Raises:
+            KeyError/ValueError: En modo strict, si faltan campos o hay valores inválidos
+        """
+        if strict:
+            if result["scope_level"] not in VALID_SCOPES:
+                raise ValueError(f"scope_level inválido: {result['scope_level']}")
+            if result["consequences_level"] not in VALID_CONSEQUENCES:
+                raise ValueError(f"consequences_level inválido: {result['consequences_level']}")
+            if result["complexity_level"] not in VALID_COMPLEXITIES:
+                raise ValueError(f"complexity_level inválido: {result['complexity_level']}")
+
+        return LLMImpactAnalysis(
+            scope_level=result.get("scope_level", "local"),
+            consequences_level=result.get("consequences_level", "operational"),
+            complexity_level=result.get("complexity_level", "routine"),
+            is_appropriate_for_level=bool(result.get("is_appropriate", False)),
+            confidence=float(result.get("confidence", 0.0) or 0.0),
+            reasoning=result.get("reasoning", ""),
+            detected_issues=result.get("issues", []) or []
+        )
 
     def search_normative_backing(
         self,
@@ -172,11 +390,11 @@ class HierarchicalImpactLLMValidator:
                 )
             else:
                 logger.error(f"[HierarchicalImpactLLMValidator] Error en búsqueda normativa: {response.get('error')}")
-                return self._create_fallback_backing()
+                return self._create_fallback_backing(degraded=self._llm_unavailable(response))
 
         except Exception as e:
             logger.error(f"[HierarchicalImpactLLMValidator] Excepción en búsqueda: {e}")
-            return self._create_fallback_backing()
+            return self._create_fallback_backing(degraded=type(e).__name__ in LLM_UNAVAILABLE_ERRORS)
 
     def _build_impact_analysis_prompt(
         self,
@@ -184,7 +402,44 @@ class HierarchicalImpactLLMValidator:
         nivel: str,
         expected_impact: Dict[str, str]
     ) -> str:
-        """Construye el prompt para análisis de impacto"""
+        """
+        Construye la parte VARIABLE del prompt para análisis de impacto.
+
+        Las instrucciones y el formato de respuesta van en IMPACT_SYSTEM_PROMPT;
+        la guía del nivel va antes de la función para compartir prefijo entre
+        funciones del mismo nivel.
+        """
+        return f"""{self._build_level_context(nivel, expected_impact)}
+**FUNCIÓN A ANALIZAR:**
+{funcion_text}
+"""
+
+    def _build_batch_impact_analysis_prompt(
+        self,
+        funcs: List[str],
+        nivel: str,
+        expected_impact: Dict[str, str]
+    ) -> str:
+        """Construye la parte VARIABLE del prompt para análisis de impacto por lote"""
+        funciones_txt = "\n".join(f"{i}. {text}" for i, text in enumerate(funcs, 1))
+
+        return f"""{self._build_level_context(nivel, expected_impact)}
+**FUNCIONES A ANALIZAR ({len(funcs)}):**
+{funciones_txt}
+"""
+
+    def _build_level_context(self, nivel: str, expected_impact: Dict[str, str]) -> str:
+        """Nivel del puesto, perfil ideal y rangos aceptables"""
+        return f"""**NIVEL DEL PUESTO:** {nivel}
+
+**PERFIL DE IMPACTO IDEAL (referencia):**
+- Alcance de decisiones: {expected_impact.get('decision_scope', 'N/A')}
+- Consecuencias de errores: {expected_impact.get('error_consequences', 'N/A')}
+- Complejidad: {expected_impact.get('complexity_level', 'N/A')}
+{self._build_ranges_guidance(nivel)}"""
+
+    def _build_ranges_guidance(self, nivel: str) -> str:
+        """Construye la guía de rangos de impacto aceptables para el nivel"""
 
         # Determinar si es nivel estratégico y obtener rangos aceptables
         from src.config.verb_hierarchy import extract_level_letter, get_acceptable_impact_ranges
@@ -192,7 +447,7 @@ class HierarchicalImpactLLMValidator:
         acceptable_ranges = get_acceptable_impact_ranges(nivel)
 
         # Construir guidance con rangos específicos
-        ranges_guidance = f"""
+        return f"""
 **RANGOS DE IMPACTO ACEPTABLES PARA NIVEL {nivel} ({letra}):**
 
 La evaluación debe considerar que para este nivel son APROPIADOS los siguientes valores:
@@ -206,53 +461,6 @@ NO es necesario que coincida exactamente con el perfil ideal - los rangos reflej
 legítima de funciones que puede tener un puesto de este nivel.
 """
 
-        return f"""Eres un experto en análisis de puestos de la Administración Pública Federal mexicana.
-
-**TAREA:** Analiza el impacto jerárquico de esta función y determina si es apropiada para el nivel del puesto.
-
-**NIVEL DEL PUESTO:** {nivel}
-
-**PERFIL DE IMPACTO IDEAL (referencia):**
-- Alcance de decisiones: {expected_impact.get('decision_scope', 'N/A')}
-- Consecuencias de errores: {expected_impact.get('error_consequences', 'N/A')}
-- Complejidad: {expected_impact.get('complexity_level', 'N/A')}
-{ranges_guidance}
-**FUNCIÓN A ANALIZAR:**
-{funcion_text}
-
-**INSTRUCCIONES:**
-1. Analiza el ALCANCE real de esta función:
-   - local: afecta solo al departamento/área
-   - institutional: afecta a toda la institución
-   - interinstitutional: afecta a múltiples instituciones
-   - strategic_national: afecta a nivel nacional
-
-2. Analiza las CONSECUENCIAS de errores en esta función:
-   - operational: afecta operaciones diarias
-   - tactical: compromete metas/proyectos
-   - strategic: afecta objetivos estratégicos
-   - systemic: afecta sistema nacional
-
-3. Analiza la COMPLEJIDAD de esta función:
-   - routine: tareas repetitivas/procedimientos
-   - analytical: análisis/evaluación
-   - strategic: diseño/planeación estratégica
-   - transformational: transformación/reestructuración
-   - innovative: creación/innovación
-
-4. Determina si el impacto es APROPIADO para el nivel del puesto
-
-Responde en JSON:
-{{
-  "scope_level": "local|institutional|interinstitutional|strategic_national",
-  "consequences_level": "operational|tactical|strategic|systemic",
-  "complexity_level": "routine|analytical|strategic|transformational|innovative",
-  "is_appropriate": true/false,
-  "confidence": 0.0-1.0,
-  "reasoning": "Explicación concisa de por qué es/no es apropiado",
-  "issues": ["lista", "de", "problemas"] // vacío si is_appropriate=true
-}}"""
-
     def _build_normative_search_prompt(
         self,
         funcion_text: str,
@@ -295,8 +503,19 @@ Responde en JSON:
   "reasoning": "Explicación de por qué sí/no hay respaldo"
 }}"""
 
-    def _create_fallback_analysis(self) -> LLMImpactAnalysis:
-        """Crea un análisis fallback en caso de error"""
+    @staticmethod
+    def _llm_unavailable(response: Dict[str, Any]) -> bool:
+        """True si robust_openai_call falló porque el LLM no estaba disponible"""
+        return response.get("error_type") in LLM_UNAVAILABLE_ERRORS
+
+    def _create_fallback_analysis(self, degraded: bool = False) -> LLMImpactAnalysis:
+        """
+        Crea un análisis fallback en caso de error.
+
+        Args:
+            degraded: True si el LLM no estaba disponible (Criterio 3 usa reglas); en
+                otros errores (JSON inválido, item faltante) se usa este fallback conservador
+        """
         return LLMImpactAnalysis(
             scope_level="local",
             consequences_level="operational",
@@ -304,14 +523,16 @@ Responde en JSON:
             is_appropriate_for_level=False,
             confidence=0.0,
             reasoning="Error en análisis LLM - usando fallback conservador",
-            detected_issues=["Error en llamada LLM"]
+            detected_issues=["Error en llamada LLM"],
+            degraded=degraded
         )
 
-    def _create_fallback_backing(self) -> LLMNormativeBackingResult:
-        """Crea un resultado fallback en caso de error"""
+    def _create_fallback_backing(self, degraded: bool = False) -> LLMNormativeBackingResult:
+        """Crea un resultado fallback en caso de error (degraded: ver _create_fallback_analysis)"""
         return LLMNormativeBackingResult(
             has_backing=False,
             backing_text=None,
             relevance_score=0.0,
-            reasoning="Error en búsqueda LLM - asumiendo sin respaldo por seguridad"
+            reasoning="Error en búsqueda LLM - asumiendo sin respaldo por seguridad",
+            degraded=degraded
         )
@@ -17,11 +17,24 @@ normativa, el loader (con embeddings) se reutiliza automáticamente, evitando:
 
 Ahorro estimado: 80-90% del tiempo de inicialización en análisis múltiples.
 
-Fecha: 2025-11-11
-Versión: 5.38 - Con caché de normativa para análisis múltiples
+OPTIMIZACIÓN v5.43:
+Ejecución concurrente de etapas - El análisis de calidad y los 3 criterios son
+independientes, por lo que se ejecutan como un DAG sobre un pool de hilos
+(StageDAGExecutor). Los tiempos por etapa y la ruta crítica se reportan en
+result["ejecucion"].
+
+Tiering en Criterio 1 (function_prescreen=True): FunctionPrescreener resuelve por
+reglas las funciones inequívocas y solo las ambiguas se evalúan con LLM
+(tasa de escalamiento en get_tiering_stats()).
+
+Fecha: 2025-11-12
+Versión: 5.43 - Etapas de validación concurrentes
 """
 
+import contextvars
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, asdict
 
@@ -29,8 +42,12 @@ from src.validators.criterion_3_validator import Criterion3Validator
 from src.validators.contextual_verb_validator import ContextualVerbValidator
 from src.validators.verb_semantic_analyzer import VerbSemanticAnalyzer
 from src.validators.function_semantic_evaluator import FunctionSemanticEvaluator
+from src.validators.function_prescreener import FunctionPrescreener
 from src.validators.advanced_quality_validator import AdvancedQualityValidator
 from src.validators.shared_utilities import APFContext
+from src.validators.context_budget import NormativaContextAssembler
+from src.providers.metrics import get_metrics_collector
+from src.validators.stage_executor import StageDAGExecutor
 from src.validators.in_memory_normativa_adapter import create_loader_from_fragments
 from src.validators.models import (
     Criterion1Result,
@@ -59,12 +76,21 @@ class IntegratedValidator:
     _normativa_cache = {}
     _normativa_cache_key = None
 
+    # Tope de hilos en modo diferido (workers de puesto + hilos de etapa de cada uno):
+    # cada hilo queda bloqueado hasta que su batch termina
+    DEFERRED_MAX_THREADS = 256
+
     def __init__(
         self,
         normativa_fragments: Optional[List[str]] = None,
         openai_api_key: Optional[str] = None,
         llm_provider: Optional[Any] = None,
-        use_normativa_cache: bool = True
+        use_normativa_cache: bool = True,
+        max_stage_workers: int = 4,
+        function_batch_size: int = 1,
+        function_prescreen: bool = False,
+        impact_batch_analysis: bool = False,
+        normativa_context_tokens: Optional[int] = None
     ):
         """
         Inicializa el validador integrado.
@@ -74,14 +100,29 @@ class IntegratedValidator:
             openai_api_key: API key de OpenAI (DEPRECATED - usar llm_provider)
             llm_provider: Provider LLM (OpenAIProvider u OllamaProvider)
             use_normativa_cache: Si True, reutiliza NormativaLoader de caché (default: True)
+            max_stage_workers: Etapas (calidad + 3 criterios) ejecutadas en paralelo por
+                puesto (default: 4, usar 1 para ejecución secuencial)
+            function_batch_size: Funciones evaluadas por llamada LLM en Criterio 1
+                (default: 1 = una llamada por función)
+            function_prescreen: Si True, Criterio 1 pre-evalúa cada función por reglas y
+                similitud normativa y solo escala al LLM las funciones ambiguas
+            impact_batch_analysis: Si True, Criterio 3 analiza el impacto de todas las
+                funciones del puesto en una sola llamada LLM (default: False = una
+                llamada por función; con Ollama requiere OLLAMA_NUM_CTX suficiente)
+            normativa_context_tokens: Presupuesto de tokens del contexto normativo en los
+                prompts (None = presupuesto por modelo de context_budget.MODEL_CONTEXT_BUDGETS)
         """
         self.normativa_fragments = normativa_fragments or []
         self.openai_api_key = openai_api_key
         self.llm_provider = llm_provider
         self.use_normativa_cache = use_normativa_cache
+        self.max_stage_workers = max_stage_workers
+        self.function_batch_size = function_batch_size
 
         # Crear contexto APF para validadores v4
         self.context = APFContext()
+        if normativa_context_tokens:
+            self.context.set_data('normativa_context_tokens', normativa_context_tokens, 'IntegratedValidator')
 
         # Si se provee un llm_provider, almacenarlo en el contexto
         if llm_provider:
@@ -144,16 +185,26 @@ class IntegratedValidator:
             context=self.context
         )
 
+        # Pre-evaluación por reglas/embeddings (v5.43: tiering antes del LLM)
+        self.function_prescreener = (
+            FunctionPrescreener(normativa_loader=self.normativa_loader) if function_prescreen else None
+        )
+
         # Inicializar Criterion3Validator v5.34 (CON LLM para análisis de impacto)
         self.criterion3_validator = Criterion3Validator(
             normativa_fragments=normativa_fragments,
             threshold=0.50,
             context=self.context,  # Pasar context para habilitar LLM
-            use_llm=True  # Activar análisis LLM
+            use_llm=True,  # Activar análisis LLM
+            batch_llm_analysis=impact_batch_analysis
         )
 
         # Inicializar AdvancedQualityValidator v5.33-new (análisis holístico de calidad)
         self.quality_validator = AdvancedQualityValidator(context=self.context)
+        # El prompt de calidad admite hasta 2000 caracteres de normativa (~450 tokens)
+        self.quality_context_assembler = NormativaContextAssembler(
+            context=self.context, budget_tokens=450, max_snippet_tokens=200
+        )
 
         provider_name = type(self.llm_provider).__name__ if self.llm_provider else "Sin Provider"
         logger.info(f"[IntegratedValidator] Inicializado con validadores LLM v4 + FunctionEvaluator v5.20 + Criterion3 v5.34 CON LLM + QualityValidator v5.33 | Provider: {provider_name}")
@@ -185,55 +236,35 @@ class IntegratedValidator:
 
         logger.info(f"[IntegratedValidator] Validando puesto {codigo}")
 
-        # Ejecutar análisis de calidad holístico (v5.33-new)
-        # Este análisis detecta: duplicados, malformadas, problemas legales, objetivo inadecuado
-        logger.info(f"[IntegratedValidator] Ejecutando análisis de calidad holístico...")
-        try:
-            # Obtener texto completo de normativa si está disponible
-            normativa_text = None
-            if self.normativa_loader and hasattr(self.normativa_loader, 'documents'):
-                # Concatenar primeros 3 documentos (limitar tamaño)
-                try:
-                    docs_list = list(self.normativa_loader.documents) if not isinstance(self.normativa_loader.documents, list) else self.normativa_loader.documents
-                    docs = docs_list[:3]
-                    normativa_text = "\n\n".join([doc.content[:1000] for doc in docs])
-                except Exception as doc_error:
-                    logger.warning(f"[IntegratedValidator] Error accediendo a documents: {doc_error}")
-                    normativa_text = None
-
-            quality_result = self.quality_validator.validate_puesto_completo(
-                puesto_data=puesto_data,
-                normativa_text=normativa_text
-            )
-            logger.info(
-                f"[IntegratedValidator] Análisis de calidad completado: "
-                f"{quality_result.total_flags} flags detectados "
-                f"(CRITICAL: {quality_result.flags_critical}, HIGH: {quality_result.flags_high}, "
-                f"MODERATE: {quality_result.flags_moderate}, LOW: {quality_result.flags_low})"
-            )
-        except Exception as e:
-            logger.error(f"[IntegratedValidator] Error en análisis de calidad: {e}")
-            # Crear resultado vacío si falla
-            from src.validators.advanced_quality_validator import QualityValidationResult
-            quality_result = QualityValidationResult(
-                duplicacion={"tiene_duplicados": False, "total_duplicados": 0, "pares_duplicados": []},
-                malformacion={"tiene_malformadas": False, "total_malformadas": 0, "funciones_problematicas": []},
-                marco_legal={"tiene_problemas": False, "total_problemas": 0, "problemas": []},
-                objetivo_general={"es_adecuado": True, "calificacion": 1.0, "problemas": []},
-                total_flags=0,
-                flags_critical=0,
-                flags_high=0,
-                flags_moderate=0,
-                flags_low=0
-            )
-
-        # Ejecutar 3 criterios CON LLM
-        criterion_1 = self._validate_criterion_1(codigo, funciones, nivel, puesto_data)
-        criterion_2 = self._validate_criterion_2(codigo, puesto_data)
-        criterion_3 = self.criterion3_validator.validate(
+        # Ejecutar análisis de calidad + 3 criterios como DAG de etapas (v5.43)
+        # Las 4 etapas son independientes entre sí (dominadas por I/O LLM), por lo que
+        # se ejecutan concurrentemente y se unen antes de la decisión final.
+        # Cada etapa se atribuye a su validador en las métricas LLM del puesto.
+        metrics = get_metrics_collector()
+        dag = StageDAGExecutor(max_workers=self.max_stage_workers)
+        dag.add_stage("calidad", metrics.scoped("calidad", lambda _: self._run_quality_analysis(puesto_data)))
+        dag.add_stage("criterio_1", metrics.scoped("criterio_1", lambda _: self._validate_criterion_1(
+            codigo, funciones, nivel, puesto_data
+        )))
+        dag.add_stage("criterio_2", metrics.scoped("criterio_2", lambda _: self._validate_criterion_2(codigo, puesto_data)))
+        dag.add_stage("criterio_3", metrics.scoped("criterio_3", lambda _: self.criterion3_validator.validate(
             puesto_codigo=codigo,
             nivel_salarial=nivel,
             funciones=funciones
+        )))
+        with metrics.track_puesto(codigo) as puesto_metrics:
+            stage_results = dag.run()
+
+        quality_result = stage_results["calidad"]
+        criterion_1 = stage_results["criterio_1"]
+        criterion_2 = stage_results["criterio_2"]
+        criterion_3 = stage_results["criterio_3"]
+
+        ejecucion = dag.get_report()
+        logger.info(
+            f"[IntegratedValidator] Etapas completadas en {ejecucion['duracion_total_s']:.2f}s "
+            f"(secuencial estimado: {ejecucion['duracion_secuencial_estimada_s']:.2f}s) | "
+            f"Ruta crítica: {' → '.join(ejecucion['ruta_critica'])}"
         )
 
         # Calcular decisión final
@@ -265,11 +296,67 @@ class IntegratedValidator:
                 },
                 "accion_requerida": final_decision.accion_requerida,
                 "razonamiento": final_decision.reasoning
-            }
+            },
+            "ejecucion": ejecucion,
+            "metricas_llm": puesto_metrics.to_dict()
         }
 
         return result
 
+    def _run_quality_analysis(self, puesto_data: Dict[str, Any]):
+        """
+        Ejecuta análisis de calidad holístico (v5.33-new).
+
+        Detecta: duplicados, malformadas, problemas legales, objetivo inadecuado.
+        Si falla, regresa un QualityValidationResult vacío.
+
+        Args:
+            puesto_data: Datos del puesto
+
+        Returns:
+            QualityValidationResult
+        """
+        logger.info(f"[IntegratedValidator] Ejecutando análisis de calidad holístico...")
+        try:
+            # Fragmentos normativos relevantes al puesto, dentro de presupuesto (v5.43)
+            normativa_text = None
+            if self.normativa_loader and hasattr(self.normativa_loader, 'semantic_search'):
+                try:
+                    query = f"{puesto_data.get('denominacion', '')} {puesto_data.get('objetivo_general', '')[:200]}"
+                    matches = self.normativa_loader.semantic_search(query=query, max_results=10) or []
+                    assembled = self.quality_context_assembler.assemble(matches, header="")
+                    normativa_text = assembled.text if assembled.included else None
+                except Exception as search_error:
+                    logger.warning(f"[IntegratedValidator] Error buscando normativa para calidad: {search_error}")
+                    normativa_text = None
+
+            quality_result = self.quality_validator.validate_puesto_completo(
+                puesto_data=puesto_data,
+                normativa_text=normativa_text
+            )
+            logger.info(
+                f"[IntegratedValidator] Análisis de calidad completado: "
+                f"{quality_result.total_flags} flags detectados "
+                f"(CRITICAL: {quality_result.flags_critical}, HIGH: {quality_result.flags_high}, "
+                f"MODERATE: {quality_result.flags_moderate}, LOW: {quality_result.flags_low})"
+            )
+            return quality_result
+        except Exception as e:
+            logger.error(f"[IntegratedValidator] Error en análisis de calidad: {e}")
+            # Crear resultado vacío si falla
+            from src.validators.advanced_quality_validator import QualityValidationResult
+            return QualityValidationResult(
+                duplicacion={"tiene_duplicados": False, "total_duplicados": 0, "pares_duplicados": []},
+                malformacion={"tiene_malformadas": False, "total_malformadas": 0, "funciones_problematicas": []},
+                marco_legal={"tiene_problemas": False, "total_problemas": 0, "problemas": []},
+                objetivo_general={"es_adecuado": True, "calificacion": 1.0, "problemas": []},
+                total_flags=0,
+                flags_critical=0,
+                flags_high=0,
+                flags_moderate=0,
+                flags_low=0
+            )
+
     def _validate_criterion_1(
         self,
         codigo: str,
@@ -307,41 +394,62 @@ class IntegratedValidator:
         observadas = []
         rechazadas = []
 
-        # Evaluar cada función con FunctionSemanticEvaluator
-        for idx, func in enumerate(funciones, 1):
-            try:
-                # Obtener texto completo de la función
-                funcion_text = func.get("descripcion_completa", "") or func.get("que_hace", "")
-                verbo = func.get("verbo_accion", "").strip()
-
-                # Fallback: extraer primer verbo si no está explícito
-                if not verbo and funcion_text:
-                    verbo = funcion_text.split()[0] if funcion_text.split() else "DESCONOCIDO"
-
-                # Evaluar función completa con 5 criterios LLM
-                evaluation = self.function_evaluator.evaluate_function(
-                    funcion_text=funcion_text,
-                    verbo=verbo,
-                    nivel_jerarquico=nivel_salarial[0] if nivel_salarial else "P",
-                    puesto_nombre=puesto_nombre,
-                    unidad=unidad
+        # Preparar (texto, verbo) de cada función
+        items = []
+        for func in funciones:
+            # Obtener texto completo de la función
+            funcion_text = func.get("descripcion_completa", "") or func.get("que_hace", "")
+            verbo = func.get("verbo_accion", "").strip()
+
+            # Fallback: extraer primer verbo si no está explícito
+            if not verbo and funcion_text:
+                verbo = funcion_text.split()[0] if funcion_text.split() else "DESCONOCIDO"
+
+            items.append({"funcion_text": funcion_text, "verbo": verbo})
+
+        nivel_jerarquico = nivel_salarial[0] if nivel_salarial else "P"
+
+        # Tiering v5.43: las funciones inequívocas se resuelven por reglas sin LLM
+        evaluations: List[Any] = [None] * total_functions
+        pending = list(range(total_functions))
+        if self.function_prescreener:
+            pending = []
+            for idx, item in enumerate(items):
+                pre = self.function_prescreener.prescreen(
+                    item["funcion_text"], item["verbo"], nivel_salarial, puesto_nombre
                 )
+                if pre.escalate:
+                    pending.append(idx)
+                else:
+                    evaluations[idx] = self.function_prescreener.to_evaluation(
+                        pre, item["funcion_text"], item["verbo"]
+                    )
+            logger.info(
+                f"[Criterio 1 v5.43] Pre-evaluación: {total_functions - len(pending)} resueltas por reglas, "
+                f"{len(pending)} escaladas a LLM"
+            )
 
-                # Clasificar según resultado
-                if evaluation.clasificacion == "APROBADO":
-                    aprobadas.append(evaluation)
-                    logger.debug(f"   Función {idx}: APROBADO (score={evaluation.score_global:.2f})")
-                elif evaluation.clasificacion == "OBSERVACION":
-                    observadas.append(evaluation)
-                    logger.debug(f"   Función {idx}: OBSERVACION (score={evaluation.score_global:.2f})")
-                else:  # RECHAZADO
-                    rechazadas.append(evaluation)
-                    logger.warning(f"   Función {idx}: RECHAZADO (score={evaluation.score_global:.2f}) - {verbo}")
+        # Evaluar funciones pendientes con FunctionSemanticEvaluator (5 criterios LLM)
+        llm_evaluations = self._evaluate_functions_llm(
+            [items[i] for i in pending], nivel_jerarquico, puesto_nombre, unidad
+        )
+        for idx, evaluation in zip(pending, llm_evaluations):
+            evaluations[idx] = evaluation
 
-            except Exception as e:
-                logger.error(f"[Criterio 1 v5.20] Error evaluando función {idx}: {e}")
+        # Clasificar según resultado
+        for idx, (item, evaluation) in enumerate(zip(items, evaluations), 1):
+            if evaluation is None:
                 # Fallback: clasificar como RECHAZADO
                 rechazadas.append(None)  # Placeholder para contar
+            elif evaluation.clasificacion == "APROBADO":
+                aprobadas.append(evaluation)
+                logger.debug(f"   Función {idx}: APROBADO (score={evaluation.score_global:.2f})")
+            elif evaluation.clasificacion == "OBSERVACION":
+                observadas.append(evaluation)
+                logger.debug(f"   Función {idx}: OBSERVACION (score={evaluation.score_global:.2f})")
+            else:  # RECHAZADO
+                rechazadas.append(evaluation)
+                logger.warning(f"   Función {idx}: RECHAZADO (score={evaluation.score_global:.2f}) - {item['verbo']}")
 
         # Calcular tasas
         tasa_aprobadas = len(aprobadas) / total_functions if total_functions > 0 else 0.0
@@ -376,10 +484,70 @@ class IntegratedValidator:
             details={
                 "aprobadas": [e.to_dict() for e in aprobadas if e],
                 "observadas": [e.to_dict() for e in observadas if e],
-                "rechazadas": [e.to_dict() for e in rechazadas if e]
+                "rechazadas": [e.to_dict() for e in rechazadas if e],
+                "tiering": {
+                    "resueltas_sin_llm": total_functions - len(pending),
+                    "escaladas_llm": len(pending)
+                }
             }
         )
 
+    def _evaluate_functions_llm(
+        self,
+        items: List[Dict[str, str]],
+        nivel_jerarquico: str,
+        puesto_nombre: str,
+        unidad: str
+    ) -> List[Any]:
+        """
+        Evalúa funciones con FunctionSemanticEvaluator (por lotes o una por una).
+
+        Returns:
+            Lista de FunctionEvaluationResult (None si la evaluación falló) en el
+            mismo orden que `items`
+        """
+        if not items:
+            return []
+
+        if self.function_batch_size > 1 and len(items) > 1:
+            try:
+                return self.function_evaluator.evaluate_functions_batch(
+                    funciones=items,
+                    nivel_jerarquico=nivel_jerarquico,
+                    puesto_nombre=puesto_nombre,
+                    unidad=unidad,
+                    batch_size=self.function_batch_size
+                )
+            except Exception as e:
+                logger.error(f"[Criterio 1 v5.20] Error en evaluación por lotes: {e}")
+                return [None] * len(items)
+
+        evaluations = []
+        for idx, item in enumerate(items, 1):
+            try:
+                evaluations.append(self.function_evaluator.evaluate_function(
+                    funcion_text=item["funcion_text"],
+                    verbo=item["verbo"],
+                    nivel_jerarquico=nivel_jerarquico,
+                    puesto_nombre=puesto_nombre,
+                    unidad=unidad
+                ))
+            except Exception as e:
+                logger.error(f"[Criterio 1 v5.20] Error evaluando función {idx}: {e}")
+                evaluations.append(None)
+        return evaluations
+
+    def get_tiering_stats(self) -> Dict[str, Any]:
+        """
+        Estadísticas de pre-evaluación de Criterio 1 (tasa de escalamiento al LLM).
+
+        Returns:
+            Dict de FunctionPrescreener.get_tiering_stats() o {"enabled": False}
+        """
+        if not self.function_prescreener:
+            return {"enabled": False}
+        return {"enabled": True, **self.function_prescreener.get_tiering_stats()}
+
     def _validate_criterion_2(
         self,
         codigo: str,
@@ -708,43 +876,115 @@ class IntegratedValidator:
     def validate_batch(
         self,
         puestos: List[Dict[str, Any]],
-        progress_callback: Optional[callable] = None
+        progress_callback: Optional[callable] = None,
+        max_workers: int = 1,
+        rate_limiter: Optional[Any] = None,
+        deferred: bool = False,
+        deferred_workers: int = 64,
+        deferred_timeout_s: Optional[float] = None
     ) -> List[Dict[str, Any]]:
         """
         Valida múltiples puestos en lote.
 
+        Con max_workers > 1 los puestos se validan en paralelo sobre un pool de
+        hilos (v5.43). El orden de los resultados siempre corresponde al orden de
+        entrada y progress_callback se invoca desde el hilo que llama (seguro
+        para Streamlit).
+
         Args:
             puestos: Lista de puestos a validar
             progress_callback: Callback(progreso_pct) para reportar progreso
+            max_workers: Puestos validados simultáneamente (default: 1 = secuencial)
+            rate_limiter: RateLimiter global (requests/min y tokens/min) aplicado a
+                todas las llamadas LLM del lote (opcional)
+            deferred: Si True, las llamadas LLM se envían por la Batch API de OpenAI
+                (OpenAIBatchProvider): más baratas y sin límites de rate, pero con
+                latencia de minutos a horas. Requiere un provider de OpenAI
+            deferred_workers: Puestos validados simultáneamente en modo diferido; cada
+                ronda de llamadas de estos puestos viaja en un mismo batch. Se acota para
+                que puestos × (1 + max_stage_workers) no pase de DEFERRED_MAX_THREADS
+            deferred_timeout_s: Espera máxima por cada resultado del batch (None = default
+                de OpenAIBatchProvider, ventana de 24h + margen). Al agotarse, el puesto
+                termina con resultado ERROR
 
         Returns:
-            Lista de resultados de validación
+            Lista de resultados de validación (mismo orden que `puestos`)
         """
-        results = []
         total = len(puestos)
+        results: List[Optional[Dict[str, Any]]] = [None] * total
 
-        for idx, puesto in enumerate(puestos):
+        original_provider = self.context.get_data('llm_provider')
+        batch_provider = None
+        if deferred and original_provider is not None:
+            # Modo diferido: la Batch API tiene su propia cola, no aplica el rate limiter
+            from src.providers.openai_batch import OpenAIBatchProvider
             try:
-                result = self.validate_puesto(puesto)
-                results.append(result)
+                batch_kwargs = {}
+                if deferred_timeout_s is not None:
+                    batch_kwargs["result_timeout_s"] = deferred_timeout_s
+                batch_provider = OpenAIBatchProvider.from_provider(original_provider, **batch_kwargs)
+                self.context.set_data('llm_provider', batch_provider, 'IntegratedValidator')
+                max_thread_workers = max(1, self.DEFERRED_MAX_THREADS // (1 + self.max_stage_workers))
+                max_workers = min(max(max_workers, min(total, deferred_workers)), max_thread_workers)
+                logger.info(f"[IntegratedValidator] Modo diferido (Batch API): {total} puestos, {max_workers} workers")
+            except ValueError as e:
+                logger.warning(f"[IntegratedValidator] Modo diferido no disponible, se usa modo síncrono: {e}")
+        elif rate_limiter is not None and original_provider is not None:
+            # Envolver provider con el limitador global durante el lote
+            from src.providers.rate_limiter import RateLimitedProvider
+            self.context.set_data('llm_provider', RateLimitedProvider(original_provider, rate_limiter), 'IntegratedValidator')
+
+        # Mantener residente el modelo local durante el lote (OllamaProvider / Router)
+        batch_session = getattr(original_provider, 'batch_session', None)
+        residency = batch_session() if callable(batch_session) else nullcontext()
 
-                # Reportar progreso
-                if progress_callback:
-                    progress_pct = int((idx + 1) / total * 100)
-                    progress_callback(progress_pct)
-
-            except Exception as e:
-                logger.error(f"Error validando puesto {puesto.get('codigo')}: {e}")
-                # Agregar resultado de error
-                results.append({
-                    "puesto": {
-                        "codigo": puesto.get("codigo", "UNKNOWN"),
-                        "error": str(e)
-                    },
-                    "validacion": {
-                        "resultado": "ERROR",
-                        "mensaje": f"Error al procesar: {str(e)}"
-                    }
-                })
+        try:
+            with residency:
+                if max_workers <= 1 or total <= 1:
+                    for idx, puesto in enumerate(puestos):
+                        results[idx] = self._validate_puesto_safe(puesto)
+                        if progress_callback:
+                            progress_callback(int((idx + 1) / total * 100))
+                else:
+                    logger.info(f"[IntegratedValidator] Validación paralela: {total} puestos, {max_workers} workers")
+                    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="puesto") as pool:
+                        futures = {
+                            pool.submit(contextvars.copy_context().run, self._validate_puesto_safe, puesto): idx
+                            for idx, puesto in enumerate(puestos)
+                        }
+                        try:
+                            for completed, future in enumerate(as_completed(futures), 1):
+                                results[futures[future]] = future.result()
+                                if progress_callback:
+                                    progress_callback(int(completed / total * 100))
+                        except BaseException:
+                            # Interrupción (p. ej. Ctrl+C): no esperar a que terminen los batches
+                            pool.shutdown(wait=False, cancel_futures=True)
+                            if batch_provider is not None:
+                                batch_provider.cancel()
+                            raise
+        finally:
+            if batch_provider is not None:
+                batch_provider.close()
+                logger.info(f"[IntegratedValidator] Batch API: {batch_provider.get_batch_stats()}")
+            if self.context.get_data('llm_provider') is not original_provider:
+                self.context.set_data('llm_provider', original_provider, 'IntegratedValidator')
 
         return results
+
+    def _validate_puesto_safe(self, puesto: Dict[str, Any]) -> Dict[str, Any]:
+        """Valida un puesto y convierte excepciones en un resultado de ERROR"""
+        try:
+            return self.validate_puesto(puesto)
+        except Exception as e:
+            logger.error(f"Error validando puesto {puesto.get('codigo')}: {e}")
+            return {
+                "puesto": {
+                    "codigo": puesto.get("codigo", "UNKNOWN"),
+                    "error": str(e)
+                },
+                "validacion": {
+                    "resultado": "ERROR",
+                    "mensaje": f"Error al procesar: {str(e)}"
+                }
+            }
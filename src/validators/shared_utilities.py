@@ -11,6 +11,7 @@ import traceback
 import os
 import re
 import hashlib
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, List, Optional, Union, Tuple
@@ -205,11 +206,15 @@ class APFContext:
     """
     Contexto unificado para todo el sistema APF.
     Reemplaza ActionContext y SharedActionContext con funcionalidad consolidada.
+
+    Thread-safe (v5.43): las mutaciones se protegen con un RLock para permitir
+    que varias etapas/puestos compartan el contexto desde distintos hilos.
     """
     
     def __init__(self, context_id: str = None):
         self.context_id = context_id or self._generate_context_id()
         self.created_at = datetime.now()
+        self._lock = threading.RLock()
         
         # Datos principales
         self.data = {}
@@ -243,11 +248,12 @@ class APFContext:
             value: Valor a almacenar
             agent_name: Nombre del agente que establece el dato
         """
-        self.data[key] = value
-        self.metadata["last_updated"] = datetime.now()
-        
-        if agent_name and agent_name not in self.metadata["agents_involved"]:
-            self.metadata["agents_involved"].append(agent_name)
+        with self._lock:
+            self.data[key] = value
+            self.metadata["last_updated"] = datetime.now()
+
+            if agent_name and agent_name not in self.metadata["agents_involved"]:
+                self.metadata["agents_involved"].append(agent_name)
         
         if LOGGING_CONFIG["enable_detailed_logging"]:
             print(f"[CONTEXT {self.context_id}] Set {key}: {type(value).__name__}")
@@ -324,18 +330,20 @@ class APFContext:
             status="running",
             start_time=datetime.now()
         )
-        self.processing_steps[step_name] = step
-        
-        if agent_name and agent_name not in self.metadata["agents_involved"]:
-            self.metadata["agents_involved"].append(agent_name)
+        with self._lock:
+            self.processing_steps[step_name] = step
+
+            if agent_name and agent_name not in self.metadata["agents_involved"]:
+                self.metadata["agents_involved"].append(agent_name)
         
         if LOGGING_CONFIG["enable_detailed_logging"]:
             print(f"[STEP] {step_name} iniciado por {agent_name or 'sistema'}")
     
     def complete_step(self, step_name: str, result_summary: str = None) -> None:
         """Completa un paso de procesamiento"""
-        if step_name in self.processing_steps:
-            step = self.processing_steps[step_name]
+        with self._lock:
+            step = self.processing_steps.get(step_name)
+        if step is not None:
             step.status = "completed"
             step.end_time = datetime.now()
             step.result_summary = result_summary
@@ -346,8 +354,9 @@ class APFContext:
     
     def fail_step(self, step_name: str, error: str) -> None:
         """Marca un paso como fallido"""
-        if step_name in self.processing_steps:
-            step = self.processing_steps[step_name]
+        with self._lock:
+            step = self.processing_steps.get(step_name)
+        if step is not None:
             step.status = "failed"
             step.end_time = datetime.now()
             step.error = error
@@ -361,7 +370,8 @@ class APFContext:
             "timestamp": datetime.now(),
             "agent": agent_name
         }
-        self.errors.append(error_entry)
+        with self._lock:
+            self.errors.append(error_entry)
         
         if LOGGING_CONFIG["log_errors_only"] or LOGGING_CONFIG["enable_detailed_logging"]:
             print(f"[ERROR] {agent_name or 'Sistema'}: {error}")
@@ -373,15 +383,18 @@ class APFContext:
             "timestamp": datetime.now(),
             "agent": agent_name
         }
-        self.warnings.append(warning_entry)
+        with self._lock:
+            self.warnings.append(warning_entry)
         
         if LOGGING_CONFIG["enable_detailed_logging"]:
             print(f"[WARNING] {agent_name or 'Sistema'}: {warning}")
     
     def get_summary(self) -> Dict[str, Any]:
         """Obtiene resumen completo del contexto"""
-        completed_steps = len([s for s in self.processing_steps.values() if s.status == "completed"])
-        failed_steps = len([s for s in self.processing_steps.values() if s.status == "failed"])
+        with self._lock:
+            steps = list(self.processing_steps.values())
+        completed_steps = len([s for s in steps if s.status == "completed"])
+        failed_steps = len([s for s in steps if s.status == "failed"])
         
         return {
             "context_id": self.context_id,
@@ -583,11 +596,21 @@ def robust_openai_call(prompt: str,
                       max_tokens: int = 800,
                       model: str = None,
                       temperature: float = 0.1,
-                      context: APFContext = None) -> Dict[str, Any]:
+                      context: APFContext = None,
+                      system_message: Optional[str] = None,
+                      response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Llamada robusta a LLM con manejo mejorado y logging.
     ADAPTADO PARA V5 DOCKER: Usa llm_provider del contexto (Ollama o OpenAI).
 
+    system_message (v5.43): prefijo ESTÁTICO (instrucciones, formato de respuesta)
+    enviado como mensaje de sistema. Mantenerlo idéntico entre llamadas permite que
+    el servidor reutilice la caché de prompt (llama.cpp KV cache / OpenAI prompt caching).
+
+    response_schema (v5.43): JSON Schema de la respuesta. El provider restringe la
+    generación al esquema (Ollama "format" / OpenAI structured outputs), evitando
+    reparaciones de JSON malformado y reintentos.
+
     IMPORTANTE: Requiere que el contexto tenga un llm_provider configurado.
     En Docker, esto será OllamaProvider.
 
@@ -631,7 +654,9 @@ def robust_openai_call(prompt: str,
                 prompt=prompt,
                 model=model,
                 max_tokens=max_tokens,
-                temperature=temperature
+                temperature=temperature,
+                system_message=system_message,
+                response_schema=response_schema
             )
 
             # Llamar a complete_json() que parsea JSON automáticamente
@@ -665,7 +690,9 @@ def robust_openai_call(prompt: str,
         error_msg = f"Error en llamada LLM: {str(e)}\n{traceback.format_exc()}"
         if context:
             context.fail_step("llm_call", error_msg)
-        return {"status": "error", "error": error_msg}
+        # error_type permite a los validadores distinguir un proveedor no disponible
+        # (LLMProviderUnavailableError: circuito abierto) y degradar a reglas
+        return {"status": "error", "error": error_msg, "error_type": type(e).__name__}
 
 # ==========================================
 # PROCESAMIENTO DE DOCUMENTOS UNIFICADO
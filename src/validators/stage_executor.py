@@ -0,0 +1,265 @@
+"""
+Ejecutor DAG de Etapas de Validación
+
+Ejecuta etapas independientes (análisis de calidad, criterios 1-3) de forma
+concurrente respetando dependencias declaradas, y registra tiempos por etapa
+para identificar la ruta crítica de la validación de un puesto.
+
+Las etapas son funciones que reciben un Dict con los resultados de sus
+dependencias y regresan su propio resultado. Con max_workers=1 las etapas se
+ejecutan en el hilo actual, en orden topológico (comportamiento secuencial).
+
+Fecha: 2025-11-12
+Versión: 5.43
+"""
+
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StageTiming:
+    """Tiempos de ejecución de una etapa (segundos relativos al inicio del DAG)"""
+    name: str
+    depends_on: List[str]
+    start: float = 0.0
+    end: float = 0.0
+    status: str = "pending"  # pending | completed | failed | skipped
+    error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return max(0.0, self.end - self.start)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "inicio_s": round(self.start, 3),
+            "fin_s": round(self.end, 3),
+            "duracion_s": round(self.duration, 3),
+            "estado": self.status,
+            "depende_de": list(self.depends_on),
+            "error": self.error
+        }
+
+
+@dataclass
+class _Stage:
+    name: str
+    func: Callable[[Dict[str, Any]], Any]
+    depends_on: List[str] = field(default_factory=list)
+
+
+class StageDAGExecutor:
+    """
+    Ejecutor de etapas con dependencias (DAG) sobre un pool de hilos.
+
+    Las etapas de validación están dominadas por llamadas LLM (I/O), por lo que
+    un pool de hilos es suficiente para solaparlas.
+
+    Example:
+        >>> dag = StageDAGExecutor(max_workers=4)
+        >>> dag.add_stage("calidad", lambda deps: validar_calidad())
+        >>> dag.add_stage("criterio_1", lambda deps: validar_c1())
+        >>> resultados = dag.run()
+        >>> dag.critical_path()
+    """
+
+    def __init__(self, max_workers: int = 4):
+        """
+        Args:
+            max_workers: Máximo de etapas ejecutándose a la vez (1 = secuencial)
+        """
+        self.max_workers = max(1, int(max_workers))
+        self._stages: Dict[str, _Stage] = {}
+        self.timings: Dict[str, StageTiming] = {}
+        self.total_duration = 0.0
+
+    def add_stage(
+        self,
+        name: str,
+        func: Callable[[Dict[str, Any]], Any],
+        depends_on: Optional[List[str]] = None
+    ) -> "StageDAGExecutor":
+        """
+        Registra una etapa.
+
+        Args:
+            name: Nombre único de la etapa
+            func: Callable(resultados_dependencias) -> resultado
+            depends_on: Nombres de etapas que deben terminar antes
+
+        Raises:
+            ValueError: Si la etapa ya existe o depende de una etapa no registrada
+        """
+        if name in self._stages:
+            raise ValueError(f"Etapa duplicada: {name}")
+
+        deps = list(depends_on or [])
+        for dep in deps:
+            if dep not in self._stages:
+                raise ValueError(f"Etapa '{name}' depende de etapa no registrada: '{dep}'")
+
+        self._stages[name] = _Stage(name=name, func=func, depends_on=deps)
+        return self
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Ejecuta todas las etapas respetando dependencias.
+
+        Returns:
+            Dict {nombre_etapa: resultado}
+
+        Raises:
+            Exception: La primera excepción lanzada por alguna etapa (las etapas
+                dependientes de una etapa fallida no se ejecutan)
+        """
+        self.timings = {
+            name: StageTiming(name=name, depends_on=stage.depends_on)
+            for name, stage in self._stages.items()
+        }
+        results: Dict[str, Any] = {}
+        errors: List[BaseException] = []
+        t0 = time.perf_counter()
+
+        if self.max_workers == 1:
+            self._run_sequential(results, errors, t0)
+        else:
+            self._run_parallel(results, errors, t0)
+
+        self.total_duration = time.perf_counter() - t0
+
+        if errors:
+            raise errors[0]
+
+        return results
+
+    def critical_path(self) -> List[str]:
+        """
+        Calcula la ruta crítica: cadena de etapas que determina la duración total.
+
+        Returns:
+            Lista de nombres de etapa desde la primera hasta la última en terminar
+        """
+        finished = [t for t in self.timings.values() if t.status in ("completed", "failed")]
+        if not finished:
+            return []
+
+        path = []
+        current = max(finished, key=lambda t: t.end)
+        while current is not None:
+            path.append(current.name)
+            deps = [self.timings[d] for d in current.depends_on if self.timings[d].status != "pending"]
+            current = max(deps, key=lambda t: t.end) if deps else None
+
+        return list(reversed(path))
+
+    def get_report(self) -> Dict[str, Any]:
+        """Resumen serializable de la ejecución (tiempos por etapa y ruta crítica)"""
+        sum_durations = sum(t.duration for t in self.timings.values())
+        return {
+            "modo": "secuencial" if self.max_workers == 1 else "paralelo",
+            "max_workers": self.max_workers,
+            "duracion_total_s": round(self.total_duration, 3),
+            "duracion_secuencial_estimada_s": round(sum_durations, 3),
+            "etapas": {name: t.to_dict() for name, t in self.timings.items()},
+            "ruta_critica": self.critical_path()
+        }
+
+    # ==========================================
+    # MÉTODOS PRIVADOS
+    # ==========================================
+
+    def _ready_stages(self, done: set, running: set, blocked: set) -> List[str]:
+        return [
+            name for name, stage in self._stages.items()
+            if name not in done and name not in running and name not in blocked
+            and all(dep in done for dep in stage.depends_on)
+        ]
+
+    def _blocked_by_failure(self, failed: set) -> set:
+        """Etapas que no pueden ejecutarse porque alguna dependencia (transitiva) falló"""
+        blocked = set()
+        changed = True
+        while changed:
+            changed = False
+            for name, stage in self._stages.items():
+                if name in blocked or name in failed:
+                    continue
+                if any(dep in failed or dep in blocked for dep in stage.depends_on):
+                    blocked.add(name)
+                    changed = True
+        return blocked
+
+    def _execute(self, stage: _Stage, results: Dict[str, Any], t0: float) -> Any:
+        timing = self.timings[stage.name]
+        deps_results = {dep: results[dep] for dep in stage.depends_on}
+        timing.start = time.perf_counter() - t0
+        try:
+            return stage.func(deps_results)
+        finally:
+            timing.end = time.perf_counter() - t0
+
+    def _run_sequential(self, results: Dict[str, Any], errors: List[BaseException], t0: float) -> None:
+        done, failed = set(), set()
+        while True:
+            blocked = self._blocked_by_failure(failed)
+            ready = self._ready_stages(done | failed, set(), blocked)
+            if not ready:
+                break
+            stage = self._stages[ready[0]]
+            try:
+                results[stage.name] = self._execute(stage, results, t0)
+                self.timings[stage.name].status = "completed"
+                done.add(stage.name)
+            except Exception as e:
+                self._mark_failed(stage.name, e)
+                failed.add(stage.name)
+                errors.append(e)
+
+        self._mark_skipped(done, failed)
+
+    def _run_parallel(self, results: Dict[str, Any], errors: List[BaseException], t0: float) -> None:
+        done, failed = set(), set()
+        running: Dict[Any, str] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="etapa") as pool:
+            while True:
+                blocked = self._blocked_by_failure(failed)
+                for name in self._ready_stages(done | failed, set(running.values()), blocked):
+                    # Propagar los contextvars del hilo llamador al hilo de la etapa
+                    ctx = contextvars.copy_context()
+                    future = pool.submit(ctx.run, self._execute, self._stages[name], results, t0)
+                    running[future] = name
+
+                if not running:
+                    break
+
+                completed, _ = wait(list(running.keys()), return_when=FIRST_COMPLETED)
+                for future in completed:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                        self.timings[name].status = "completed"
+                        done.add(name)
+                    except Exception as e:
+                        self._mark_failed(name, e)
+                        failed.add(name)
+                        errors.append(e)
+
+        self._mark_skipped(done, failed)
+
+    def _mark_failed(self, name: str, error: Exception) -> None:
+        self.timings[name].status = "failed"
+        self.timings[name].error = str(error)
+        logger.error(f"[StageDAGExecutor] Etapa '{name}' falló: {error}")
+
+    def _mark_skipped(self, done: set, failed: set) -> None:
+        for name, timing in self.timings.items():
+            if name not in done and name not in failed:
+                timing.status = "skipped"
@@ -23,9 +23,34 @@ sys.path.insert(0, str(root_dir))
 # Importar parser de texto
 from src.utils.text_puesto_parser import parse_and_convert
 
+@st.cache_resource(show_spinner=False)
+def prewarm_local_model():
+    """
+    Pre-carga el modelo de Ollama al abrir la app (una vez por proceso).
+
+    La carga corre en segundo plano mientras el usuario sube archivos, de modo que
+    la primera validación no paga la carga completa del modelo.
+    """
+    if os.getenv('LLM_PROVIDER', 'openai').lower() not in ('ollama', 'router'):
+        return None
+    if os.getenv('OLLAMA_PREWARM', 'true').lower() != 'true':
+        return None
+
+    from src.providers.ollama_residency import get_residency_manager
+
+    manager = get_residency_manager(
+        os.getenv('OLLAMA_BASE_URL', 'http://ollama:11434'),
+        keep_alive=os.getenv('OLLAMA_KEEP_ALIVE', '30m')
+    )
+    manager.warm_up_async(os.getenv('LLM_MODEL', 'phi3.5'))
+    return manager
+
+
 def show():
     """Renderiza la página de nuevo análisis"""
 
+    prewarm_local_model()
+
     st.title("🆕 Nuevo Análisis")
     st.markdown("### Wizard de Configuración - 4 Pasos")
 
@@ -132,7 +157,7 @@ def step_1_upload_files():
 
                         if has_required:
                             # Contar puestos
-                            df_puestos = pd.read_excel(uploaded_sidegor, sheet_name='PUESTOS')
+                            df_puestos = excel_file.parse(sheet_name='PUESTOS')
                             num_puestos = len(df_puestos)
 
                             st.success(f"✅ Archivo válido")
@@ -670,7 +695,10 @@ def execute_analysis():
 
     # Determinar qué LLM se está usando
     llm_provider_type = os.getenv('LLM_PROVIDER', 'openai').lower()
-    llm_info = "Ollama (Phi-3.5 Local)" if llm_provider_type == 'ollama' else "GPT-4o-mini (API)"
+    llm_info = {
+        'ollama': "Ollama (Phi-3.5 Local)",
+        'router': "Router (Ollama local + desborde a OpenAI)"
+    }.get(llm_provider_type, "GPT-4o-mini (API)")
     st.info(f"🔄 Iniciando análisis con sistema de validación v5.42 (Estable) - LLM: {llm_info}...")
 
     try:
@@ -786,93 +814,61 @@ def execute_analysis():
                 filters = st.session_state.filters_config
                 st.info(f"🔍 DEBUG: Filtros activos: {filters}")
 
-                status_text.text(f"🔍 Procesando {len(codigos_puestos)} puestos...")
+                # Pushdown: evaluar los filtros sobre la hoja PUESTOS y convertir
+                # solo los códigos que los cumplen
+                from src.filters import URFilter, NivelSalarialFilter, CodigoPuestoFilter
+
+                filtros_pushdown = []
+                if filters.get('ur'):
+                    filtros_pushdown.append(('ur', URFilter([filters['ur']])))
+                if filters.get('niveles'):
+                    filtros_pushdown.append(('nivel', NivelSalarialFilter(filters['niveles'])))
+                if filters.get('codigo_pattern'):
+                    patrones = [p.strip() for p in filters['codigo_pattern'].split(',') if p.strip()]
+                    filtros_pushdown.append(('codigo', CodigoPuestoFilter(patrones)))
+
+                df_puestos = adapter.extractor.get_all_puestos()
+                mascara = pd.Series(True, index=df_puestos.index)
+                rechazados = {'ur': 0, 'nivel': 0, 'codigo': 0}
+
+                for nombre_filtro, filtro in filtros_pushdown:
+                    antes = int(mascara.sum())
+                    mascara &= filtro.mask(df_puestos)
+                    rechazados[nombre_filtro] = antes - int(mascara.sum())
+
+                col_codigo = adapter.extractor.columnas_codigo.get('PUESTOS')
+                if filtros_pushdown and col_codigo is not None:
+                    codigos_aprobados = set(df_puestos.loc[mascara, col_codigo].dropna())
+                    codigos_a_convertir = [c for c in codigos_puestos if c in codigos_aprobados]
+                else:
+                    codigos_a_convertir = codigos_puestos
+
+                status_text.text(f"🔍 Procesando {len(codigos_a_convertir)} de {len(codigos_puestos)} puestos...")
 
                 # Contadores para debugging
                 procesados = 0
-                rechazados_por_ur = 0
-                rechazados_por_nivel = 0
+                rechazados_por_ur = rechazados['ur']
+                rechazados_por_nivel = rechazados['nivel']
+                rechazados_por_codigo = rechazados['codigo']
                 sin_funciones = 0
                 con_error = 0
 
-                for idx, codigo_puesto in enumerate(codigos_puestos):
+                # Convertir puestos al formato APF (una sola pasada por hoja)
+                conversiones = adapter.convertir_todos(codigos_a_convertir)
+
+                for idx, (codigo_puesto, puesto_data) in enumerate(conversiones):
                     # Actualizar progreso cada 10 puestos
                     if idx % 10 == 0:
-                        progress_bar.progress(30 + int((idx / len(codigos_puestos)) * 15))
+                        progress_bar.progress(30 + int((idx / len(codigos_a_convertir)) * 15))
 
-                    # Convertir puesto al formato APF
-                    puesto_data = adapter.convertir_puesto(codigo_puesto)
                     procesados += 1
 
                     if 'error' in puesto_data:
                         con_error += 1
                         continue
 
-                    # Aplicar filtros básicos
-                    if filters.get('unidad_responsable'):
-                        ur = puesto_data.get('identificacion_puesto', {}).get('unidad_responsable', '')
-                        if filters['unidad_responsable'] and filters['unidad_responsable'] not in ur:
-                            rechazados_por_ur += 1
-                            continue
-
-                    if filters.get('niveles'):
-                        # nivel_salarial es un diccionario {"codigo": "O11", "descripcion": ...}
-                        nivel_obj = puesto_data.get('identificacion_puesto', {}).get('nivel_salarial', {})
-
-                        # Extraer el código
-                        if isinstance(nivel_obj, dict):
-                            nivel_codigo = nivel_obj.get('codigo', '')
-                        else:
-                            nivel_codigo = str(nivel_obj) if nivel_obj else ''
-
-                        if nivel_codigo and len(nivel_codigo) > 0:
-                            # Extraer primera letra del nivel (G, H, J, K, etc.)
-                            nivel_letra = nivel_codigo[0].upper()
-                            if nivel_letra not in filters['niveles']:
-                                rechazados_por_nivel += 1
-                                continue
-                        else:
-                            # Si no hay nivel, saltar este puesto
-                            rechazados_por_nivel += 1
-                            continue
-
                     # Convertir al formato esperado por el validador
-                    identificacion = puesto_data.get('identificacion_puesto', {})
-
-                    # Extraer nivel_salarial correctamente (es un dict)
-                    nivel_obj = identificacion.get('nivel_salarial', {})
-                    if isinstance(nivel_obj, dict):
-                        nivel_codigo = nivel_obj.get('codigo', '')
-                    else:
-                        nivel_codigo = str(nivel_obj) if nivel_obj else ''
-
-                    puesto_for_validator = {
-                        "codigo": identificacion.get('codigo_puesto', codigo_puesto),
-                        "denominacion": identificacion.get('denominacion_puesto', ''),
-                        "nivel_salarial": nivel_codigo,
-                        "unidad_responsable": identificacion.get('unidad_responsable', ''),
-                        "funciones": []
-                    }
-
-                    # Extraer funciones - están directamente en puesto_data['funciones']
-                    funciones_list = puesto_data.get('funciones', [])
-
-                    for func in funciones_list:
-                        # Manejar campos que pueden ser None
-                        desc_completa = func.get('descripcion_completa') or ''
-                        que_hace = func.get('que_hace')
-                        para_que = func.get('para_que_lo_hace')
-
-                        # Si que_hace es None, usar primeros 100 chars de descripcion_completa
-                        if que_hace is None or not que_hace:
-                            que_hace = desc_completa[:100] if desc_completa else ''
-
-                        puesto_for_validator["funciones"].append({
-                            "id": func.get('numero', 'FXX'),
-                            "descripcion_completa": desc_completa,
-                            "que_hace": que_hace,
-                            "para_que_lo_hace": para_que or ''
-                        })
+                    puesto_for_validator = SidegorAdapter.a_formato_validador(puesto_data, codigo_puesto)
 
                     if len(puesto_for_validator["funciones"]) > 0:
                         puestos_to_validate.append(puesto_for_validator)
@@ -883,10 +879,12 @@ def execute_analysis():
                 st.success(f"✅ {len(puestos_to_validate)} puestos listos para validar")
                 st.info(f"""
                 📊 **Resumen de Filtrado:**
-                - Total procesados: {procesados}
-                - Con errores: {con_error}
+                - Total en archivo: {len(codigos_puestos)}
                 - Rechazados por UR: {rechazados_por_ur}
                 - Rechazados por nivel: {rechazados_por_nivel}
+                - Rechazados por código: {rechazados_por_codigo}
+                - Convertidos: {procesados}
+                - Con errores: {con_error}
                 - Sin funciones: {sin_funciones}
                 - **Aprobados**: {len(puestos_to_validate)}
                 """)
@@ -924,8 +922,8 @@ def execute_analysis():
         llm_provider_type = os.getenv('LLM_PROVIDER', 'openai').lower()
         llm_provider = None
 
-        if llm_provider_type == 'ollama':
-            # Usar Ollama local
+        if llm_provider_type in ('ollama', 'router'):
+            # Usar Ollama local (en modo router, como ruta principal)
             from src.providers.ollama_provider import OllamaProvider
 
             ollama_base_url = os.getenv('OLLAMA_BASE_URL', 'http://ollama:11434')
@@ -937,8 +935,32 @@ def execute_analysis():
                 base_url=ollama_base_url,
                 default_model=ollama_model,
                 timeout=120,  # Mayor timeout para modelos locales
-                enable_logging=True
+                enable_logging=True,
+                keep_alive=os.getenv('OLLAMA_KEEP_ALIVE', '30m'),
+                num_ctx=int(os.getenv('OLLAMA_NUM_CTX')) if os.getenv('OLLAMA_NUM_CTX') else None,
+                stream_json=os.getenv('OLLAMA_STREAM_JSON', 'false').lower() == 'true',
+                schema_format=os.getenv('OLLAMA_SCHEMA_FORMAT', 'true').lower() == 'true'
             )
+
+            if llm_provider_type == 'router':
+                # Local primero; desborde a OpenAI cuando la cola/latencia local excede presupuesto
+                from src.providers.router_provider import LLMRouterProvider
+                from src.providers.openai_provider import OpenAIProvider
+
+                openai_api_key = os.getenv('OPENAI_API_KEY')
+                cloud_model = os.getenv('ROUTER_CLOUD_MODEL', 'openai/gpt-4o-mini')
+                if not openai_api_key:
+                    st.warning("⚠️ LLM_PROVIDER=router sin OPENAI_API_KEY: se usará solo Ollama local")
+
+                local_large_model = os.getenv('ROUTER_LOCAL_LARGE_MODEL')
+                llm_provider = LLMRouterProvider(
+                    local_provider=llm_provider,
+                    cloud_provider=OpenAIProvider(api_key=openai_api_key, default_model=cloud_model) if openai_api_key else None,
+                    max_local_in_flight=int(os.getenv('ROUTER_MAX_LOCAL_IN_FLIGHT', '2')),
+                    local_latency_budget_s=float(os.getenv('ROUTER_LOCAL_LATENCY_BUDGET_S', '60')),
+                    local_models={"large": local_large_model} if local_large_model else None,
+                    cloud_models={"small": cloud_model, "large": os.getenv('ROUTER_CLOUD_LARGE_MODEL', cloud_model)}
+                )
         else:
             # Usar OpenAI API (comportamiento por defecto)
             from src.providers.openai_provider import OpenAIProvider
@@ -956,7 +978,11 @@ def execute_analysis():
         # Crear validador con el provider configurado
         validator = IntegratedValidator(
             normativa_fragments=normativa_fragments,
-            llm_provider=llm_provider
+            llm_provider=llm_provider,
+            function_batch_size=int(os.getenv('FUNCTION_BATCH_SIZE', '1')),
+            function_prescreen=os.getenv('FUNCTION_PRESCREEN', 'false').lower() == 'true',
+            impact_batch_analysis=os.getenv('IMPACT_BATCH_ANALYSIS', 'false').lower() == 'true',
+            normativa_context_tokens=int(os.getenv('NORMATIVA_CONTEXT_TOKENS', '0')) or None
         )
 
         # Paso 5: Validar puestos
@@ -969,20 +995,48 @@ def execute_analysis():
             progress_bar.progress(adjusted)
             status_text.text(f"🔍 Validando puestos... {pct}%")
 
+        # Paralelismo entre puestos y límites globales de la API (opcionales)
+        max_workers = int(os.getenv('MAX_CONCURRENT_ANALYSIS', '1'))
+        rate_limiter = None
+        rpm = os.getenv('LLM_REQUESTS_PER_MINUTE')
+        tpm = os.getenv('LLM_TOKENS_PER_MINUTE')
+        if rpm or tpm:
+            from src.providers.rate_limiter import RateLimiter
+            rate_limiter = RateLimiter(
+                requests_per_minute=float(rpm) if rpm else None,
+                tokens_per_minute=float(tpm) if tpm else None
+            )
+
+        # Métricas LLM de este análisis: el colector es global al proceso de Streamlit
+        from src.providers.metrics import get_metrics_collector
+        metrics_collector = get_metrics_collector()
+        metrics_collector.reset()
+
         resultados = validator.validate_batch(
             puestos_to_validate,
-            progress_callback=update_progress
+            progress_callback=update_progress,
+            max_workers=max_workers,
+            rate_limiter=rate_limiter,
+            deferred=os.getenv('OPENAI_DEFERRED_BATCH', 'false').lower() == 'true'
         )
 
         # Paso 6: Guardar resultados
         status_text.text("💾 Guardando resultados...")
         progress_bar.progress(95)
 
+        # Métricas LLM del análisis (tokens, latencia, reintentos por validador)
+        prometheus_file = os.getenv('LLM_METRICS_PROM_FILE')
+        if prometheus_file:
+            # Formato de texto de Prometheus (p. ej. para el textfile collector de node_exporter)
+            Path(prometheus_file).parent.mkdir(parents=True, exist_ok=True)
+            Path(prometheus_file).write_text(metrics_collector.to_prometheus(), encoding='utf-8')
+
         # Guardar en session state
         st.session_state.analysis_results = {
             'timestamp': datetime.now().isoformat(),
             'total_puestos': len(resultados),
             'resultados': resultados,
+            'metricas_llm': metrics_collector.snapshot(),
             'config': {
                 'filtros': st.session_state.filters_config,
                 'opciones': st.session_state.analysis_options
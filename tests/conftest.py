@@ -0,0 +1,10 @@
+"""
+Configuración de pytest: permite importar el paquete `src` desde la raíz del repo.
+"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
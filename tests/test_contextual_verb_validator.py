@@ -0,0 +1,23 @@
+"""
+Smoke test: ContextualVerbValidator se construye (IntegratedValidator lo crea
+siempre, así que un error de importación deja sin validación todo el sistema).
+"""
+
+from src.validators.context_budget import NormativaContextAssembler
+from src.validators.contextual_verb_validator import ContextualVerbValidator
+from src.validators.shared_utilities import APFContext
+
+
+def test_constructs_with_default_context():
+    validator = ContextualVerbValidator()
+
+    assert isinstance(validator.context, APFContext)
+    assert isinstance(validator.context_assembler, NormativaContextAssembler)
+    assert validator.validation_mode in ("HYBRID", "COMPLETE")
+
+
+def test_uses_given_context():
+    context = APFContext()
+    validator = ContextualVerbValidator(context=context)
+
+    assert validator.context is context
@@ -0,0 +1,48 @@
+"""
+Fallbacks de HierarchicalImpactLLMValidator: solo un LLM no disponible
+(circuito abierto, timeout) marca el resultado como degraded.
+"""
+
+import pytest
+
+import src.validators.hierarchical_impact_llm_validator as impact_module
+from src.validators.hierarchical_impact_llm_validator import HierarchicalImpactLLMValidator
+from src.validators.shared_utilities import APFContext
+
+EXPECTED = {"decision_scope": "institutional", "error_consequences": "tactical", "complexity_level": "analytical"}
+
+
+@pytest.fixture
+def validator(monkeypatch):
+    def use_response(response):
+        monkeypatch.setattr(impact_module, "robust_openai_call", lambda **kwargs: response)
+    return HierarchicalImpactLLMValidator(APFContext()), use_response
+
+
+@pytest.mark.parametrize("error_type, degraded", [
+    ("LLMProviderUnavailableError", True),
+    ("LLMProviderTimeoutError", True),
+    ("LLMProviderError", False),
+    ("JSONDecodeError", False),
+])
+def test_only_unavailable_llm_is_degraded(validator, error_type, degraded):
+    impact, use_response = validator
+    use_response({"status": "error", "error": "x", "error_type": error_type})
+
+    assert impact.analyze_function_impact("Coordinar", "M1", EXPECTED).degraded is degraded
+    assert impact.search_normative_backing("Coordinar", ["fragmento"], "d").degraded is degraded
+    assert all(a.degraded is degraded for a in impact.analyze_functions_impact(["a", "b"], "M1", EXPECTED))
+
+
+def test_missing_batch_item_is_not_degraded(validator):
+    impact, use_response = validator
+    use_response({"status": "success", "data": {"analisis": [{
+        "indice": 1, "scope_level": "institutional", "consequences_level": "tactical",
+        "complexity_level": "analytical", "is_appropriate_for_level": True,
+        "confidence": 0.9, "reasoning": "ok", "detected_issues": []
+    }]}})
+
+    first, missing = impact.analyze_functions_impact(["a", "b"], "M1", EXPECTED)
+
+    assert first.confidence == 0.9 and not first.degraded
+    assert missing.confidence == 0.0 and not missing.degraded
@@ -0,0 +1,74 @@
+"""
+Regresión: una llamada de prueba half-open que no obtiene slot de concurrencia
+debe liberarse, para que el circuito pueda recuperarse.
+"""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import src.providers.ollama_provider as ollama_module
+from src.interfaces.llm_provider import LLMProviderUnavailableError, LLMRequest
+from src.providers.ollama_residency import ModelResidencyManager
+from src.providers.resilience import AdaptiveConcurrencyLimiter, CircuitBreaker
+
+RECOVERY_TIMEOUT = 0.05
+
+
+class _FakeResponse(dict):
+    """Respuesta mínima con la forma de litellm (choices + dict con usage)"""
+
+    def __init__(self, content: str):
+        super().__init__(usage={"prompt_tokens": 5, "completion_tokens": 3, "total_tokens": 8})
+        self.choices = [SimpleNamespace(message=SimpleNamespace(content=content), finish_reason="stop")]
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    monkeypatch.setattr(ollama_module, "LITELLM_AVAILABLE", True)
+    monkeypatch.setattr(ollama_module, "completion", lambda **kwargs: _FakeResponse("ok"), raising=False)
+
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=RECOVERY_TIMEOUT)
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, min_limit=1, max_limit=1, latency_target_s=None)
+    return ollama_module.OllamaProvider(
+        timeout=0.05,
+        max_retries=1,
+        enable_logging=False,
+        circuit_breaker=breaker,
+        concurrency_limiter=limiter,
+        residency_manager=ModelResidencyManager(enable_logging=False)
+    )
+
+
+def test_half_open_probe_released_on_slot_timeout(provider):
+    breaker = provider.circuit_breaker
+    limiter = provider.concurrency_limiter
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    time.sleep(RECOVERY_TIMEOUT * 2)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    # La llamada de prueba es admitida por el breaker pero no obtiene slot
+    limiter.acquire()
+    with pytest.raises(LLMProviderUnavailableError, match="concurrencia"):
+        provider.complete(LLMRequest(prompt="hola"))
+    limiter.release()
+
+    # La siguiente llamada debe admitirse como prueba y cerrar el circuito
+    response = provider.complete(LLMRequest(prompt="hola"))
+    assert response.content == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_open_circuit_fast_fail_does_not_touch_probe_count(provider):
+    breaker = provider.circuit_breaker
+    breaker.record_failure()
+
+    with pytest.raises(LLMProviderUnavailableError, match="Circuito abierto"):
+        provider.complete(LLMRequest(prompt="hola"))
+
+    time.sleep(RECOVERY_TIMEOUT * 2)
+    assert provider.complete(LLMRequest(prompt="hola")).content == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
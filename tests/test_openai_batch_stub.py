@@ -0,0 +1,207 @@
+"""
+Modo diferido (Batch API) contra un servidor HTTP stub local:
+subida del JSONL → creación del batch → polling → mapeo de resultados por custom_id.
+"""
+
+import json
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.interfaces.llm_provider import LLMProviderError, LLMProviderTimeoutError, LLMRequest, LLMResponse
+from src.providers.metrics import get_metrics_collector
+from src.providers.openai_batch import OpenAIBatchProvider
+
+
+class _StubBatchAPI:
+    """Estado del servidor stub: archivos subidos, batches y llamadas recibidas"""
+
+    def __init__(self, polls_until_complete: int = 2, complete: bool = True):
+        self.polls_until_complete = polls_until_complete
+        self.complete = complete
+        self.lock = threading.Lock()
+        self.files = {}
+        self.batches = {}
+        self.calls = []
+
+    def output_for(self, input_jsonl: str) -> str:
+        """Respuesta por línea: eco del prompt; un prompt "falla" produce un error"""
+        lines = []
+        for line in input_jsonl.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            prompt = item["body"]["messages"][-1]["content"]
+            if prompt == "falla":
+                lines.append({"custom_id": item["custom_id"], "response": {
+                    "status_code": 400, "body": {"error": {"message": "prompt inválido"}}}})
+            else:
+                lines.append({"custom_id": item["custom_id"], "response": {"status_code": 200, "body": {
+                    "model": item["body"]["model"],
+                    "choices": [{"message": {"content": f"eco: {prompt}"}, "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5}}}})
+        # Orden inverso: el mapeo debe hacerse por custom_id, no por posición
+        return "\n".join(json.dumps(line) for line in reversed(lines)) + "\n"
+
+
+def _make_handler(api: _StubBatchAPI):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, payload, raw: bool = False):
+            body = payload.encode("utf-8") if raw else json.dumps(payload).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length)
+            with api.lock:
+                api.calls.append(("POST", self.path))
+
+                if self.path == "/files":
+                    content = body.decode("utf-8")
+                    jsonl = "\n".join(l for l in content.splitlines() if l.startswith('{"custom_id"'))
+                    file_id = f"file-{len(api.files) + 1}"
+                    api.files[file_id] = jsonl
+                    return self._send({"id": file_id})
+
+                if self.path == "/batches":
+                    payload = json.loads(body)
+                    batch_id = f"batch-{len(api.batches) + 1}"
+                    api.batches[batch_id] = {"id": batch_id, "status": "validating", "polls": 0,
+                                             "input_file_id": payload["input_file_id"]}
+                    return self._send({"id": batch_id, "status": "validating"})
+
+                match = re.fullmatch(r"/batches/([\w-]+)/cancel", self.path)
+                if match:
+                    api.batches[match.group(1)]["status"] = "cancelled"
+                    return self._send({"id": match.group(1), "status": "cancelled"})
+
+            self.send_error(404)
+
+        def do_GET(self):
+            with api.lock:
+                api.calls.append(("GET", self.path))
+
+                match = re.fullmatch(r"/batches/([\w-]+)", self.path)
+                if match:
+                    batch = api.batches[match.group(1)]
+                    batch["polls"] += 1
+                    if batch["status"] != "cancelled":
+                        if api.complete and batch["polls"] >= api.polls_until_complete:
+                            output_id = f"out-{batch['id']}"
+                            api.files[output_id] = api.output_for(api.files[batch["input_file_id"]])
+                            batch.update(status="completed", output_file_id=output_id)
+                        else:
+                            batch["status"] = "in_progress"
+                    return self._send({k: v for k, v in batch.items() if k != "polls"})
+
+                match = re.fullmatch(r"/files/([\w-]+)/content", self.path)
+                if match:
+                    return self._send(api.files[match.group(1)], raw=True)
+
+            self.send_error(404)
+
+    return Handler
+
+
+@pytest.fixture
+def stub_server():
+    servers = []
+
+    def start(**kwargs):
+        api = _StubBatchAPI(**kwargs)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(api))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return api, f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _provider(base_url: str, **kwargs) -> OpenAIBatchProvider:
+    return OpenAIBatchProvider(
+        api_key="test",
+        base_url=base_url,
+        idle_flush_s=0.05,
+        max_wait_s=1.0,
+        poll_interval_s=0.01,
+        enable_logging=False,
+        **kwargs
+    )
+
+
+def test_requests_from_many_threads_travel_in_one_batch(stub_server):
+    api, base_url = stub_server()
+    provider = _provider(base_url)
+    prompts = [f"puesto {i}" for i in range(6)] + ["falla"]
+
+    def call(prompt):
+        try:
+            return provider.complete(LLMRequest(prompt=prompt, max_tokens=10)).content
+        except LLMProviderError as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=len(prompts)) as pool:
+        results = dict(zip(prompts, pool.map(call, prompts)))
+
+    for prompt in prompts[:-1]:
+        assert results[prompt] == f"eco: {prompt}"
+    assert isinstance(results["falla"], LLMProviderError)
+    assert "prompt inválido" in str(results["falla"])
+
+    assert [c for c in api.calls if c[0] == "POST"] == [("POST", "/files"), ("POST", "/batches")]
+    assert ("GET", "/batches/batch-1") in api.calls
+    assert ("GET", "/files/out-batch-1/content") in api.calls
+
+    stats = provider.get_batch_stats()
+    assert stats["batches_submitted"] == 1
+    assert stats["batches_completed"] == 1
+    assert stats["results_ok"] == 6
+    assert stats["results_error"] == 1
+
+
+def test_result_timeout_is_an_error_and_cancel_releases_batch(stub_server):
+    api, base_url = stub_server(complete=False)
+    provider = _provider(base_url, result_timeout_s=0.3)
+
+    with pytest.raises(LLMProviderTimeoutError):
+        provider.complete(LLMRequest(prompt="lento", max_tokens=10))
+
+    provider.cancel()
+    assert ("POST", "/batches/batch-1/cancel") in api.calls
+    assert api.batches["batch-1"]["status"] == "cancelled"
+    with pytest.raises(LLMProviderError):
+        provider.complete(LLMRequest(prompt="otro", max_tokens=10))
+
+
+class _FallbackProvider:
+    """Provider síncrono de respaldo que registra su llamada como lo hace OpenAIProvider"""
+
+    def complete(self, request):
+        get_metrics_collector().record_call("openai", "gpt-4o-mini", prompt_tokens=3, completion_tokens=2)
+        return LLMResponse(content="respaldo", model="gpt-4o-mini", tokens_used={"total": 5}, finish_reason="stop")
+
+
+def test_fallback_is_recorded_once(stub_server):
+    _, base_url = stub_server()
+    provider = _provider(base_url, fallback_provider=_FallbackProvider())
+    collector = get_metrics_collector()
+    collector.reset()
+
+    assert provider.complete(LLMRequest(prompt="falla", max_tokens=10)).content == "respaldo"
+
+    total = collector.snapshot()["total"]
+    assert total["llamadas"] == 1
+    assert total["errores"] == 0
+    assert provider.get_batch_stats()["fallback_calls"] == 1
@@ -0,0 +1,29 @@
+"""
+RateLimitedProvider: la reserva de tokens vuelve al bucket cuando el provider falla.
+"""
+
+import pytest
+
+from src.interfaces.llm_provider import LLMProviderUnavailableError, LLMRequest
+from src.providers.rate_limiter import RateLimitedProvider, RateLimiter
+
+
+class _FailingProvider:
+    def complete(self, request):
+        raise LLMProviderUnavailableError("circuito abierto")
+
+    def complete_json_with_usage(self, request):
+        raise LLMProviderUnavailableError("circuito abierto")
+
+
+@pytest.mark.parametrize("method", ["complete", "complete_json"])
+def test_failed_call_refunds_reservation(method):
+    limiter = RateLimiter(tokens_per_minute=10_000)
+    provider = RateLimitedProvider(_FailingProvider(), limiter)
+
+    for _ in range(3):
+        with pytest.raises(LLMProviderUnavailableError):
+            getattr(provider, method)(LLMRequest(prompt="x" * 400, max_tokens=2000))
+
+    assert limiter._tokens.tokens == pytest.approx(10_000, abs=1)
+    assert limiter.get_stats()["tokens_used"] == 0